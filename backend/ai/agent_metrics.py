@@ -0,0 +1,66 @@
+import time
+import threading
+
+from agents.tracing import TracingProcessor, AgentSpanData, FunctionSpanData, ResponseSpanData, TurnSpanData
+
+from utils.metrics_utils import Span, observe_span, record_llm_usage
+
+
+class AgentMetricsProcessor(TracingProcessor):
+    """Turns Agents SDK spans (agent runs, runner turns, model responses, tool calls) into metrics."""
+
+    def __init__(self):
+        self._starts = {}
+        self._lock = threading.Lock()
+
+    def on_trace_start(self, trace):
+        pass
+
+    def on_trace_end(self, trace):
+        pass
+
+    def on_span_start(self, span):
+        with self._lock:
+            self._starts[span.span_id] = time.perf_counter()
+
+    def on_span_end(self, span):
+        with self._lock:
+            start = self._starts.pop(span.span_id, None)
+        if start is None:
+            return
+
+        current = self._to_span(span.span_data)
+        if current is None:
+            return
+
+        if span.error:
+            current.status = "error"
+        observe_span(current, time.perf_counter() - start)
+
+    def _to_span(self, data) -> Span | None:
+        if isinstance(data, FunctionSpanData):
+            current = Span("tool", data.name)
+            current.request_bytes = len(data.input.encode("utf-8")) if data.input else 0
+            current.response_bytes = len(str(data.output).encode("utf-8")) if data.output is not None else 0
+            return current
+
+        if isinstance(data, ResponseSpanData):
+            model = getattr(data.response, "model", None) if data.response else None
+            # Tokens are counted here only; turn spans carry the same usage again
+            record_llm_usage(model, data.response.usage if data.response else data.usage)
+            return Span("model", "response", model)
+
+        if isinstance(data, TurnSpanData):
+            return Span("turn", data.agent_name)
+
+        if isinstance(data, AgentSpanData):
+            return Span("agent", data.name)
+
+        return None
+
+    def shutdown(self):
+        with self._lock:
+            self._starts.clear()
+
+    def force_flush(self):
+        pass
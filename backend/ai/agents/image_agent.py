@@ -1,54 +1,85 @@
-import os
-import base64
+import asyncio
 
-from openai import OpenAI
 from agents import function_tool
 
+from ai.model_router import model_router
+from clients.openai_client import OpenAIClient
+from services.image_rendition_service import persist_generated_image
 from utils.ai_utils import load_personal_data_file
+from utils.image_utils import prepare_image_for_vision, image_to_data_url
+from utils.logging_utils import get_logger
+from utils.metrics_utils import span
+from utils.resilience_utils import resilient_call, OPENAI_TEXT_POLICY, OPENAI_IMAGE_POLICY
 
+logger = get_logger(__name__)
 
-@function_tool(description_override="Process image base64 file and return parsed ingredients as text")
-async def image_reader_agent(image_data_temp_file: str, image_type: str = "jpeg"):
-    try:
-        client = OpenAI()
 
-        image_reader_agent_prompt = load_personal_data_file("image_reader_agent_instructions")
+async def read_image_ingredients(image_data: bytes) -> str:
+    client = OpenAIClient().get_client(sdk_retries=False)
+
+    image_reader_agent_prompt = load_personal_data_file("image_reader_agent_instructions")
+
+    # Decoding and resizing is CPU-bound, keep it off the event loop
+    image_bytes, mime_type = await asyncio.to_thread(prepare_image_for_vision, image_data)
+
+    decision = model_router.route("read_image_ingredients", input_type="image")
+    with model_router.track(decision) as tracked, span("agent", "read_image_ingredients", decision.model) as current:
+        current.request_bytes = len(image_bytes)
+        image_transcription = await resilient_call("openai", "read_image_ingredients", lambda: client.responses.create(
+            model=decision.model,
+            input=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "input_text", "text": image_reader_agent_prompt},
+                        {"type": "input_image", "image_url": image_to_data_url(image_bytes, mime_type)},
+                    ],
+                }
+            ],
+        ), OPENAI_TEXT_POLICY)
+        current.record_usage(image_transcription.usage)
+        tracked.usage = image_transcription.usage
 
+    if not image_transcription.output_text:
+        raise ValueError("Transcription failed or returned empty text")
+
+    return image_transcription.output_text
+
+@function_tool(description_override="Process image base64 file and return parsed ingredients as text", failure_error_function=None)
+async def image_reader_agent(image_data_temp_file: str, image_type: str = "jpeg"):
+    try:
         with open(image_data_temp_file, "rb") as image_file:
-            image_base64 = base64.b64encode(image_file.read()).decode("utf-8")
-            image_transcription = client.responses.create(
-                model=os.getenv("IMAGE_READER_MODEL"),
-                input=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_text", "text": image_reader_agent_prompt},
-                            {"type": "input_image", "image_url": f"data:image/{image_type};base64,{image_base64}"},
-                        ],
-                    }
-                ],
-            )
-
-            if not image_transcription.output_text:
-                raise ValueError("Transcription failed or returned empty text")
-
-            return image_transcription.output_text
+            image_data = image_file.read()
+
+        return await read_image_ingredients(image_data)
     except Exception as e:
-        print(f"Error orchestrating message: {e}")
-        
-@function_tool(description_override="Generates an image for a specific recipe.")
-def image_recipe_generator_agent(recipe_prompt: str):
-    try:
-        client = OpenAI()
+        logger.error("Error orchestrating message: %s", e)
+        raise
         
-        response = client.images.generate(
-            model=os.getenv("IMAGE_GENERATOR_MODEL"),
+async def generate_recipe_image(recipe_prompt: str) -> str:
+    client = OpenAIClient().get_client(sdk_retries=False)
+    
+    decision = model_router.route("generate_recipe_image", recipe_prompt)
+    with model_router.track(decision) as tracked, span("agent", "generate_recipe_image", decision.model) as current:
+        current.request_bytes = len(recipe_prompt.encode("utf-8"))
+        # Never hedged: a duplicate image generation costs as much as the first
+        response = await resilient_call("openai", "generate_recipe_image", lambda: client.images.generate(
+            model=decision.model,
             prompt=recipe_prompt,
             size="1024x1024",
             response_format="url"
-        )
-        
-        return response.data[0].url
+        ), OPENAI_IMAGE_POLICY)
+        current.record_usage(getattr(response, "usage", None))
+        tracked.usage = getattr(response, "usage", None)
+    
+    return response.data[0].url
 
-    except ValueError as e:
-        print(f"Error orchestrating message: {e}")
\ No newline at end of file
+@function_tool(description_override="Generates an image for a specific recipe.")
+async def image_recipe_generator_agent(recipe_prompt: str):
+    try:
+        # Hand the agent the stored rendition, so the URL it saves never expires
+        return await persist_generated_image(await generate_recipe_image(recipe_prompt))
+    except Exception as e:
+        logger.error("Error orchestrating message: %s", e)
+        # The image is optional: tell the orchestrator plainly so it saves the recipe instead of retrying
+        return "Image generation is unavailable. Save the recipe without an image."
\ No newline at end of file
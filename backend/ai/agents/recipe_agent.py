@@ -1,27 +1,83 @@
-import os
-import base64
+import json
 
-from openai import OpenAI
 from agents import function_tool
 
+from ai.model_router import model_router
+from clients.openai_client import OpenAIClient
+from schemas.ai_schema import RecipeDesign
+from schemas.recipe_schema import RecipeGeneration
 from utils.ai_utils import load_personal_data_file
+from utils.logging_utils import get_logger
+from utils.metrics_utils import span
+from utils.resilience_utils import resilient_call, OPENAI_TEXT_POLICY
 
-@function_tool(description_override="Provice step-by-step cooking instructions for the given recipe description.")
-async def recipe_instructions_processor_agent(recipe_description: str):
-    try:
-        client = OpenAI()
-        
-        recipe_agent_prompt = load_personal_data_file("voice_agent_instructions")
-        
-        recipe_instructions = client.responses.create(
-            model=os.getenv("OPENAI_MODEL"),
+logger = get_logger(__name__)
+
+
+async def generate_recipe_instructions(recipe_description: str) -> str:
+    client = OpenAIClient().get_client(sdk_retries=False)
+    
+    recipe_agent_prompt = load_personal_data_file("recipe_agent_instructions")
+    
+    decision = model_router.route("generate_recipe_instructions", recipe_description)
+    with model_router.track(decision) as tracked, span("agent", "generate_recipe_instructions", decision.model) as current:
+        current.request_bytes = len(recipe_description.encode("utf-8"))
+        recipe_instructions = await resilient_call("openai", "generate_recipe_instructions", lambda: client.responses.create(
+            model=decision.model,
             instructions=recipe_agent_prompt,
             input='The recipe description is: ' +  recipe_description
-        )
+        ), OPENAI_TEXT_POLICY)
+        current.record_usage(recipe_instructions.usage)
+        tracked.usage = recipe_instructions.usage
+
+    if not recipe_instructions.output_text:
+        raise ValueError("Recipe instruction generation failed or returned empty text")
+
+    return recipe_instructions.output_text
+
+async def design_recipe(ingredients: str, preferences: dict | None = None) -> RecipeDesign:
+    client = OpenAIClient().get_client(sdk_retries=False)
+
+    decision = model_router.route("design_recipe", ingredients)
+    with model_router.track(decision) as tracked, span("agent", "design_recipe", decision.model) as current:
+        recipe_design = await resilient_call("openai", "design_recipe", lambda: client.responses.parse(
+            model=decision.model,
+            instructions=load_personal_data_file("recipe_designer_instructions"),
+            input=f"Ingredientes disponibles: {ingredients}\nPreferencias del usuario: {json.dumps(preferences or {}, ensure_ascii=False)}",
+            text_format=RecipeDesign
+        ), OPENAI_TEXT_POLICY)
+        current.record_usage(recipe_design.usage)
+        tracked.usage = recipe_design.usage
 
-        if not recipe_instructions.output_text:
-            raise ValueError("Recipe instruction generation failed or returned empty text")
+    if not recipe_design.output_parsed:
+        raise ValueError("Recipe design failed or returned empty output")
 
-        return recipe_instructions.output_text
+    return recipe_design.output_parsed
+
+async def generate_structured_recipe(ingredients: str, preferences: dict | None = None) -> RecipeGeneration:
+    client = OpenAIClient().get_client(sdk_retries=False)
+
+    decision = model_router.route("generate_structured_recipe", ingredients)
+    with model_router.track(decision) as tracked, span("agent", "generate_structured_recipe", decision.model) as current:
+        recipe_generation = await resilient_call("openai", "generate_structured_recipe", lambda: client.responses.parse(
+            model=decision.model,
+            instructions=load_personal_data_file("recipe_generator_instructions"),
+            input=f"Ingredientes disponibles: {ingredients}\nPreferencias del usuario: {json.dumps(preferences or {}, ensure_ascii=False)}",
+            text_format=RecipeGeneration
+        ), OPENAI_TEXT_POLICY)
+        current.record_usage(recipe_generation.usage)
+        tracked.usage = recipe_generation.usage
+
+    if not recipe_generation.output_parsed:
+        raise ValueError("Recipe generation failed or returned empty output")
+
+    return recipe_generation.output_parsed
+
+# Failures end the run instead of coming back to the orchestrator as text it would spend turns recovering from
+@function_tool(description_override="Provice step-by-step cooking instructions for the given recipe description.", failure_error_function=None)
+async def recipe_instructions_processor_agent(recipe_description: str):
+    try:
+        return await generate_recipe_instructions(recipe_description)
     except Exception as e:
-        print(f"Error orchestrating message: {e}")
\ No newline at end of file
+        logger.error("Error orchestrating message: %s", e)
+        raise
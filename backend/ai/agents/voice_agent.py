@@ -1,31 +1,57 @@
 import os
+import asyncio
 
-from openai import OpenAI
 from agents import function_tool
 
+from ai.model_router import model_router
+from clients.openai_client import OpenAIClient
 from utils.ai_utils import load_personal_data_file, delete_temp_file
-
-
-@function_tool(description_override="Process voice input and return parsed ingredients as text")
+from utils.audio_utils import preprocess_audio
+from utils.logging_utils import get_logger
+from utils.metrics_utils import span
+from utils.resilience_utils import resilient_call, OPENAI_TEXT_POLICY
+
+logger = get_logger(__name__)
+
+
+async def transcribe_voice_ingredients(voice_file, file_name: str = "audio.wav") -> str:
+    client = OpenAIClient().get_client(sdk_retries=False)
+    
+    voice_agent_prompt = load_personal_data_file("voice_agent_instructions")
+
+    # Resample to 16 kHz mono, trim silence and split long recordings on pauses
+    chunks = await asyncio.to_thread(preprocess_audio, voice_file.read(), file_name)
+    if not chunks:
+        raise ValueError("Audio contains no speech")
+
+    decision = model_router.route("transcribe_voice_ingredients", input_type="audio")
+    with model_router.track(decision) as tracked, span("agent", "transcribe_voice_ingredients", decision.model) as current:
+        current.request_bytes = sum(len(chunk_data) for chunk_data, _ in chunks)
+        # Priced per chunk: chunks are at most AUDIO_MAX_CHUNK_SECONDS (30 s), half a minute of per-minute billing
+        tracked.calls = len(chunks)
+        transcriptions = await asyncio.gather(*[
+            resilient_call("openai", "transcribe_voice_ingredients", lambda chunk_name=chunk_name, chunk_data=chunk_data: client.audio.transcriptions.create(
+                model=decision.model,
+                prompt=voice_agent_prompt,
+                file=(chunk_name, chunk_data),
+                response_format="text"
+            ), OPENAI_TEXT_POLICY)
+            for chunk_data, chunk_name in chunks
+        ])
+
+    transcription = " ".join(text.strip() for text in transcriptions if text and text.strip())
+    if not transcription:
+        raise ValueError("Transcription failed or returned empty text")
+
+    return transcription
+
+@function_tool(description_override="Process voice input and return parsed ingredients as text", failure_error_function=None)
 async def voice_processor_agent(voice_data_file_path: str):
     try:
-        client = OpenAI()
-        
-        voice_agent_prompt = load_personal_data_file("voice_agent_instructions")
-
         with open(voice_data_file_path, "rb") as voice_data_file:
-                transcription = client.audio.transcriptions.create(
-                    model=os.getenv("VOICE_MODEL"),
-                    prompt=voice_agent_prompt,
-                    file=voice_data_file,
-                    response_format="text"
-                )
-
-                delete_temp_file(voice_data_file_path)
-
-                if not transcription:
-                    raise ValueError("Transcription failed or returned empty text")
-
-                return transcription
+            return await transcribe_voice_ingredients(voice_data_file, os.path.basename(voice_data_file_path))
     except Exception as e:
-        print(f"Error orchestrating message: {e}")
+        logger.error("Error orchestrating message: %s", e)
+        raise
+    finally:
+        delete_temp_file(voice_data_file_path)
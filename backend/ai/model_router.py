@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from agents import RunHooks
+
+from utils.ingredient_utils import split_ingredients
+from utils.logging_utils import get_logger
+from utils.metrics_utils import MODEL_ROUTE_DECISIONS, MODEL_ROUTE_SECONDS, MODEL_ROUTE_TOKENS, MODEL_ROUTE_COST, usage_tokens
+from utils.resilience_utils import remaining_budget
+
+logger = get_logger(__name__)
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "model_routing.json"
+# JSON object of model -> price merged over the config's prices, for models it does not list (fine-tunes, proxies)
+MODEL_ROUTING_PRICES = os.getenv("MODEL_ROUTING_PRICES")
+PRICE_FIELDS = ("input_cost_per_million", "output_cost_per_million", "cost_per_call")
+# Dated snapshots such as gpt-4o-2024-08-06 are billed like the model they pin
+SNAPSHOT_SUFFIX = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+# Recent latencies kept per stage and tier, and how many are needed before they steer routing
+LATENCY_WINDOW = int(os.getenv("MODEL_ROUTING_LATENCY_WINDOW", "50"))
+LATENCY_MIN_SAMPLES = int(os.getenv("MODEL_ROUTING_MIN_SAMPLES", "5"))
+# A tier skipped for being slow gets no new samples, so old ones expire and it is tried again
+LATENCY_SAMPLE_TTL = float(os.getenv("MODEL_ROUTING_SAMPLE_TTL", "300"))
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    stage: str
+    tier: str
+    model: str | None
+    reason: str
+
+
+class RouteTracker:
+    __slots__ = ("decision", "usage", "calls")
+
+    def __init__(self, decision: RouteDecision):
+        self.decision = decision
+        self.usage = None
+        self.calls = 1
+
+
+class RouteRunHooks(RunHooks):
+    """Times each model response of an agent run on its own, so tool calls between turns never count as model latency."""
+
+    def __init__(self, router, decision: RouteDecision):
+        self.router = router
+        self.decision = decision
+        self._started_at = None
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._started_at = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response):
+        started_at, self._started_at = self._started_at, None
+        if started_at is not None:
+            self.router.observe(self.decision, time.perf_counter() - started_at, usage=response.usage)
+
+    def fail(self):
+        # A response cut short by an error still counts towards the tier's latency
+        started_at, self._started_at = self._started_at, None
+        if started_at is not None:
+            self.router.observe(self.decision, time.perf_counter() - started_at, "error")
+
+
+class ModelRouter:
+    """Picks the model tier for each pipeline stage from the routing config, the input and recently observed latency."""
+
+    def __init__(self, config_path: Path | None = None):
+        self.config_path = config_path
+        self._tiers = {}
+        self._stages = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        path = self.config_path or Path(os.getenv("MODEL_ROUTING_CONFIG") or DEFAULT_CONFIG_PATH)
+        config = json.loads(path.read_text(encoding="utf-8"))
+
+        prices = {**config.get("prices", {}), **(json.loads(MODEL_ROUTING_PRICES) if MODEL_ROUTING_PRICES else {})}
+
+        tiers = {}
+        for name, tier in config["tiers"].items():
+            model = os.getenv(tier["model_env"]) if tier.get("model_env") else None
+            # A tier whose model is not configured is skipped, so routing falls back to the stage default
+            tiers[name] = {**tier, "model": model or tier.get("model")}
+
+        stages = config["stages"]
+        routed = set()
+        for stage, settings in stages.items():
+            for tier in [settings["default"], settings.get("fallback"), *(rule["tier"] for rule in settings.get("rules", []))]:
+                if tier and tier not in tiers:
+                    raise ValueError(f"Routing stage {stage} refers to unknown tier {tier}")
+                if tier:
+                    routed.add(tier)
+
+        # Without a price MODEL_ROUTE_COST silently stays at zero, so an unpriced model is a config error
+        for name in routed:
+            tier = tiers[name]
+            if not tier["model"] or any(tier.get(field) is not None for field in PRICE_FIELDS):
+                continue
+            price = prices.get(tier["model"]) or prices.get(SNAPSHOT_SUFFIX.sub("", tier["model"]))
+            if not price or all(price.get(field) is None for field in PRICE_FIELDS):
+                raise ValueError(f"Routing tier {name} uses model {tier['model']}, which has no price in {path} or MODEL_ROUTING_PRICES")
+            tiers[name] = {**tier, **{field: price[field] for field in PRICE_FIELDS if field in price}}
+
+        with self._lock:
+            self._tiers, self._stages = tiers, stages
+        logger.info("Model routing loaded from %s (tiers enabled: %s)", path, ", ".join(name for name, tier in tiers.items() if tier["model"]))
+
+    def _available(self, tier: str | None) -> bool:
+        return bool(tier) and bool(self._tiers[tier]["model"])
+
+    def _matches(self, rule: dict, input_type: str, input_chars: int, ingredient_count: int) -> bool:
+        if "input_types" in rule and input_type not in rule["input_types"]:
+            return False
+        if "max_chars" in rule and input_chars > rule["max_chars"]:
+            return False
+        if "max_ingredients" in rule and ingredient_count > rule["max_ingredients"]:
+            return False
+        return True
+
+    def recent_latency(self, stage: str, tier: str, quantile: float = 0.9) -> float | None:
+        cutoff = time.monotonic() - LATENCY_SAMPLE_TTL
+        ordered = sorted(seconds for observed_at, seconds in list(self._latencies.get((stage, tier), ())) if observed_at >= cutoff)
+        if len(ordered) < LATENCY_MIN_SAMPLES:
+            return None
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    def route(self, stage: str, input_text: str = "", input_type: str = "text") -> RouteDecision:
+        if not self._stages:
+            self.load()
+
+        settings = self._stages[stage]
+        tier, reason = settings["default"], "default"
+
+        ingredient_count = len(split_ingredients(input_text)) if input_text else 0
+        for rule in settings.get("rules", []):
+            if self._available(rule["tier"]) and self._matches(rule, input_type, len(input_text), ingredient_count):
+                tier, reason = rule["tier"], "rule"
+                break
+
+        # Move to the fallback tier when the chosen one is currently too slow for the SLO or for what is left of the request budget
+        fallback = settings.get("fallback")
+        if fallback and fallback != tier and self._available(fallback):
+            latency = self.recent_latency(stage, tier)
+            remaining = remaining_budget()
+            if latency is not None and (latency > settings.get("slo_seconds", float("inf")) or (remaining is not None and latency > remaining)):
+                tier, reason = fallback, "slo"
+
+        if not self._available(tier):
+            tier, reason = settings["default"], "default"
+
+        MODEL_ROUTE_DECISIONS.labels(stage, tier, reason).inc()
+        return RouteDecision(stage, tier, self._tiers[tier]["model"], reason)
+
+    def observe(self, decision: RouteDecision, seconds: float, status: str = "ok", usage=None, calls: int = 1):
+        MODEL_ROUTE_SECONDS.labels(decision.stage, decision.tier, status).observe(seconds)
+        with self._lock:
+            samples = self._latencies.setdefault((decision.stage, decision.tier), deque(maxlen=LATENCY_WINDOW))
+            samples.append((time.monotonic(), seconds))
+
+        tier = self._tiers.get(decision.tier, {})
+        cost = (tier.get("cost_per_call") or 0) * calls
+        input_tokens, output_tokens = usage_tokens(usage)
+        if input_tokens:
+            MODEL_ROUTE_TOKENS.labels(decision.stage, decision.tier, "input").inc(input_tokens)
+            cost += input_tokens * (tier.get("input_cost_per_million") or 0) / 1_000_000
+        if output_tokens:
+            MODEL_ROUTE_TOKENS.labels(decision.stage, decision.tier, "output").inc(output_tokens)
+            cost += output_tokens * (tier.get("output_cost_per_million") or 0) / 1_000_000
+        if cost:
+            MODEL_ROUTE_COST.labels(decision.stage, decision.tier).inc(cost)
+
+    @contextmanager
+    def track(self, decision: RouteDecision):
+        # Failures and timeouts count towards the observed latency, they are what puts the SLO at risk
+        tracker = RouteTracker(decision)
+        start = time.perf_counter()
+        try:
+            yield tracker
+        except (asyncio.CancelledError, GeneratorExit):
+            # The caller went away, which says nothing about the model
+            raise
+        except BaseException:
+            self.observe(decision, time.perf_counter() - start, "error", tracker.usage, tracker.calls)
+            raise
+        self.observe(decision, time.perf_counter() - start, "ok", tracker.usage, tracker.calls)
+
+    @contextmanager
+    def run_hooks(self, decision: RouteDecision):
+        hooks = RouteRunHooks(self, decision)
+        try:
+            yield hooks
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except BaseException:
+            hooks.fail()
+            raise
+
+    def stats(self) -> dict:
+        return {
+            f"{stage}:{tier}": {"samples": len(samples), "p90_seconds": self.recent_latency(stage, tier)}
+            for (stage, tier), samples in self._latencies.items()
+        }
+
+
+model_router = ModelRouter()
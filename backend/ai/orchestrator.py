@@ -1,48 +1,335 @@
+import io
 import os
+import re
+import json
+import time
+import base64
+import asyncio
+from functools import lru_cache
 
 from agents import Agent, Runner
 
-from repositories.recipe_repository import insert_recipe, insert_recipe_ingredient, insert_recipe_step, insert_recipe_image
+from clients.supabase_client import AsyncSupabaseClient
+from repositories.recipe_repository import RecipeRepository
+from repositories.user_repository import UserRepository
 
 from repositories.schema_repository import get_all_table_schemas
-from ai.agents.image_agent import image_reader_agent, image_recipe_generator_agent
-from ai.agents.voice_agent import voice_processor_agent
-from ai.agents.recipe_agent import recipe_instructions_processor_agent
+from ai.agents.image_agent import image_reader_agent, image_recipe_generator_agent, read_image_ingredients, generate_recipe_image
+from ai.agents.voice_agent import voice_processor_agent, transcribe_voice_ingredients
+from ai.agents.recipe_agent import recipe_instructions_processor_agent, generate_recipe_instructions, generate_structured_recipe, design_recipe
+from ai.model_router import model_router
+from ai.recipe_cache import recipe_cache
+from schemas.ai_schema import McpMetadata, GenerationResponse
+from schemas.recipe_schema import RecipeInsert, RecipeStepMetadataInsert
+from services.image_rendition_service import persist_generated_image
+from services.recipe_service import RecipeService, insert_recipe, insert_recipe_ingredient, insert_recipe_step, insert_recipe_image
 from utils.ai_utils import load_personal_data_file, base64_to_temp_file, delete_temp_file
+from utils.exceptions import BaseAppException, BadGatewayException
+from utils.logging_utils import get_logger
+from utils.metrics_utils import span
+from utils.resilience_utils import DeadlineExceeded, deadline, remaining_budget
 
+logger = get_logger(__name__)
 
 
-async def orchestrate_message(content, user_id):
+# "agent" lets the LLM pick tools turn by turn, "pipeline" runs the fixed DAG below,
+# "structured" generates the whole recipe in a single structured-output call
+ORCHESTRATION_MODE = os.getenv("ORCHESTRATION_MODE", "agent")
+STRUCTURED_GENERATE_IMAGE = os.getenv("STRUCTURED_GENERATE_IMAGE", "true").lower() == "true"
+AI_REQUEST_BUDGET = float(os.getenv("AI_REQUEST_BUDGET", "120"))
+
+@lru_cache(maxsize=4)
+def get_orchestrator(model: str | None = None) -> Agent:
+    # Built once per routed model and reused; instructions resolve per run so prompt hot-reload still applies
+    return Agent(
+        name="Master Chief",
+        model=model or os.getenv("OPENAI_MODEL"),
+        instructions=orchestrator_instructions,
+        tools=[
+            image_reader_agent,
+            voice_processor_agent,
+            recipe_instructions_processor_agent,
+            image_recipe_generator_agent,
+            get_all_table_schemas,
+            insert_recipe,
+            insert_recipe_ingredient,
+            insert_recipe_step,
+            insert_recipe_image
+        ]
+    )
+
+def route_orchestrator(content):
+    # Image and audio payloads are base64, only text says anything about how hard the recipe is
+    return model_router.route("orchestrator", content.content if content.tool == 'text' else "", content.tool)
+
+def orchestrator_instructions(run_context, agent) -> str:
+    return load_personal_data_file("orchestrator_instructions")
+
+async def orchestrate_message(content, user_id, source_type=None) -> GenerationResponse:
+    # source_type is the original input when content has already been reduced to text, as for uploads
     temp_file = None
     try:
-        orchestrator = Agent(
-            name="Master Chief",
-            model=os.getenv("OPENAI_MODEL"),
-            instructions=load_personal_data_file("orchestrator_instructions"),
-            tools=[
-                image_reader_agent,
-                voice_processor_agent,
-                recipe_instructions_processor_agent,
-                image_recipe_generator_agent,
-                get_all_table_schemas,
-                insert_recipe,
-                insert_recipe_ingredient,
-                insert_recipe_step,
-                insert_recipe_image
-            ]
-        )
+        # Every model and database call below shares this budget
+        with deadline(AI_REQUEST_BUDGET):
+            mode = content.mode or ORCHESTRATION_MODE
+            source_type = source_type or content.tool
+            cache_key = None
+            preferences = None
+
+            if recipe_cache.enabled or mode in ("pipeline", "structured"):
+                content = await extract_ingredients(content)
+                preferences = await load_user_preferences(user_id)
+
+            # Without the user's constraints a cached recipe might not be safe to serve
+            if recipe_cache.enabled and preferences is not None:
+                cache_key = recipe_cache.build_key(content.content, preferences)
+                cached_output = await serve_cached_recipe(cache_key, user_id, source_type, content.content)
+                if cached_output:
+                    return cached_output
+
+            with span("orchestration", mode):
+                if mode == "pipeline":
+                    output = await run_recipe_pipeline(content, user_id, source_type, preferences)
+                elif mode == "structured":
+                    output = await run_structured_generation(content, user_id, source_type, preferences)
+                else:
+                    orchestrator_payload, temp_file = generate_runner_payload(content, user_id, source_type)
+                    decision = route_orchestrator(content)
+                    # Runner turns, model responses and tool calls are timed by AgentMetricsProcessor;
+                    # the routing hooks only time the orchestrator's own model responses
+                    with model_router.run_hooks(decision) as hooks:
+                        try:
+                            async with asyncio.timeout(remaining_budget()):
+                                result = await Runner.run(get_orchestrator(decision.model), orchestrator_payload, hooks=hooks)
+                        except asyncio.TimeoutError as e:
+                            raise DeadlineExceeded("Request budget exhausted during the orchestrator run") from e
+                        finally:
+                            # The tools may have written rows before the run failed
+                            get_recipe_service().recipes_changed(user_id)
+                    output = agent_response(result)
+
+            if cache_key and output.id:
+                recipe_cache.store(cache_key, {"recipe_id": output.id, "message": output.message})
+
+            return output
+    except Exception as e:
+        raise generation_error(e)
+    finally:
+        if temp_file:
+            delete_temp_file(temp_file)
+
+def generation_error(error: Exception) -> BaseAppException:
+    # Tool failures reach us wrapped in the Agents SDK's UserError; the cause carries the status for the client,
+    # such as 503 from an open circuit or 504 from the request deadline
+    cause = error
+    while cause is not None:
+        if isinstance(cause, BaseAppException):
+            logger.warning("Error orchestrating message: %s", cause)
+            return cause
+        cause = cause.__cause__
+    logger.exception("Error orchestrating message: %s", error)
+    return BadGatewayException("Error generating recipe")
 
+async def run_recipe_pipeline(content, user_id, source_type, preferences=None, timings=None) -> GenerationResponse:
+    # Fixed DAG: ingredients -> design -> (steps || image) -> single insert
+    timings = timings if timings is not None else {}
+
+    start = time.perf_counter()
+    design = await design_recipe(content.content, preferences)
+    timings["design"] = time.perf_counter() - start
+
+    ingredient_names = ", ".join(ingredient.name for ingredient in design.ingredients)
+    recipe_description = f"{design.title}. {design.description} Ingredientes: {ingredient_names}"
+
+    start = time.perf_counter()
+    instructions, image_url = await asyncio.gather(
+        generate_recipe_instructions(recipe_description),
+        generate_stored_recipe_image(design.image_prompt),
+        return_exceptions=True
+    )
+    timings["steps_and_image"] = time.perf_counter() - start
+
+    if isinstance(instructions, Exception):
+        raise instructions
+    if isinstance(image_url, Exception):
+        # The image is optional, the recipe is still worth saving without it
+        logger.warning("Error generating recipe image: %s", image_url)
+        image_url = None
+
+    start = time.perf_counter()
+    recipe = await get_recipe_service().insert_recipe(RecipeInsert(
+        user_id=user_id,
+        title=design.title,
+        recipe_metadata={"tags": design.tags, "calorias": design.calorias},
+        source_type=source_type,
+        source_data=content.content,
+        ingredients=design.ingredients,
+        steps=parse_recipe_steps(instructions),
+        image_url=image_url
+    ))
+    timings["insert"] = time.perf_counter() - start
+
+    if not recipe:
+        raise ValueError("Recipe insert returned no row")
+
+    return GenerationResponse(status="success", id=recipe.id, title=recipe.title)
+
+async def generate_stored_recipe_image(image_prompt: str) -> str:
+    # Downloading and re-encoding the renditions stays on the image branch, alongside the steps
+    return await persist_generated_image(await generate_recipe_image(image_prompt))
+
+async def run_structured_generation(content, user_id, source_type, preferences=None) -> GenerationResponse:
+    # One schema-validated model call produces the whole RecipeInsert; the backend persists it itself
+    generation = await generate_structured_recipe(content.content, preferences)
+
+    image_url = None
+    if STRUCTURED_GENERATE_IMAGE:
+        try:
+            image_url = await generate_stored_recipe_image(generation.image_prompt)
+        except Exception as e:
+            # The image is optional, the recipe is still worth saving without it
+            logger.warning("Error generating recipe image: %s", e)
+
+    recipe = await get_recipe_service().insert_recipe(
+        generation.to_insert(user_id, source_type, content.content, image_url)
+    )
+    if not recipe:
+        raise ValueError("Recipe insert returned no row")
+
+    return GenerationResponse(status="success", id=recipe.id, title=recipe.title)
+
+def parse_recipe_steps(instructions: str) -> list[RecipeStepMetadataInsert]:
+    # The recipe agent answers with a JSON array of strings, sometimes fenced or as plain lines
+    text = instructions.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        steps = json.loads(text)
+        if not isinstance(steps, list):
+            raise ValueError("Expected a list of steps")
+    except ValueError:
+        steps = [re.sub(r"^\s*(\d+[.)]|[-*])\s*", "", line) for line in text.splitlines() if line.strip()]
+
+    return [
+        RecipeStepMetadataInsert(step_number=index, instruction=str(step).strip())
+        for index, step in enumerate(steps, start=1)
+        if str(step).strip()
+    ]
+
+async def extract_ingredients(content):
+    # Image and audio inputs are reduced to an ingredient list up front so they share the text cache.
+    # The text reaches the models as written: only the cache key and stored ingredient names are canonicalized
+    if content.tool == 'text':
+        return content
+
+    suffix = "jpg" if content.tool == 'image' else "wav"
+    ingredients = await read_ingredients_from_file(content.tool, io.BytesIO(base64.b64decode(content.content)), f"upload.{suffix}")
+    return McpMetadata(type=content.type, tool='text', content=ingredients, mode=content.mode)
+
+async def read_ingredients_from_file(tool, file, file_name):
+    if tool == 'image':
+        return await read_image_ingredients(file.read())
+    return await transcribe_voice_ingredients(file, file_name)
+
+async def orchestrate_upload(upload, tool, message_type, user_id, mode=None):
+    # Multipart uploads skip base64 entirely: the spooled buffer goes straight to the reader agents
+    try:
+        ingredients = await read_ingredients_from_file(tool, upload.file, upload.filename)
+    except Exception as e:
+        raise generation_error(e)
+
+    return await orchestrate_message(McpMetadata(type=message_type, tool='text', content=ingredients, mode=mode), user_id, source_type=tool)
+
+def get_recipe_service() -> RecipeService:
+    # Recipe writes go through the service, which drops the user's cached recipe responses
+    return RecipeService(RecipeRepository(AsyncSupabaseClient()))
+
+async def load_user_preferences(user_id) -> dict | None:
+    try:
+        preferences = await UserRepository(AsyncSupabaseClient()).get_user_nutritional_preferences(user_id)
+        return preferences or {}
+    except Exception as e:
+        logger.exception("Error fetching user preferences: %s", e)
+        return None
+
+async def serve_cached_recipe(cache_key, user_id, source_type, source_data):
+    cached = recipe_cache.lookup(cache_key) if cache_key else None
+    if not cached:
+        return None
+
+    recipe = await get_recipe_service().copy_recipe_to_user(
+        cached["recipe_id"], user_id, source_type, source_data
+    )
+    # Answer with the user's own copy, not the recipe it was copied from
+    return GenerationResponse(status="success", id=recipe.id, title=recipe.title, message=cached.get("message")) if recipe else None
+
+def agent_response(result) -> GenerationResponse:
+    # The orchestrator answers in free text; the recipe it saved comes from the insert_recipe tool output
+    message = str(result.final_output) if result.final_output is not None else None
+    for item in result.new_items:
+        output = getattr(item, "output", None)
+        if item.type == "tool_call_output_item" and isinstance(output, dict) and output.get("status") == "success" and "id" in output:
+            return GenerationResponse(status="success", id=output["id"], title=output.get("title"), message=message)
+    return GenerationResponse(status="error", message=message)
+
+# Tool outputs that the client cares about, mapped to SSE event names
+TOOL_OUTPUT_EVENTS = {
+    "image_reader_agent": "ingredients_extracted",
+    "voice_processor_agent": "ingredients_extracted",
+    "recipe_instructions_processor_agent": "steps_ready",
+    "image_recipe_generator_agent": "image_ready",
+}
+
+async def stream_orchestration(content, user_id):
+    temp_file = None
+    try:
         orchestrator_payload, temp_file = generate_runner_payload(content, user_id)
 
-        result = await Runner.run(orchestrator, orchestrator_payload)
-        return result.final_output
+        yield "started", {"tool": content.tool}
+        if content.tool == 'text':
+            yield "ingredients_extracted", {"ingredients": content.content}
+
+        decision = route_orchestrator(content)
+        # The streaming run executes in its own task, which copies the deadline when it is created
+        with model_router.run_hooks(decision) as hooks:
+            with deadline(AI_REQUEST_BUDGET):
+                result = Runner.run_streamed(get_orchestrator(decision.model), orchestrator_payload, hooks=hooks)
+            tool_names = {}
+
+            async for event in result.stream_events():
+                if event.type != "run_item_stream_event":
+                    continue
+
+                if event.name == "tool_called":
+                    raw_item = event.item.raw_item
+                    tool_name = getattr(raw_item, "name", None)
+                    tool_names[getattr(raw_item, "call_id", None)] = tool_name
+                    yield "tool_started", {"tool": tool_name}
+
+                elif event.name == "tool_output":
+                    raw_item = event.item.raw_item
+                    call_id = raw_item.get("call_id") if isinstance(raw_item, dict) else getattr(raw_item, "call_id", None)
+                    tool_name = tool_names.get(call_id)
+                    output = event.item.output
+                    yield "tool_finished", {"tool": tool_name}
+
+                    if tool_name in TOOL_OUTPUT_EVENTS:
+                        yield TOOL_OUTPUT_EVENTS[tool_name], {"tool": tool_name, "output": output}
+                    elif tool_name == "insert_recipe" and isinstance(output, dict) and output.get("status") == "success":
+                        yield "title_chosen", {"title": output.get("title")}
+                        yield "recipe_saved", {"recipe_id": output.get("id")}
+
+        yield "done", {"final_output": result.final_output}
     except Exception as e:
-        print(f"Error orchestrating message: {e}")
+        # The response status is already sent, so the error event carries the one the request would have had
+        error = generation_error(e)
+        yield "error", {"message": error.message, "status": error.status_code}
     finally:
+        get_recipe_service().recipes_changed(user_id)
         if temp_file:
             delete_temp_file(temp_file)
-        
-def generate_runner_payload(content, user_id):
+
+def generate_runner_payload(content, user_id, source_type=None):
+    if content.tool == 'text' and source_type not in (None, 'text'):
+        return f"The user {user_id} is trying to generate a recipe from {source_type} data, already read as the following ingredients: {content.content}. Save the recipe with source_type '{source_type}'.", None
     if content.tool == 'text':
         return f"The user {user_id} is trying to generate a recipe providing the following ingredients or data: {content.content}", None
     elif content.tool == 'image':
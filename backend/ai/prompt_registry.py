@@ -0,0 +1,81 @@
+import os
+import hashlib
+import threading
+from pathlib import Path
+
+
+REQUIRED_PROMPTS = (
+    "orchestrator_instructions",
+    "image_reader_agent_instructions",
+    "voice_agent_instructions",
+    "recipe_agent_instructions",
+    "recipe_designer_instructions",
+    "recipe_generator_instructions",
+)
+
+
+class PromptRegistry:
+    """Agent instructions loaded once from ai/instructions and served from memory."""
+
+    def __init__(self, directory: Path | None = None, hot_reload: bool = False):
+        self.directory = directory
+        self.hot_reload = hot_reload
+        self._prompts = {}
+        self._lock = threading.Lock()
+
+    def _resolve_directory(self) -> Path:
+        if self.directory:
+            return self.directory
+
+        routes = os.getenv("AGENT_ROUTES")
+        if not routes:
+            raise EnvironmentError("AGENT_ROUTES environment variable is not set")
+
+        # Resuelve la ruta desde la raíz del backend
+        return Path(__file__).parent.parent / routes.lstrip('/')
+
+    def _read(self, path: Path) -> dict:
+        text = path.read_text(encoding="utf-8")
+        if not text.strip():
+            raise ValueError(f"Agent instructions file is empty: {path}")
+
+        return {
+            "text": text,
+            "path": path,
+            "mtime": path.stat().st_mtime_ns,
+            "version": hashlib.sha256(text.encode("utf-8")).hexdigest()[:12],
+        }
+
+    def load(self):
+        directory = self._resolve_directory()
+        prompts = {path.stem: self._read(path) for path in sorted(directory.glob("*.md"))}
+
+        missing = [name for name in REQUIRED_PROMPTS if name not in prompts]
+        if missing:
+            raise FileNotFoundError(f"Agent instructions files not found in {directory}: {', '.join(missing)}")
+
+        with self._lock:
+            self._prompts = prompts
+
+    def get(self, name: str) -> str:
+        if not self._prompts:
+            self.load()
+
+        prompt = self._prompts.get(name)
+        if prompt is None:
+            raise FileNotFoundError(f"Agent instructions file not found: {name}.md")
+
+        if self.hot_reload and prompt["path"].stat().st_mtime_ns != prompt["mtime"]:
+            prompt = self._read(prompt["path"])
+            with self._lock:
+                self._prompts[name] = prompt
+
+        return prompt["text"]
+
+    def versions(self) -> dict[str, str]:
+        if not self._prompts:
+            self.load()
+        return {name: prompt["version"] for name, prompt in self._prompts.items()}
+
+
+prompt_registry = PromptRegistry(hot_reload=os.getenv("PROMPTS_HOT_RELOAD", "false").lower() == "true")
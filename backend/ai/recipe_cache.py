@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+
+from utils.cache_utils import TTLCache
+from utils.ingredient_utils import fold_text
+from utils.canonicalization_utils import ingredient_canonicalizer
+from utils.metrics_utils import RECIPE_CACHE_LOOKUPS
+
+
+# Preferences that change which recipe is acceptable for the same pantry
+CACHE_PREFERENCE_FIELDS = ("allergens", "diet_type", "avoid_foods")
+
+
+class MemoryRecipeCacheBackend:
+    def __init__(self, maxsize: int = 1000, ttl: float = 86400):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> list[dict]:
+        return self._cache.get(key) or []
+
+    def add(self, key: str, variant: dict):
+        # Read-modify-write under one lock so concurrent stores never drop each other's variant
+        with self._lock:
+            self._cache.set(key, self.get(key) + [variant])
+
+
+class SqliteRecipeCacheBackend:
+    def __init__(self, path: str, maxsize: int = 1000, ttl: float = 86400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recipe_cache (
+                key TEXT PRIMARY KEY,
+                variants TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS recipe_cache_last_access_idx ON recipe_cache (last_access)")
+        self._connection.commit()
+
+    def get(self, key: str) -> list[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT variants FROM recipe_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if not row:
+                return []
+            self._connection.execute("UPDATE recipe_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+        return json.loads(row[0])
+
+    def add(self, key: str, variant: dict):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT variants FROM recipe_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            variants = (json.loads(row[0]) if row else []) + [variant]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO recipe_cache (key, variants, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(variants), now + self.ttl, now),
+            )
+            self._connection.execute("DELETE FROM recipe_cache WHERE expires_at <= ?", (now,))
+            self._connection.execute(
+                "DELETE FROM recipe_cache WHERE key IN (SELECT key FROM recipe_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            self._connection.commit()
+
+
+class RecipeCache:
+    """Generated recipes keyed by canonical ingredients plus the user's dietary constraints."""
+
+    def __init__(self, backend=None, variants_per_key: int = 3):
+        self.backend = backend
+        self.variants_per_key = variants_per_key
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def build_key(self, ingredients: list[str] | str, preferences: dict | None = None) -> str:
+        preferences = preferences or {}
+        key_data = {
+            # Exact and synonym matches only: "pechuga" and "lechuga" are one typo apart but never the same recipe
+            "ingredients": sorted({fold_text(name) for name in ingredient_canonicalizer.canonicalize_many(ingredients)}),
+            # "arroz, sin huevo" must never share a recipe with "arroz, huevo" or plain "arroz"
+            "excluded": sorted(ingredient_canonicalizer.exclusions(ingredients)),
+            **{
+                field: sorted({fold_text(value) for value in (preferences.get(field) or [])})
+                for field in CACHE_PREFERENCE_FIELDS
+            },
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> dict | None:
+        # Keep generating fresh variants until the key holds enough of them
+        variants = self.backend.get(key)
+        if len(variants) < self.variants_per_key:
+            RECIPE_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        RECIPE_CACHE_LOOKUPS.labels("hit").inc()
+        return random.choice(variants)
+
+    def store(self, key: str, variant: dict):
+        self.backend.add(key, variant)
+
+
+def create_recipe_cache() -> RecipeCache:
+    # Opt-in: a hit serves a copy of a recipe generated for another user
+    backend = os.getenv("RECIPE_CACHE_BACKEND", "disabled")
+    maxsize = int(os.getenv("RECIPE_CACHE_SIZE", "1000"))
+    ttl = float(os.getenv("RECIPE_CACHE_TTL", "86400"))
+    variants_per_key = int(os.getenv("RECIPE_CACHE_VARIANTS", "3"))
+
+    if backend == "sqlite":
+        return RecipeCache(SqliteRecipeCacheBackend(os.getenv("RECIPE_CACHE_SQLITE_PATH", "recipe_cache.sqlite3"), maxsize, ttl), variants_per_key)
+    if backend == "memory":
+        return RecipeCache(MemoryRecipeCacheBackend(maxsize, ttl), variants_per_key)
+    if backend == "disabled":
+        return RecipeCache(None, variants_per_key)
+
+    raise ValueError(f"Unknown RECIPE_CACHE_BACKEND: {backend}")
+
+
+recipe_cache = create_recipe_cache()
@@ -0,0 +1,67 @@
+"""
+Closed-loop load test for the read endpoints of a running API.
+
+Run from backend/ against a server started with uvicorn:
+    python -m benchmarks.api_load_test --url http://localhost:8000 --token <access token>
+    python -m benchmarks.api_load_test --path /recipes?view=summary --concurrency 64 --duration 30
+
+Each worker sends its next request as soon as the previous one answers, so the
+reported requests/s is the sustained throughput at that concurrency. Compare two
+builds at the same p99 by raising --concurrency until p99 matches.
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+def percentile(samples: list, fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+async def run(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=30) as client:
+        # Warm up connections, auth caches and response caches before measuring
+        await asyncio.gather(*(client.get(args.path) for _ in range(min(args.concurrency, 16))))
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(worker(client, args.path, deadline, latencies, errors) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{args.path} with {args.concurrency} concurrent clients for {elapsed:.1f} s")
+    print(f"  requests/s {len(latencies) / elapsed:10.1f}   ok {len(latencies)}   errors {len(errors)}")
+    print(f"  p50 {percentile(latencies, 0.50):8.1f} ms   p95 {percentile(latencies, 0.95):8.1f} ms   p99 {percentile(latencies, 0.99):8.1f} ms")
+    if errors:
+        print(f"  first errors: {errors[:5]}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", help="Bearer token sent on every request")
+    parser.add_argument("--path", default="/recipes?limit=20")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Upload bytes and transcription latency for voice input, raw clip vs preprocessed chunks.
+
+Run from backend/ over a folder of sample recordings:
+    python -m benchmarks.audio_preprocessing_benchmark ./samples
+    python -m benchmarks.audio_preprocessing_benchmark ./samples --live   # also call VOICE_MODEL
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from config import config
+from utils.audio_utils import preprocess_audio
+
+
+async def transcribe(chunks: list[tuple[bytes, str]]) -> float:
+    from clients.openai_client import OpenAIClient
+
+    client = OpenAIClient().get_client()
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client.audio.transcriptions.create(model=os.getenv("VOICE_MODEL"), file=(name, data), response_format="text")
+        for data, name in chunks
+    ])
+    return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("samples", type=Path)
+    parser.add_argument("--live", action="store_true", help="Transcribe both versions with VOICE_MODEL")
+    args = parser.parse_args()
+
+    clips = sorted(path for path in args.samples.iterdir() if path.suffix.lower() in (".wav", ".webm", ".ogg", ".mp3", ".m4a"))
+    if not clips:
+        sys.exit(f"No sample clips found in {args.samples}")
+
+    total_before = total_after = 0
+    print(f"{'clip':<32}{'before':>12}{'after':>12}{'chunks':>8}{'prep ms':>10}{'before s':>10}{'after s':>10}")
+    for clip in clips:
+        data = clip.read_bytes()
+
+        start = time.perf_counter()
+        chunks = preprocess_audio(data, clip.name)
+        prep_ms = (time.perf_counter() - start) * 1000
+        after = sum(len(chunk) for chunk, _ in chunks)
+
+        total_before += len(data)
+        total_after += after
+
+        before_s = after_s = ""
+        if args.live and chunks:
+            before_s = f"{await transcribe([(data, clip.name)]):.2f}"
+            after_s = f"{await transcribe(chunks) + prep_ms / 1000:.2f}"
+
+        print(f"{clip.name[:31]:<32}{len(data):>12,}{after:>12,}{len(chunks):>8}{prep_ms:>10.1f}{before_s:>10}{after_s:>10}")
+
+    print(f"\nTotal upload bytes: {total_before:,} -> {total_after:,} ({100 * (1 - total_after / total_before):.1f}% less)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
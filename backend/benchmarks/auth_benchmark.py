@@ -0,0 +1,63 @@
+"""
+Per-request auth overhead: local JWT verification vs the Supabase round trip.
+
+Run from backend/:
+    python -m benchmarks.auth_benchmark
+    python -m benchmarks.auth_benchmark --remote-token <access token>   # also time supabase.auth.get_user
+"""
+import asyncio
+import argparse
+import hashlib
+import statistics
+import time
+
+import jwt
+
+from config import config
+from clients.supabase_client import AsyncSupabaseClient
+from utils import auth_utils
+
+
+def measure(label, fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<28} mean {statistics.mean(samples):8.3f} ms   p50 {samples[len(samples) // 2]:8.3f} ms   p99 {p99:8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--remote-token", help="Real Supabase access token to time the remote call")
+    args = parser.parse_args()
+
+    secret = auth_utils.SUPABASE_JWT_SECRET or "benchmark-secret"
+    auth_utils.SUPABASE_JWT_SECRET = secret
+    token = jwt.encode(
+        {"sub": "benchmark-user", "aud": auth_utils.SUPABASE_JWT_AUDIENCE, "exp": int(time.time()) + 3600, "role": "authenticated"},
+        secret,
+        algorithm="HS256",
+    )
+
+    measure("local HS256 verification", lambda: auth_utils.verify_token_locally(token, secret, "HS256"), args.iterations)
+
+    loop = asyncio.new_event_loop()
+    auth_utils.remote_user_cache.set(hashlib.sha256(token.encode("utf-8")).hexdigest(), object(), 3600)
+    measure("remote fallback (cache hit)", lambda: loop.run_until_complete(auth_utils.get_user_remotely(token)), args.iterations)
+
+    if args.remote_token:
+        loop.run_until_complete(AsyncSupabaseClient.connect())
+
+        def remote_call():
+            auth_utils.remote_user_cache.clear()
+            loop.run_until_complete(auth_utils.get_user_remotely(args.remote_token))
+
+        measure("remote get_user (before)", remote_call, min(args.iterations, 50))
+
+
+if __name__ == "__main__":
+    main()
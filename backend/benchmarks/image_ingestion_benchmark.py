@@ -0,0 +1,74 @@
+"""
+Bytes sent to the vision model and end-to-end latency, raw upload vs the ingestion stage.
+
+Run from backend/ over a folder of sample phone photos:
+    python -m benchmarks.image_ingestion_benchmark ./samples
+    python -m benchmarks.image_ingestion_benchmark ./samples --live   # also call IMAGE_READER_MODEL
+"""
+import os
+import sys
+import time
+import base64
+import asyncio
+import argparse
+from pathlib import Path
+
+from config import config
+from utils.image_utils import prepare_image_for_vision, sniff_image_format
+
+
+async def time_vision_call(data_url: str) -> float:
+    from clients.openai_client import OpenAIClient
+    from utils.ai_utils import load_personal_data_file
+
+    start = time.perf_counter()
+    await OpenAIClient().get_client().responses.create(
+        model=os.getenv("IMAGE_READER_MODEL"),
+        input=[{
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": load_personal_data_file("image_reader_agent_instructions")},
+                {"type": "input_image", "image_url": data_url},
+            ],
+        }],
+    )
+    return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("samples", type=Path)
+    parser.add_argument("--live", action="store_true", help="Send both payloads to the vision model")
+    args = parser.parse_args()
+
+    photos = sorted(path for path in args.samples.iterdir() if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp", ".heic"))
+    if not photos:
+        sys.exit(f"No sample photos found in {args.samples}")
+
+    total_before = total_after = 0
+    print(f"{'photo':<32}{'before (b64)':>14}{'after (b64)':>14}{'prep ms':>10}{'before s':>10}{'after s':>10}")
+    for photo in photos:
+        data = photo.read_bytes()
+        before = base64.b64encode(data)
+
+        start = time.perf_counter()
+        prepared, mime_type = prepare_image_for_vision(data)
+        prep_ms = (time.perf_counter() - start) * 1000
+        after = base64.b64encode(prepared)
+
+        total_before += len(before)
+        total_after += len(after)
+
+        before_s = after_s = ""
+        if args.live:
+            original_mime_type = f"image/{sniff_image_format(data) or 'jpeg'}"
+            before_latency = await time_vision_call(f"data:{original_mime_type};base64,{before.decode()}")
+            after_latency = await time_vision_call(f"data:{mime_type};base64,{after.decode()}") + prep_ms / 1000
+            before_s, after_s = f"{before_latency:.2f}", f"{after_latency:.2f}"
+
+        print(f"{photo.name[:31]:<32}{len(before):>14,}{len(after):>14,}{prep_ms:>10.1f}{before_s:>10}{after_s:>10}")
+
+    print(f"\nTotal bytes sent: {total_before:,} -> {total_after:,} ({100 * (1 - total_after / total_before):.1f}% less)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
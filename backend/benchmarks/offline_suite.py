@@ -0,0 +1,308 @@
+"""
+Offline benchmark and load-test suite: the real app against local stand-ins.
+
+Starts the fake PostgREST/OpenAI servers (benchmarks/stand_ins) and the API
+under uvicorn, drives /recipes, /user/* and /ai with concurrent clients and
+reports throughput, p50/p95/p99 latency, database round trips and model calls
+per request, and the API process memory. Nothing leaves the machine.
+
+Run from backend/:
+    python -m benchmarks.offline_suite
+    python -m benchmarks.offline_suite --scenarios recipes_page,ai_pipeline --concurrency 32
+    python -m benchmarks.offline_suite --update-baseline      # after an intended change
+
+Exits with status 1 when a scenario regresses past --tolerance against
+benchmarks/baselines/offline_suite.json.
+"""
+import io
+import os
+import sys
+import json
+import time
+import base64
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import jwt
+import httpx
+from PIL import Image
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "offline_suite.json"
+JWT_SECRET = "offline-benchmark-secret-not-for-production"
+INGREDIENTS = "huevos, tomate, cebolla, pimiento rojo"
+
+
+def tiny_jpeg() -> str:
+    output = io.BytesIO()
+    Image.linear_gradient("L").convert("RGB").resize((640, 480)).save(output, format="JPEG", quality=85)
+    return base64.b64encode(output.getvalue()).decode("ascii")
+
+def ai_body(mode: str, tool: str = "text") -> dict:
+    content = INGREDIENTS if tool == "text" else tiny_jpeg()
+    return {"type": "quick-recipe", "tool": tool, "content": content, "mode": mode}
+
+def recipe_id_for(user_index: int, request_index: int, recipes_per_user: int) -> int:
+    # Seeded ids are allocated user by user, see FakeDatabase.seed
+    return user_index * recipes_per_user + request_index % recipes_per_user + 1
+
+SEARCH_QUERIES = ("tomate", "pollo arr", "rapido ceb", "calabacines")
+
+# name -> (method, path(user_index, request_index, recipes_per_user), body factory or None, share of --requests)
+SCENARIOS = {
+    "recipes_page": ("GET", lambda user, index, per_user: "/recipes?limit=20", None, 1.0),
+    "recipes_summary": ("GET", lambda user, index, per_user: "/recipes?view=summary&limit=20", None, 1.0),
+    "recipes_search": ("GET", lambda user, index, per_user: f"/recipes/search?q={SEARCH_QUERIES[index % len(SEARCH_QUERIES)]}&limit=20", None, 1.0),
+    "recipes_matches": ("POST", lambda user, index, per_user: "/recipes/matches", lambda: {"ingredients": INGREDIENTS, "max_missing": 2}, 1.0),
+    "recipe_detail": ("GET", lambda user, index, per_user: f"/recipes/{recipe_id_for(user, index, per_user)}", None, 1.0),
+    "user_profile": ("GET", lambda user, index, per_user: "/user/profile", None, 1.0),
+    "user_preferences": ("GET", lambda user, index, per_user: "/user/nutritional-preferences", None, 1.0),
+    "ai_structured": ("POST", lambda user, index, per_user: "/ai", lambda: ai_body("structured"), 0.25),
+    "ai_pipeline": ("POST", lambda user, index, per_user: "/ai", lambda: ai_body("pipeline"), 0.25),
+    "ai_agent": ("POST", lambda user, index, per_user: "/ai", lambda: ai_body("agent"), 0.25),
+    "ai_image_pipeline": ("POST", lambda user, index, per_user: "/ai", lambda: ai_body("pipeline", "image"), 0.25),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def read_memory_mb(pid: int) -> dict:
+    # Linux only; elsewhere memory is simply not reported
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return {}
+    values = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+    return {
+        "rss_mb": round(int(values["VmRSS"].split()[0]) / 1024, 1),
+        "peak_rss_mb": round(int(values["VmHWM"].split()[0]) / 1024, 1),
+    }
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready in {timeout:.0f} s")
+
+def percentile(samples: list, fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+def start_processes(args, ports: dict, media_dir: str) -> tuple[subprocess.Popen, subprocess.Popen]:
+    stand_ins = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stand_ins.serve",
+         "--postgrest-port", str(ports["postgrest"]), "--openai-port", str(ports["openai"]),
+         "--users", str(args.users), "--recipes-per-user", str(args.recipes_per_user),
+         "--llm-latency-ms", str(args.llm_latency_ms)],
+        cwd=BACKEND_DIR,
+    )
+
+    env = {
+        **os.environ,
+        "SUPABASE_URL": f"http://127.0.0.1:{ports['postgrest']}",
+        "SUPABASE_KEY": "offline-benchmark",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "AUTH_REMOTE_FALLBACK": "false",
+        "OPENAI_API_KEY": "offline-benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{ports['openai']}/v1",
+        "OPENAI_MODEL": "fake-strong",
+        "OPENAI_FAST_MODEL": "fake-fast",
+        "IMAGE_READER_MODEL": "fake-vision",
+        "IMAGE_GENERATOR_MODEL": "fake-image",
+        "VOICE_MODEL": "fake-voice",
+        # The router refuses models without a price; the fakes cost nothing
+        "MODEL_ROUTING_PRICES": json.dumps({model: {"cost_per_call": 0} for model in ("fake-strong", "fake-fast", "fake-vision", "fake-image", "fake-voice")}),
+        # Agents SDK traces would otherwise be exported to api.openai.com
+        "OPENAI_AGENTS_DISABLE_TRACING": "1",
+        "AGENT_ROUTES": "/ai/instructions",
+        "RECIPE_CACHE_BACKEND": "disabled",
+        # The stand-in PostgREST has no search_recipes RPC
+        "RECIPE_SEARCH_BACKEND": "memory",
+        # Measure the generation path itself, not the per-user admission limits
+        "AI_USER_RATE_PER_MINUTE": "100000",
+        "AI_USER_BURST": "10000",
+        "AI_USER_MAX_IN_FLIGHT": str(args.concurrency),
+        "AI_GLOBAL_RATE_PER_MINUTE": "100000",
+        "AI_GLOBAL_BURST": "10000",
+        "AI_MAX_CONCURRENCY": str(args.concurrency),
+        "RESPONSE_CACHE_TTL": str(args.response_cache_ttl),
+        "JOB_BACKEND": "memory",
+        "BLOB_STORE_PATH": media_dir,
+        "MEDIA_BASE_URL": f"http://127.0.0.1:{ports['api']}/media",
+        "LOG_LEVEL": "WARNING",
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(ports["api"]), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    return stand_ins, api
+
+async def run_scenario(name: str, args, ports: dict, tokens: list, api_pid: int) -> dict:
+    method, path_for, body_for, share = SCENARIOS[name]
+    total = max(args.concurrency, int(args.requests * share))
+    stand_in_url = f"http://127.0.0.1:{ports['postgrest']}/__stats"
+    openai_url = f"http://127.0.0.1:{ports['openai']}/__stats"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{ports['api']}", limits=limits, timeout=120) as client:
+        db_before = (await client.get(stand_in_url)).json()["requests"]
+        llm_before = sum((await client.get(openai_url)).json().values())
+
+        latencies, errors = [], []
+        next_index = iter(range(total))
+
+        async def worker():
+            for index in next_index:
+                user = index % len(tokens)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(
+                        method,
+                        path_for(user, index // len(tokens), args.recipes_per_user),
+                        json=body_for() if body_for else None,
+                        headers={"Authorization": f"Bearer {tokens[user]}"},
+                    )
+                    ok = response.status_code < 400 and response.content not in (b"null", b"")
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors.append(index)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        db_after = (await client.get(stand_in_url)).json()["requests"]
+        llm_after = sum((await client.get(openai_url)).json().values())
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "db_round_trips_per_request": round((db_after - db_before) / total, 2),
+        "llm_calls_per_request": round((llm_after - llm_before) / total, 2),
+        **read_memory_mb(api_pid),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors (baseline {previous.get('errors', 0)})")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['throughput_rps']} rps (baseline {previous['throughput_rps']})")
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {current['p99_ms']} ms (baseline {previous['p99_ms']})")
+        # Round trips and model calls are deterministic, any increase is a real change
+        for metric in ("db_round_trips_per_request", "llm_calls_per_request"):
+            if current[metric] > previous[metric] + 0.01:
+                regressions.append(f"{name}: {metric} {current[metric]} (baseline {previous[metric]})")
+        if "peak_rss_mb" in current and "peak_rss_mb" in previous and current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {current['peak_rss_mb']} MB (baseline {previous['peak_rss_mb']})")
+    return regressions
+
+def print_report(results: dict):
+    print(f"{'scenario':<20}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'db/req':>8}{'llm/req':>8}{'rss MB':>8}{'errors':>8}")
+    for name, row in results.items():
+        print(
+            f"{name:<20}{row['throughput_rps']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            f"{row['db_round_trips_per_request']:>8.2f}{row['llm_calls_per_request']:>8.2f}{row.get('rss_mb', 0):>8.1f}{row['errors']:>8}"
+        )
+
+async def run(args) -> int:
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    ports = {"postgrest": free_port(), "openai": free_port(), "api": free_port()}
+    tokens = [
+        jwt.encode({"sub": f"bench-user-{index}", "aud": "authenticated", "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+        for index in range(args.users)
+    ]
+
+    with tempfile.TemporaryDirectory() as media_dir:
+        stand_ins, api = start_processes(args, ports, media_dir)
+        try:
+            wait_until_ready(f"http://127.0.0.1:{ports['postgrest']}/__stats", stand_ins)
+            wait_until_ready(f"http://127.0.0.1:{ports['api']}/metrics", api)
+
+            results = {}
+            for name in names:
+                results[name] = await run_scenario(name, args, ports, tokens, api.pid)
+        finally:
+            for process in (api, stand_ins):
+                process.terminate()
+                process.wait(timeout=10)
+
+    print_report(results)
+
+    config = {key: getattr(args, key) for key in ("concurrency", "requests", "users", "recipes_per_user", "llm_latency_ms", "response_cache_ttl")}
+    if args.output:
+        Path(args.output).write_text(json.dumps({"config": config, "scenarios": results}, indent=2))
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps({"config": config, "scenarios": results}, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH.relative_to(BACKEND_DIR)}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("\nNo baseline yet, run with --update-baseline to store one")
+        return 0
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if baseline.get("config") != config:
+        print(f"\nWarning: baseline was recorded with {baseline.get('config')}, timings may not be comparable")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per read scenario, /ai scenarios run a quarter of it")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--recipes-per-user", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=80)
+    parser.add_argument("--response-cache-ttl", type=float, default=0, help="0 measures the database path on every read")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--output", help="Also write the results as JSON to this path")
+    parser.add_argument("--update-baseline", action="store_true")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+End-to-end /ai latency: LLM-driven agent mode vs the fixed DAG pipeline and structured modes.
+
+Run from backend/ with real OpenAI and Supabase credentials. Each run saves a
+recipe for --user-id, so point it at a test account:
+    python -m benchmarks.orchestration_benchmark --user-id <uuid> --runs 3
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+from config import config
+from agents import set_default_openai_client
+
+from ai import orchestrator
+from ai.recipe_cache import recipe_cache
+from clients.openai_client import OpenAIClient
+from schemas.ai_schema import McpMetadata
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ingredients", default="huevos, tomate, cebolla, pimiento rojo")
+    args = parser.parse_args()
+
+    set_default_openai_client(OpenAIClient().get_client())
+    # Every run has to reach the models
+    recipe_cache.backend = None
+
+    results = {}
+    for mode in ("agent", "pipeline", "structured"):
+        samples = []
+        for _ in range(args.runs):
+            content = McpMetadata(type="quick-recipe", tool="text", content=args.ingredients, mode=mode)
+            start = time.perf_counter()
+            output = await orchestrator.orchestrate_message(content, args.user_id)
+            samples.append(time.perf_counter() - start)
+            print(f"{mode:<9} {samples[-1]:6.2f} s  {'ok' if output.status == 'success' else 'failed'}")
+        results[mode] = samples
+
+    print()
+    for mode, samples in results.items():
+        print(f"{mode:<9} mean {statistics.mean(samples):6.2f} s   min {min(samples):6.2f} s   max {max(samples):6.2f} s")
+
+    timings = {}
+    await orchestrator.run_recipe_pipeline(
+        McpMetadata(type="quick-recipe", tool="text", content=args.ingredients), args.user_id, "text", {}, timings
+    )
+    print("\npipeline stages: " + ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in timings.items()))
+
+    await OpenAIClient.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
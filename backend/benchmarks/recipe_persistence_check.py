@@ -0,0 +1,107 @@
+"""
+Checks atomic recipe persistence against the local Postgres/PostgREST stand-in.
+
+    docker compose -f docker/docker-compose.db.yml up -d
+    python -m benchmarks.recipe_persistence_check --url http://localhost:54321
+
+Verifies that insert/delete each take a single round trip, that a failing
+insert leaves no partial rows behind, and that delete also removes images.
+tests/test_recipe_persistence.py runs the same checks when the stand-in is up.
+"""
+import sys
+import asyncio
+import argparse
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+
+from repositories.recipe_repository import RecipeRepository
+from schemas.recipe_schema import RecipeInsert
+
+
+class PostgrestStandIn:
+    """Quacks like clients.supabase_client.AsyncSupabaseClient, counting HTTP round trips."""
+
+    def __init__(self, url: str):
+        self.requests = 0
+        self.client = AsyncPostgrestClient(url)
+        self.client.session.event_hooks["request"].append(self._count)
+
+    async def _count(self, request: httpx.Request):
+        self.requests += 1
+
+    def get_client(self):
+        return self.client
+
+
+async def count_rows(client, table: str, recipe_id: int) -> int:
+    column = "id" if table == "recipes" else "recipe_id"
+    return len((await client.from_(table).select("*").eq(column, recipe_id).execute()).data)
+
+def check(condition: bool, message: str):
+    print(f"{'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        raise AssertionError(message)
+
+async def is_available(url: str) -> bool:
+    try:
+        async with httpx.AsyncClient(timeout=2) as client:
+            await client.get(url)
+        return True
+    except httpx.HTTPError:
+        return False
+
+async def run_checks(url: str):
+    stand_in = PostgrestStandIn(url)
+    repository = RecipeRepository(stand_in)
+    tables = ("recipes", "recipe_ingredients", "recipe_steps", "recipe_images")
+
+    recipe = RecipeInsert(
+        user_id="harness-user",
+        title="Revuelto de la huerta",
+        recipe_metadata={"tags": ["rápido"], "calorias": 350},
+        source_type="text",
+        source_data="huevos, tomate, cebolla",
+        ingredients=[{"name": "huevo", "quantity": "3", "unit": "unidades"}, {"name": "tomate", "quantity": "2", "unit": "unidades"}],
+        steps=[{"step_number": 1, "instruction": "Bate los huevos."}],
+        image_url="https://example.com/revuelto.png",
+    )
+
+    stand_in.requests = 0
+    inserted = await repository.insert_recipe(recipe)
+    check(inserted is not None and stand_in.requests == 1, f"insert_recipe took {stand_in.requests} round trip(s)")
+    check([await count_rows(stand_in.client, table, inserted.id) for table in tables] == [1, 2, 1, 1], "recipe and every child row were written")
+
+    # Sent straight to the RPC so the NOT NULL violation happens inside the SQL function, after the recipe row was written
+    broken = {**recipe.model_dump(mode="json"), "ingredients": [{"name": None, "quantity": "1", "unit": "u"}]}
+    before = len((await stand_in.client.from_("recipes").select("id").eq("user_id", "harness-user").execute()).data)
+    try:
+        await stand_in.client.rpc("insert_complete_recipe", {"p_recipe": broken}).execute()
+        failed = False
+    except APIError:
+        failed = True
+    after = len((await stand_in.client.from_("recipes").select("id").eq("user_id", "harness-user").execute()).data)
+    check(failed and before == after, "a failing child insert rolls back the recipe row")
+
+    stand_in.requests = 0
+    deleted = await repository.delete_by_id(inserted.id, "harness-user")
+    check(deleted and stand_in.requests == 1, f"delete_by_id took {stand_in.requests} round trip(s)")
+    check(all([await count_rows(stand_in.client, table, inserted.id) == 0 for table in tables]), "delete removed the recipe, ingredients, steps and image")
+
+    check(await repository.delete_by_id(inserted.id, "harness-user") is False, "deleting a missing recipe returns False")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:54321")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_checks(args.url))
+    except AssertionError:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Offline stand-in for the OpenAI endpoints the backend calls.
+
+Replays recorded answers from recorded_responses.json after a configurable
+latency. The orchestrator agent gets a scripted tool-calling conversation
+(steps -> image -> insert_recipe -> final message), so agent mode exercises
+the same Runner turns and tool calls as production.
+"""
+import io
+import re
+import json
+import time
+import uuid
+import asyncio
+from pathlib import Path
+
+from fastapi import FastAPI, Request, Response
+from PIL import Image
+
+RECORDED = json.loads((Path(__file__).parent / "recorded_responses.json").read_text(encoding="utf-8"))
+
+DEFAULT_LATENCY_MS = {"responses": 80, "images": 150, "transcriptions": 60}
+AGENT_SCRIPT = ("recipe_instructions_processor_agent", "image_recipe_generator_agent", "insert_recipe")
+
+
+def render_recipe_image(size: int = 1024) -> bytes:
+    # A gradient compresses like a photo far better than a flat colour does
+    gradient = Image.linear_gradient("L").resize((size, size))
+    image = Image.merge("RGB", (gradient, gradient.rotate(90), gradient.rotate(180)))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+def usage_for(request_body: dict, output_text: str) -> dict:
+    input_tokens = max(1, len(json.dumps(request_body.get("input", ""), ensure_ascii=False)) // 4)
+    output_tokens = max(1, len(output_text) // 4)
+    return {
+        "input_tokens": input_tokens,
+        "input_tokens_details": {"cached_tokens": 0},
+        "output_tokens": output_tokens,
+        "output_tokens_details": {"reasoning_tokens": 0},
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+def response_envelope(request_body: dict, output: list, output_text: str) -> dict:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": request_body.get("model") or "fake-model",
+        "status": "completed",
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": usage_for(request_body, output_text),
+    }
+
+def message_item(text: str) -> dict:
+    return {
+        "type": "message",
+        "id": f"msg_{uuid.uuid4().hex}",
+        "status": "completed",
+        "role": "assistant",
+        "content": [{"type": "output_text", "text": text, "annotations": []}],
+    }
+
+def function_call_item(name: str, arguments: dict) -> dict:
+    return {
+        "type": "function_call",
+        "id": f"fc_{uuid.uuid4().hex}",
+        "call_id": f"call_{uuid.uuid4().hex}",
+        "name": name,
+        "arguments": json.dumps(arguments, ensure_ascii=False),
+        "status": "completed",
+    }
+
+def next_agent_step(request_body: dict, image_url: str) -> dict:
+    items = request_body.get("input") if isinstance(request_body.get("input"), list) else []
+    called = [item.get("name") for item in items if isinstance(item, dict) and item.get("type") == "function_call"]
+    outputs = [item.get("output") for item in items if isinstance(item, dict) and item.get("type") == "function_call_output"]
+
+    first_message = next((item.get("content") for item in items if isinstance(item, dict) and item.get("role") == "user"), "")
+    if not isinstance(first_message, str):
+        first_message = json.dumps(first_message)
+    user_match = re.search(r"The user (\S+) is trying", first_message)
+    ingredients_match = re.search(r"ingredients or data: (.*)$", first_message)
+
+    step = len(called)
+    if step == 0:
+        return function_call_item(AGENT_SCRIPT[0], {"recipe_description": RECORDED["recipe_design"]["description"]})
+    if step == 1:
+        return function_call_item(AGENT_SCRIPT[1], {"recipe_prompt": RECORDED["recipe_design"]["image_prompt"]})
+    if step == 2:
+        generation = RECORDED["recipe_generation"]
+        generated_image = next((output for output in outputs if isinstance(output, str) and output.startswith("http")), image_url)
+        return function_call_item(AGENT_SCRIPT[2], {"recipe": {
+            "user_id": user_match.group(1) if user_match else "unknown",
+            "title": generation["title"],
+            "recipe_metadata": generation["recipe_metadata"],
+            "source_type": "text",
+            "source_data": ingredients_match.group(1) if ingredients_match else "",
+            "ingredients": generation["ingredients"],
+            "steps": generation["steps"],
+            "image_url": generated_image,
+        }})
+    return message_item(RECORDED["orchestrator_final"])
+
+
+def create_fake_openai(base_url: str, latency_ms: dict | None = None) -> FastAPI:
+    app = FastAPI()
+    latency = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+    image_bytes = render_recipe_image()
+    image_url = f"{base_url.rstrip('/')}/files/recipe.png"
+    stats = {"responses": 0, "images": 0, "transcriptions": 0}
+
+    @app.get("/__stats")
+    def get_stats():
+        return stats
+
+    @app.get("/files/recipe.png")
+    def get_image():
+        return Response(content=image_bytes, media_type="image/png")
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        body = await request.json()
+        stats["responses"] += 1
+        await asyncio.sleep(latency["responses"] / 1000)
+
+        text_format = (body.get("text") or {}).get("format") or {}
+        serialized_input = json.dumps(body.get("input", ""), ensure_ascii=False)
+
+        if body.get("tools"):
+            item = next_agent_step(body, image_url)
+            text = item.get("arguments") or item["content"][0]["text"]
+            return response_envelope(body, [item], text)
+
+        if text_format.get("name") == "RecipeDesign":
+            text = json.dumps(RECORDED["recipe_design"], ensure_ascii=False)
+        elif text_format.get("name") == "RecipeGeneration":
+            text = json.dumps(RECORDED["recipe_generation"], ensure_ascii=False)
+        elif "input_image" in serialized_input:
+            text = RECORDED["image_reader"]
+        else:
+            text = RECORDED["recipe_instructions"]
+        return response_envelope(body, [message_item(text)], text)
+
+    @app.post("/v1/images/generations")
+    async def generate_image(request: Request):
+        await request.body()
+        stats["images"] += 1
+        await asyncio.sleep(latency["images"] / 1000)
+        return {"created": int(time.time()), "data": [{"url": image_url}]}
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcribe(request: Request):
+        await request.body()
+        stats["transcriptions"] += 1
+        await asyncio.sleep(latency["transcriptions"] / 1000)
+        return Response(content=RECORDED["transcription"], media_type="text/plain")
+
+    return app
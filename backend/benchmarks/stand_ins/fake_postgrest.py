@@ -0,0 +1,262 @@
+"""
+In-memory stand-in for the slice of PostgREST/Supabase the backend uses.
+
+Supports select with eq/neq/lt/lte/gt/gte/in/is filters, nested or/and filters,
+order, limit, insert, update, delete and the two recipe RPCs, and counts every
+request so the benchmark suite can report database round trips per API call.
+"""
+import json
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, Request, Response
+
+TABLES = ("recipes", "recipe_ingredients", "recipe_steps", "recipe_images", "user_preferences", "profiles")
+SEED_INGREDIENTS = ("huevo", "tomate", "cebolla", "pimiento", "arroz", "pollo", "ajo", "patata", "calabacín", "queso", "leche", "harina")
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+INDEXED_COLUMNS = ("id", "user_id", "recipe_id")
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.tables = {table: [] for table in TABLES}
+        self.next_ids = {table: 1 for table in TABLES}
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._indexes = {}
+
+    def mutated(self, table: str):
+        self._indexes.pop(table, None)
+
+    def index(self, table: str, column: str) -> dict:
+        # Hash index rebuilt lazily after writes, like the b-tree indexes the real schema has
+        table_indexes = self._indexes.setdefault(table, {})
+        if column not in table_indexes:
+            index = {}
+            for row in self.tables[table]:
+                index.setdefault(row.get(column), []).append(row)
+            table_indexes[column] = index
+        return table_indexes[column]
+
+    def candidates(self, table: str, params) -> list[dict]:
+        for column, expression in params.multi_items():
+            if column not in INDEXED_COLUMNS:
+                continue
+            operator, _, value = expression.partition(".")
+            if operator == "eq":
+                keys = [value]
+            elif operator == "in":
+                keys = [item.strip('"') for item in split_top_level(value.strip()[1:-1])]
+            else:
+                continue
+            index = self.index(table, column)
+            rows = []
+            for key in keys:
+                rows.extend(index.get(int(key) if key.lstrip("-").isdigit() and column != "user_id" else key, []))
+            return rows
+        return self.tables[table]
+
+    def insert(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        if table != "profiles":
+            row.setdefault("id", self.next_ids[table])
+            self.next_ids[table] = max(self.next_ids[table], row["id"]) + 1
+        if table == "recipes":
+            row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        self.tables[table].append(row)
+        self.mutated(table)
+        return row
+
+    def insert_complete_recipe(self, recipe: dict) -> dict:
+        row = self.insert("recipes", {key: recipe.get(key) for key in ("user_id", "title", "recipe_metadata", "source_type", "source_data")})
+        for ingredient in recipe.get("ingredients") or []:
+            self.insert("recipe_ingredients", {"recipe_id": row["id"], **ingredient})
+        if recipe.get("steps"):
+            self.insert("recipe_steps", {"recipe_id": row["id"], "instructions": recipe["steps"]})
+        if recipe.get("image_url"):
+            self.insert("recipe_images", {"recipe_id": row["id"], "image_url": recipe["image_url"]})
+        return row
+
+    def delete_complete_recipe(self, recipe_id: int, user_id: str) -> bool:
+        if not any(row["id"] == recipe_id and row["user_id"] == user_id for row in self.tables["recipes"]):
+            return False
+        for table in ("recipe_ingredients", "recipe_steps", "recipe_images"):
+            self.tables[table] = [row for row in self.tables[table] if row["recipe_id"] != recipe_id]
+            self.mutated(table)
+        self.tables["recipes"] = [row for row in self.tables["recipes"] if row["id"] != recipe_id]
+        self.mutated("recipes")
+        return True
+
+    def seed(self, users: int, recipes_per_user: int, seed: int = 7):
+        rng = random.Random(seed)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for user_index in range(users):
+            user_id = f"bench-user-{user_index}"
+            self.insert("profiles", {"id": user_id, "username": user_id, "full_name": f"Usuario {user_index}", "avatar_url": None})
+            self.insert("user_preferences", {"user_id": user_id, "preferences": {"allergens": [], "diet_type": [], "preferred_foods": ["tomate"], "avoid_foods": [], "favorite_dishes": []}})
+            for recipe_index in range(recipes_per_user):
+                ingredients = rng.sample(SEED_INGREDIENTS, 4)
+                row = self.insert_complete_recipe({
+                    "user_id": user_id,
+                    "title": f"Receta {recipe_index} con {ingredients[0]}",
+                    "recipe_metadata": {"tags": ["rápido", ingredients[1]], "calorias": rng.randint(200, 900)},
+                    "source_type": "text",
+                    "source_data": ", ".join(ingredients),
+                    "ingredients": [{"name": name, "quantity": "1", "unit": "unidad"} for name in ingredients],
+                    "steps": [{"step_number": 1, "instruction": f"Cocina {', '.join(ingredients)}."}],
+                    "image_url": f"http://media.local/{user_id}-{recipe_index}-full.webp",
+                })
+                row["created_at"] = (start + timedelta(minutes=user_index * recipes_per_user + recipe_index)).isoformat()
+
+
+def split_top_level(text: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def coerce(value: str, sample):
+    value = value.strip('"')
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+COMPARISONS = {
+    "eq": lambda current, target: current == target,
+    "neq": lambda current, target: current != target,
+    "lt": lambda current, target: current < target,
+    "lte": lambda current, target: current <= target,
+    "gt": lambda current, target: current > target,
+    "gte": lambda current, target: current >= target,
+}
+
+def compile_filter(column: str, expression: str):
+    # Parsed once per query into a row predicate, the seeded tables hold tens of thousands of rows
+    if column in ("or", "and"):
+        predicates = [compile_condition(condition) for condition in split_top_level(expression.strip()[1:-1])]
+        if column == "or":
+            return lambda row: any(predicate(row) for predicate in predicates)
+        return lambda row: all(predicate(row) for predicate in predicates)
+
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, value = expression.partition(".")
+
+    if operator == "is":
+        expected = None if value == "null" else value == "true"
+        predicate = lambda row: row.get(column) is expected if expected is None else row.get(column) == expected
+    elif operator == "in":
+        raw_items = [item.strip('"') for item in split_top_level(value.strip()[1:-1])]
+        as_text = set(raw_items)
+        as_int = {int(item) for item in raw_items if item.lstrip("-").isdigit()}
+        predicate = lambda row: row.get(column) in (as_int if isinstance(row.get(column), int) else as_text)
+    else:
+        compare = COMPARISONS.get(operator, lambda current, target: False)
+
+        def predicate(row):
+            current = row.get(column)
+            return current is not None and compare(current, coerce(value, current))
+
+    return (lambda row: not predicate(row)) if negate else predicate
+
+def compile_condition(condition: str):
+    # Nested conditions look like "created_at.lt.x" or "and(created_at.eq.x,id.lt.5)"
+    if condition.startswith(("and(", "or(")):
+        name, _, rest = condition.partition("(")
+        return compile_filter(name, "(" + rest)
+    column, _, expression = condition.partition(".")
+    return compile_filter(column, expression)
+
+def apply_query(rows: list[dict], params) -> list[dict]:
+    predicates = [compile_filter(column, expression) for column, expression in params.multi_items() if column not in RESERVED_PARAMS]
+    if predicates:
+        rows = [row for row in rows if all(predicate(row) for predicate in predicates)]
+
+    for order in reversed(params.get("order", "").split(",") if params.get("order") else []):
+        column, _, direction = order.partition(".")
+        rows = sorted(rows, key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+
+    if params.get("limit"):
+        rows = rows[:int(params["limit"])]
+    return rows
+
+def project(rows: list[dict], select: str | None) -> list[dict]:
+    if not select or select == "*":
+        return rows
+    columns = [column.strip() for column in select.split(",")]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def create_fake_postgrest(database: FakeDatabase) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def count_round_trips(request: Request, call_next):
+        if request.url.path.startswith(("/rest/", "/auth/")):
+            with database.lock:
+                database.requests += 1
+        return await call_next(request)
+
+    @app.get("/__stats")
+    def stats():
+        return {"requests": database.requests, "rows": {table: len(rows) for table, rows in database.tables.items()}}
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        body = await request.json()
+        with database.lock:
+            if function == "insert_complete_recipe":
+                result = database.insert_complete_recipe(body["p_recipe"])
+            elif function == "delete_complete_recipe":
+                result = database.delete_complete_recipe(body["p_recipe_id"], body["p_user_id"])
+            else:
+                return Response(status_code=404, content=json.dumps({"message": f"Unknown function {function}"}), media_type="application/json")
+        return result
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE"])
+    async def table_route(table: str, request: Request):
+        if table not in database.tables:
+            return Response(status_code=404, content=json.dumps({"message": f"Unknown table {table}"}), media_type="application/json")
+
+        params = request.query_params
+        # Read the body before taking the lock, never await while holding it
+        body = await request.json() if request.method in ("POST", "PATCH") else None
+
+        with database.lock:
+            if request.method == "GET":
+                return project(apply_query(database.candidates(table, params), params), params.get("select"))
+
+            if request.method == "POST":
+                return [database.insert(table, row) for row in (body if isinstance(body, list) else [body])]
+
+            selected = apply_query(database.candidates(table, params), params)
+            database.mutated(table)
+            if request.method == "PATCH":
+                for row in selected:
+                    row.update(body)
+                return selected
+
+            selected_ids = {id(row) for row in selected}
+            database.tables[table] = [row for row in database.tables[table] if id(row) not in selected_ids]
+            return selected
+
+    return app
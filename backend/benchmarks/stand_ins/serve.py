@@ -0,0 +1,40 @@
+"""
+Serves the fake PostgREST and fake OpenAI stand-ins from one process.
+
+    python -m benchmarks.stand_ins.serve --postgrest-port 54399 --openai-port 54398
+"""
+import asyncio
+import argparse
+
+import uvicorn
+
+from benchmarks.stand_ins.fake_openai import create_fake_openai
+from benchmarks.stand_ins.fake_postgrest import FakeDatabase, create_fake_postgrest
+
+
+async def serve(args):
+    database = FakeDatabase()
+    database.seed(args.users, args.recipes_per_user)
+
+    openai_url = f"http://127.0.0.1:{args.openai_port}"
+    latency = {name: args.llm_latency_ms * factor for name, factor in (("responses", 1), ("images", 2), ("transcriptions", 0.75))}
+
+    # Keep idle connections open longer than the API's pools keep them, as PostgREST behind a proxy does
+    servers = [
+        uvicorn.Server(uvicorn.Config(create_fake_postgrest(database), host="127.0.0.1", port=args.postgrest_port, log_level="warning", access_log=False, timeout_keep_alive=120)),
+        uvicorn.Server(uvicorn.Config(create_fake_openai(openai_url, latency), host="127.0.0.1", port=args.openai_port, log_level="warning", access_log=False, timeout_keep_alive=120)),
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--postgrest-port", type=int, default=54399)
+    parser.add_argument("--openai-port", type=int, default=54398)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--recipes-per-user", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=80)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import re
+from pathlib import Path
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on the local filesystem, served back through /media."""
+
+    KEY_PATTERN = re.compile(r"^[a-f0-9]{16,64}-[a-z]+\.webp$")
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def is_valid_key(self, key: str) -> bool:
+        return bool(self.KEY_PATTERN.match(key))
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.root / key
+        if not path.exists():
+            # Write then rename so readers never see a partial file
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(data)
+            temp_path.replace(path)
+        return self.url_for(key)
+
+    def path_for(self, key: str) -> Path | None:
+        if not self.is_valid_key(key):
+            return None
+        path = self.root / key
+        return path if path.exists() else None
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class BlobStoreClient:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            backend = os.getenv("BLOB_STORE", "local")
+            if backend != "local":
+                raise ValueError(f"Unknown BLOB_STORE: {backend}")
+            cls._instance.store = LocalBlobStore(
+                os.getenv("BLOB_STORE_PATH", "media"),
+                os.getenv("MEDIA_BASE_URL", "http://localhost:8000/media"),
+            )
+        return cls._instance
+
+    def get_store(self) -> LocalBlobStore:
+        return self.store
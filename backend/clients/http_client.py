@@ -0,0 +1,35 @@
+import os
+
+import httpx
+
+
+class HttpClient:
+    """Pooled client for plain downloads, such as generated images from the OpenAI CDN."""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            # No span hooks: download URLs are unique per image and would explode the metric labels
+            cls._instance.client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+                    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10")),
+                    keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+                ),
+                timeout=httpx.Timeout(
+                    float(os.getenv("HTTP_TIMEOUT", "30")),
+                    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+                ),
+            )
+        return cls._instance
+
+    def get_client(self) -> httpx.AsyncClient:
+        return self.client
+
+    @classmethod
+    async def close(cls):
+        if cls._instance is not None:
+            await cls._instance.client.aclose()
+            cls._instance = None
@@ -0,0 +1,42 @@
+import os
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from utils.metrics_utils import httpx_span_hooks
+
+
+class OpenAIClient:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+                    max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+                    keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+                ),
+                event_hooks=httpx_span_hooks("openai"),
+            )
+            cls._instance.client = AsyncOpenAI(
+                http_client=http_client,
+                timeout=httpx.Timeout(
+                    float(os.getenv("OPENAI_TIMEOUT", "120")),
+                    connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5")),
+                ),
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+            )
+            # Same connection pool without SDK retries, for calls that go through resilient_call
+            cls._instance.call_client = cls._instance.client.with_options(max_retries=0)
+        return cls._instance
+
+    def get_client(self, sdk_retries: bool = True) -> AsyncOpenAI:
+        return self.client if sdk_retries else self.call_client
+
+    @classmethod
+    async def close(cls):
+        if cls._instance is not None:
+            await cls._instance.client.close()
+            cls._instance = None
@@ -1,6 +1,9 @@
 import os
 
-from supabase import create_client, Client
+import httpx
+from supabase import create_client, acreate_client, Client, AsyncClient, AsyncClientOptions
+
+from utils.metrics_utils import httpx_span_hooks
 
 
 class SupabaseClient:
@@ -15,4 +18,49 @@ class SupabaseClient:
         return cls._instance
     
     def get_client(self) -> Client:
-        return self.client
\ No newline at end of file
+        return self.client
+
+class AsyncSupabaseClient:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.client = None
+        return cls._instance
+
+    @classmethod
+    async def connect(cls):
+        # One tuned connection pool shared by PostgREST, auth and storage calls
+        instance = cls()
+        if instance.client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100")),
+                    max_keepalive_connections=int(os.getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "20")),
+                    keepalive_expiry=float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30")),
+                ),
+                timeout=httpx.Timeout(
+                    float(os.getenv("SUPABASE_TIMEOUT", "10")),
+                    connect=float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "3")),
+                ),
+                http2=os.getenv("SUPABASE_HTTP2", "false").lower() == "true",
+                event_hooks=httpx_span_hooks("supabase"),
+            )
+            instance.client = await acreate_client(
+                os.getenv("SUPABASE_URL"),
+                os.getenv("SUPABASE_KEY"),
+                options=AsyncClientOptions(httpx_client=http_client),
+            )
+        return instance
+
+    def get_client(self) -> AsyncClient:
+        if self.client is None:
+            raise RuntimeError("AsyncSupabaseClient.connect() must run at startup")
+        return self.client
+
+    @classmethod
+    async def close(cls):
+        if cls._instance is not None and cls._instance.client is not None:
+            await cls._instance.client.options.httpx_client.aclose()
+            cls._instance.client = None
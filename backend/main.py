@@ -1,15 +1,54 @@
+import time
+from contextlib import asynccontextmanager
+
+from agents import set_default_openai_client, add_trace_processor
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import config
+from clients.openai_client import OpenAIClient
+from clients.http_client import HttpClient
+from clients.supabase_client import AsyncSupabaseClient
+from ai.prompt_registry import prompt_registry
+from ai.model_router import model_router
+from utils.canonicalization_utils import ingredient_canonicalizer
+from ai.agent_metrics import AgentMetricsProcessor
+from services.job_service import job_service
 from routers import user_router
 from routers import recipes_router
 from routers import ai_router
+from routers import media_router
+from routers import metrics_router
 from utils.exceptions import BaseAppException
+from utils.logging_utils import configure_logging, get_logger
+from utils.metrics_utils import HTTP_REQUEST_SECONDS
+
+configure_logging()
+logger = get_logger(__name__)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail fast on missing or empty agent instructions
+    prompt_registry.load()
+    ingredient_canonicalizer.load()
+    # Fail fast on a routing config that names unknown tiers
+    model_router.load()
+    # One pooled AsyncOpenAI client for the agent tools and the Agents SDK runner
+    set_default_openai_client(OpenAIClient().get_client())
+    # Agent runs, runner turns, model responses and tool calls feed /metrics
+    add_trace_processor(AgentMetricsProcessor())
+    # Shared async Supabase client, so routes and agent tools never block a worker thread on I/O
+    await AsyncSupabaseClient.connect()
+    await job_service.start()
+    yield
+    await job_service.stop()
+    await AsyncSupabaseClient.close()
+    await OpenAIClient.close()
+    await HttpClient.close()
+
+app = FastAPI(lifespan=lifespan)
 
 CORS_ORIGINS = [    
     "http://localhost:3000",
@@ -23,17 +62,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Retry-After"],
 )
 
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["Server-Timing"] = f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route else "unmatched", str(status_code)
+        ).observe(time.perf_counter() - start)
+
 @app.exception_handler(BaseAppException)
 async def app_exception_handler(request: Request, exc: BaseAppException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"message": exc.message},
+        headers=exc.headers,
     )
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
     return JSONResponse(
         status_code=500,
         content={"message": "Internal Server Error", "detail": str(exc)},
@@ -41,4 +99,6 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 app.include_router(user_router.router)
 app.include_router(recipes_router.router)
-app.include_router(ai_router.router)
\ No newline at end of file
+app.include_router(ai_router.router)
+app.include_router(media_router.router)
+app.include_router(metrics_router.router)
\ No newline at end of file
@@ -0,0 +1,44 @@
+-- Base tables as they exist in Supabase, so a plain Postgres can stand in locally.
+-- Every statement is idempotent and a no-op against the real project.
+create table if not exists public.recipes (
+    id bigint generated by default as identity primary key,
+    user_id text not null,
+    title text not null,
+    recipe_metadata jsonb,
+    created_at timestamptz not null default now(),
+    source_type text not null,
+    source_data text not null
+);
+
+create table if not exists public.recipe_ingredients (
+    id bigint generated by default as identity primary key,
+    recipe_id bigint not null references public.recipes (id),
+    name text not null,
+    quantity text not null,
+    unit text not null
+);
+
+create table if not exists public.recipe_steps (
+    id bigint generated by default as identity primary key,
+    recipe_id bigint not null references public.recipes (id),
+    instructions jsonb not null
+);
+
+create table if not exists public.recipe_images (
+    id bigint generated by default as identity primary key,
+    recipe_id bigint not null references public.recipes (id),
+    image_url text not null
+);
+
+create table if not exists public.user_preferences (
+    id bigint generated by default as identity primary key,
+    user_id text not null unique,
+    preferences jsonb not null
+);
+
+create table if not exists public.profiles (
+    id text primary key,
+    username text,
+    full_name text,
+    avatar_url text
+);
@@ -0,0 +1,6 @@
+-- Keyset pagination for GET /recipes: (user_id, created_at desc, id desc)
+create index if not exists recipes_user_created_at_id_idx
+    on public.recipes (user_id, created_at desc, id desc);
+
+create index if not exists recipe_images_recipe_id_idx
+    on public.recipe_images (recipe_id);
@@ -0,0 +1,55 @@
+-- Atomic recipe persistence: one RPC round trip writes or removes a recipe with all its child rows.
+
+create or replace function public.insert_complete_recipe(p_recipe jsonb)
+returns public.recipes
+language plpgsql
+as $$
+declare
+    new_recipe public.recipes;
+begin
+    insert into public.recipes (user_id, title, recipe_metadata, source_type, source_data)
+    values (
+        p_recipe->>'user_id',
+        p_recipe->>'title',
+        nullif(p_recipe->'recipe_metadata', 'null'::jsonb),
+        p_recipe->>'source_type',
+        p_recipe->>'source_data'
+    )
+    returning * into new_recipe;
+
+    insert into public.recipe_ingredients (recipe_id, name, quantity, unit)
+    select new_recipe.id, item->>'name', item->>'quantity', item->>'unit'
+    from jsonb_array_elements(coalesce(nullif(p_recipe->'ingredients', 'null'::jsonb), '[]'::jsonb)) as item;
+
+    if jsonb_array_length(coalesce(nullif(p_recipe->'steps', 'null'::jsonb), '[]'::jsonb)) > 0 then
+        insert into public.recipe_steps (recipe_id, instructions)
+        values (new_recipe.id, p_recipe->'steps');
+    end if;
+
+    if coalesce(p_recipe->>'image_url', '') <> '' then
+        insert into public.recipe_images (recipe_id, image_url)
+        values (new_recipe.id, p_recipe->>'image_url');
+    end if;
+
+    return new_recipe;
+end;
+$$;
+
+create or replace function public.delete_complete_recipe(p_recipe_id bigint, p_user_id text)
+returns boolean
+language plpgsql
+as $$
+begin
+    perform 1 from public.recipes where id = p_recipe_id and user_id = p_user_id for update;
+    if not found then
+        return false;
+    end if;
+
+    delete from public.recipe_ingredients where recipe_id = p_recipe_id;
+    delete from public.recipe_steps where recipe_id = p_recipe_id;
+    delete from public.recipe_images where recipe_id = p_recipe_id;
+    delete from public.recipes where id = p_recipe_id;
+
+    return true;
+end;
+$$;
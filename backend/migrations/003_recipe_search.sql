@@ -0,0 +1,159 @@
+-- Ranked, accent-insensitive search over a user's recipes: titles, tags and ingredient names.
+
+create extension if not exists unaccent;
+create extension if not exists pg_trgm;
+
+-- unaccent() is only stable, indexes need an immutable wrapper bound to the dictionary
+create or replace function public.f_unaccent(text)
+returns text
+language sql
+immutable parallel safe strict
+as $$
+    select public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+alter table public.recipes
+    add column if not exists search_vector tsvector,
+    add column if not exists search_text text;
+
+create or replace function public.recipe_search_document(p_title text, p_metadata jsonb, p_recipe_id bigint)
+returns table (search_vector tsvector, search_text text)
+language sql
+stable
+as $$
+    with parts as (
+        select
+            coalesce(p_title, '') as title,
+            coalesce((select string_agg(tag, ' ') from jsonb_array_elements_text(coalesce(p_metadata->'tags', '[]'::jsonb)) as tag), '') as tags,
+            coalesce((select string_agg(name, ' ') from public.recipe_ingredients where recipe_id = p_recipe_id), '') as ingredients
+    )
+    select
+        setweight(to_tsvector('spanish', public.f_unaccent(title)), 'A')
+            || setweight(to_tsvector('spanish', public.f_unaccent(tags)), 'B')
+            || setweight(to_tsvector('spanish', public.f_unaccent(ingredients)), 'C'),
+        lower(public.f_unaccent(title || ' ' || tags || ' ' || ingredients))
+    from parts
+$$;
+
+create or replace function public.recipes_search_before_write()
+returns trigger
+language plpgsql
+as $$
+begin
+    select document.search_vector, document.search_text
+    into new.search_vector, new.search_text
+    from public.recipe_search_document(new.title, new.recipe_metadata, new.id) as document;
+    return new;
+end;
+$$;
+
+drop trigger if exists recipes_search_before_write on public.recipes;
+create trigger recipes_search_before_write
+    before insert or update of title, recipe_metadata on public.recipes
+    for each row execute function public.recipes_search_before_write();
+
+-- Ingredients are written after their recipe, so refresh the parent once per statement
+create or replace function public.recipe_ingredients_refresh_search()
+returns trigger
+language plpgsql
+as $$
+begin
+    update public.recipes as recipe
+    set (search_vector, search_text) = (
+        select document.search_vector, document.search_text
+        from public.recipe_search_document(recipe.title, recipe.recipe_metadata, recipe.id) as document
+    )
+    where recipe.id in (select distinct recipe_id from changed_rows);
+    return null;
+end;
+$$;
+
+drop trigger if exists recipe_ingredients_search_insert on public.recipe_ingredients;
+create trigger recipe_ingredients_search_insert
+    after insert on public.recipe_ingredients
+    referencing new table as changed_rows
+    for each statement execute function public.recipe_ingredients_refresh_search();
+
+drop trigger if exists recipe_ingredients_search_update on public.recipe_ingredients;
+create trigger recipe_ingredients_search_update
+    after update on public.recipe_ingredients
+    referencing new table as changed_rows
+    for each statement execute function public.recipe_ingredients_refresh_search();
+
+drop trigger if exists recipe_ingredients_search_delete on public.recipe_ingredients;
+create trigger recipe_ingredients_search_delete
+    after delete on public.recipe_ingredients
+    referencing old table as changed_rows
+    for each statement execute function public.recipe_ingredients_refresh_search();
+
+-- Backfill rows written before this migration
+update public.recipes as recipe
+set (search_vector, search_text) = (
+    select document.search_vector, document.search_text
+    from public.recipe_search_document(recipe.title, recipe.recipe_metadata, recipe.id) as document
+)
+where recipe.search_vector is null;
+
+create index if not exists recipes_search_vector_idx
+    on public.recipes using gin (search_vector);
+
+create index if not exists recipes_search_text_trgm_idx
+    on public.recipes using gin (search_text gin_trgm_ops);
+
+create index if not exists recipe_ingredients_recipe_id_idx
+    on public.recipe_ingredients (recipe_id);
+
+-- Every word must match, the last one as a prefix so results update while typing.
+-- Trigram similarity catches typos ("tomtae") that full-text search misses.
+create or replace function public.search_recipes(p_user_id text, p_query text, p_limit int default 20, p_offset int default 0)
+returns table (
+    id bigint,
+    title text,
+    recipe_metadata jsonb,
+    created_at timestamptz,
+    rank real,
+    total_count bigint
+)
+language sql
+stable
+as $$
+    with normalized as (
+        select lower(public.f_unaccent(trim(p_query))) as text
+    ),
+    terms as (
+        select array_agg(word) as words
+        from normalized, regexp_split_to_table(normalized.text, '[^[:alnum:]]+') as word
+        where word <> ''
+    ),
+    search as (
+        select
+            normalized.text,
+            to_tsquery(
+                'spanish',
+                array_to_string(
+                    array(
+                        select quote_literal(term.word) || case when term.position = array_length(terms.words, 1) then ':*' else '' end
+                        from unnest(terms.words) with ordinality as term (word, position)
+                    ),
+                    ' & '
+                )
+            ) as query
+        from normalized, terms
+        where terms.words is not null
+    ),
+    matches as (
+        select
+            recipe.id,
+            recipe.title,
+            recipe.recipe_metadata,
+            recipe.created_at,
+            (ts_rank_cd(recipe.search_vector, search.query) + word_similarity(search.text, recipe.search_text) * 0.5)::real as rank
+        from public.recipes as recipe, search
+        where recipe.user_id = p_user_id
+          and (recipe.search_vector @@ search.query or search.text <% recipe.search_text)
+    )
+    select matches.*, count(*) over () as total_count
+    from matches
+    order by rank desc, created_at desc, id desc
+    limit p_limit offset p_offset
+$$;
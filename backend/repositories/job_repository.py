@@ -0,0 +1,133 @@
+import os
+import json
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from schemas.ai_schema import Job
+
+
+class MemoryJobRepository:
+    """Jobs of a single worker process.
+
+    Async only to share the SQLite repository's interface, nothing here blocks."""
+
+    def __init__(self, result_ttl: float = 3600):
+        self.result_ttl = result_ttl
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    async def create(self, job: Job) -> Job:
+        with self._lock:
+            self._purge_finished()
+            self._jobs[job.id] = job
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def update(self, job_id: str, **fields) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            job = job.model_copy(update={**fields, "updated_at": datetime.now(timezone.utc)})
+            self._jobs[job_id] = job
+            return job
+
+    async def get_unfinished(self) -> list[Job]:
+        return sorted(
+            (job for job in self._jobs.values() if job.status in ("queued", "running")),
+            key=lambda job: job.created_at,
+        )
+
+    def _purge_finished(self):
+        threshold = datetime.now(timezone.utc) - timedelta(seconds=self.result_ttl)
+        expired = [job_id for job_id, job in self._jobs.items() if job.status in ("done", "failed") and job.updated_at < threshold]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SqliteJobRepository:
+    """Jobs in a SQLite file, so they survive a restart.
+
+    Every call runs in a worker thread, sqlite3 blocks on disk I/O and on other writers."""
+
+    def __init__(self, path: str, result_ttl: float = 3600):
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, created_at)")
+        self._connection.commit()
+
+    def _save(self, job: Job):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO jobs (id, data, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job.id, job.model_dump_json(), job.status, job.created_at.isoformat(), job.updated_at.isoformat()),
+        )
+        self._connection.commit()
+
+    async def create(self, job: Job) -> Job:
+        def operation():
+            threshold = (datetime.now(timezone.utc) - timedelta(seconds=self.result_ttl)).isoformat()
+            with self._lock:
+                self._connection.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (threshold,))
+                self._save(job)
+
+        await asyncio.to_thread(operation)
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        def operation():
+            with self._lock:
+                return self._connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+        row = await asyncio.to_thread(operation)
+        return Job.model_validate(json.loads(row[0])) if row else None
+
+    async def update(self, job_id: str, **fields) -> Job | None:
+        def operation():
+            with self._lock:
+                row = self._connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if not row:
+                    return None
+                job = Job.model_validate(json.loads(row[0]))
+                job = job.model_copy(update={**fields, "updated_at": datetime.now(timezone.utc)})
+                self._save(job)
+                return job
+
+        return await asyncio.to_thread(operation)
+
+    async def get_unfinished(self) -> list[Job]:
+        def operation():
+            with self._lock:
+                return self._connection.execute(
+                    "SELECT data FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+                ).fetchall()
+
+        rows = await asyncio.to_thread(operation)
+        return [Job.model_validate(json.loads(row[0])) for row in rows]
+
+def create_job_repository():
+    backend = os.getenv("JOB_BACKEND", "memory")
+    result_ttl = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+    if backend == "sqlite":
+        return SqliteJobRepository(os.getenv("JOB_SQLITE_PATH", "jobs.sqlite3"), result_ttl)
+    if backend == "memory":
+        return MemoryJobRepository(result_ttl)
+
+    raise ValueError(f"Unknown JOB_BACKEND: {backend}")
@@ -1,161 +1,314 @@
-from agents import function_tool
-from clients.supabase_client import SupabaseClient
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+
+from clients.supabase_client import AsyncSupabaseClient
 from fastapi import Depends
-from utils.exceptions import DatabaseException
-from schemas.recipe_schema import Recipe, RecipeIngredient, RecipeStep, RecipeImage, RecipeInsert, RecipeIngredientInsert, RecipeStepsInsert, RecipeImageInsert
-from schemas.recipe_schema import Recipe, RecipeIngredient, RecipeStep, RecipeImage, RecipeInsert, RecipeIngredientInsert, RecipeStepsInsert, RecipeImageInsert
+from utils.exceptions import BaseAppException, DatabaseException
+from utils.resilience_utils import execute_query
+from utils.canonicalization_utils import ingredient_canonicalizer
+from schemas.recipe_schema import Recipe, CompleteRecipe, RecipeSummary, RecipeIngredient, RecipeStep, RecipeImage, RecipeInsert, RecipeIngredientInsert, RecipeStepsInsert, RecipeImageInsert
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Recipe ids per in_() filter, so a long history never turns into one oversized request URL
+RECIPE_ID_CHUNK_SIZE = 200
+
 class RecipeRepository:
-    def __init__(self, client: SupabaseClient = Depends(SupabaseClient)):
+    def __init__(self, client: AsyncSupabaseClient = Depends(AsyncSupabaseClient)):
         self.client = client.get_client()
 
-    def get_recipes_by_user_id(self, user_id: int) -> list[Recipe]:
+    def _user_recipes_query(self, columns: str, user_id: int, limit: int | None = None, cursor: tuple[datetime, int] | None = None):
+        # Keyset pagination on (created_at, id), newest first
+        query = self.client.from_("recipes").select(columns).eq("user_id", user_id)
+
+        if cursor:
+            created_at, recipe_id = cursor
+            created_at = created_at.isoformat()
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{recipe_id})')
+
+        query = query.order("created_at", desc=True).order("id", desc=True)
+
+        if limit:
+            query = query.limit(limit)
+
+        return query
+
+    async def _select_by_recipe_ids(self, table: str, columns: str, recipe_ids: list[int], operation: str, chunk_size: int = RECIPE_ID_CHUNK_SIZE) -> list[dict]:
+        # One query per chunk of ids, all in flight together
+        chunks = await asyncio.gather(*[
+            execute_query(self.client.from_(table).select(columns).in_("recipe_id", recipe_ids[start:start + chunk_size]), operation)
+            for start in range(0, len(recipe_ids), chunk_size)
+        ])
+        return [row for chunk in chunks for row in (chunk.data or [])]
+
+    async def get_recipes_by_user_id(self, user_id: int, limit: int | None = None, cursor: tuple[datetime, int] | None = None) -> list[Recipe]:
         try:
-            recipes = self.client.from_("recipes").select("*").eq("user_id", user_id).execute()
+            recipes = await execute_query(self._user_recipes_query("*", user_id, limit, cursor), "get_recipes_by_user_id")
             return [Recipe.model_validate(item) for item in (recipes.data or [])]
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error fetching recipes: {e}")
+            logger.error("Error fetching recipes: %s", e)
             raise DatabaseException(f"Error fetching recipes: {str(e)}")
+
+    async def get_recipe_summaries_by_user_id(self, user_id: int, limit: int | None = None, cursor: tuple[datetime, int] | None = None) -> list[RecipeSummary]:
+        try:
+            recipes = await execute_query(self._user_recipes_query("id,title,recipe_metadata,created_at", user_id, limit, cursor), "get_recipe_summaries_by_user_id")
+            rows = recipes.data or []
+        except BaseAppException:
+            raise
+        except Exception as e:
+            logger.error("Error fetching recipe summaries: %s", e)
+            raise DatabaseException(f"Error fetching recipe summaries: {str(e)}")
+
+        return await self.build_recipe_summaries(rows)
+
+    async def build_recipe_summaries(self, rows: list[dict]) -> list[RecipeSummary]:
+        # rows carry id, title, recipe_metadata and created_at; images come from one batched query
+        if not rows:
+            return []
+
+        try:
+            images = await execute_query(self.client.from_("recipe_images").select("recipe_id,image_url").in_("recipe_id", [row["id"] for row in rows]), "build_recipe_summaries")
+            image_rows = images.data or []
+        except Exception as e:
+            logger.warning("Error fetching recipe images: %s", e)
+            # Don't raise here as image is optional
+            image_rows = []
+
+        image_by_recipe = {}
+        for item in image_rows:
+            image_by_recipe.setdefault(item["recipe_id"], item["image_url"])
+
+        summaries = []
+        for row in rows:
+            metadata = row.get("recipe_metadata") or {}
+            summaries.append(RecipeSummary(
+                id=row["id"],
+                title=row["title"],
+                tags=metadata.get("tags") or [],
+                calorias=metadata.get("calorias"),
+                image_url=image_by_recipe.get(row["id"]),
+                created_at=row["created_at"]
+            ))
+        return summaries
+
+    async def search_recipes(self, user_id: str, query: str, limit: int, offset: int = 0) -> tuple[list[tuple[dict, float]], int]:
+        try:
+            # Ranked full-text + trigram search, see migrations/003_recipe_search.sql
+            response = await execute_query(self.client.rpc("search_recipes", {
+                "p_user_id": user_id, "p_query": query, "p_limit": limit, "p_offset": offset
+            }), "search_recipes")
+            rows = response.data or []
+        except BaseAppException:
+            raise
+        except Exception as e:
+            logger.error("Error searching recipes: %s", e)
+            raise DatabaseException(f"Error searching recipes: {str(e)}")
+
+        total = rows[0]["total_count"] if rows else 0
+        return [(row, row["rank"]) for row in rows], total
+
+    async def get_recipe_search_documents(self, user_id: str, chunk_size: int = RECIPE_ID_CHUNK_SIZE) -> list[dict]:
+        # Everything the in-process search index needs: summary columns plus ingredient names
+        try:
+            recipes = await execute_query(self._user_recipes_query("id,title,recipe_metadata,created_at", user_id), "get_recipe_search_documents")
+            rows = recipes.data or []
+
+            ingredient_rows = await self._select_by_recipe_ids("recipe_ingredients", "recipe_id,name", [row["id"] for row in rows], "get_recipe_search_documents", chunk_size)
+        except BaseAppException:
+            raise
+        except Exception as e:
+            logger.error("Error fetching recipe search documents: %s", e)
+            raise DatabaseException(f"Error fetching recipe search documents: {str(e)}")
+
+        ingredients_by_recipe = defaultdict(list)
+        for item in ingredient_rows:
+            ingredients_by_recipe[item["recipe_id"]].append(item["name"])
+
+        for row in rows:
+            row["ingredients"] = ingredients_by_recipe.get(row["id"], [])
+        return rows
+
+    async def get_recipe_by_id(self, recipe_id: int, user_id: int) -> Recipe | None:
+        try:
+            recipe = await execute_query(self.client.from_("recipes").select("*").eq("id", recipe_id).eq("user_id", user_id).limit(1), "get_recipe_by_id")
+            return Recipe.model_validate(recipe.data[0]) if recipe.data else None
+        except BaseAppException:
+            raise
+        except Exception as e:
+            logger.error("Error fetching recipe %s: %s", recipe_id, e)
+            raise DatabaseException(f"Error fetching recipe: {str(e)}")
     
-    def get_recipe_ingredients(self, recipe_id: int) -> list[RecipeIngredient]:
+    async def get_recipe_ingredients(self, recipe_id: int) -> list[RecipeIngredient]:
         try:
-            ingredients = self.client.from_("recipe_ingredients").select("*").eq("recipe_id", recipe_id).execute()
+            ingredients = await execute_query(self.client.from_("recipe_ingredients").select("*").eq("recipe_id", recipe_id), "get_recipe_ingredients")
             return [RecipeIngredient.model_validate(item) for item in (ingredients.data or [])]
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error fetching ingredients: {e}")
+            logger.error("Error fetching ingredients: %s", e)
             raise DatabaseException(f"Error fetching ingredients: {str(e)}")
     
-    def get_recipe_steps(self, recipe_id: int) -> list[RecipeStep]:
+    async def get_recipe_steps(self, recipe_id: int) -> list[RecipeStep]:
         try:
-            steps = self.client.from_("recipe_steps").select("*").eq("recipe_id", recipe_id).execute()
+            steps = await execute_query(self.client.from_("recipe_steps").select("*").eq("recipe_id", recipe_id), "get_recipe_steps")
             return [RecipeStep.model_validate(item) for item in (steps.data or [])]
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error fetching recipe steps: {e}")
+            logger.error("Error fetching recipe steps: %s", e)
             raise DatabaseException(f"Error fetching recipe steps: {str(e)}")
     
-    def get_recipe_image(self, recipe_id: int) -> RecipeImage | None:
+    async def get_recipe_image(self, recipe_id: int) -> RecipeImage | None:
         try:
-            print(f"DEBUG: Fetching image for recipe_id: {recipe_id}")
-            image = self.client.from_("recipe_images").select("*").eq("recipe_id", recipe_id).limit(1).execute()
-            print(f"DEBUG: Fetch result: {image.data}")
+            image = await execute_query(self.client.from_("recipe_images").select("*").eq("recipe_id", recipe_id).limit(1), "get_recipe_image")
             return RecipeImage.model_validate(image.data[0]) if image.data else None
         except Exception as e:
-            print(f"Error fetching recipe image: {e}")
+            logger.warning("Error fetching recipe image: %s", e)
             # Don't raise here as image is optional
             return None
 
-    def insert_recipe(self, recipe: RecipeInsert) -> Recipe | None:
+    async def get_complete_recipes(self, recipes: list[Recipe], chunk_size: int = RECIPE_ID_CHUNK_SIZE) -> list[CompleteRecipe]:
+        # Batched loader: one query per child table (per chunk of ids) regardless of how many recipes we get
+        if not recipes:
+            return []
+
+        recipe_ids = [recipe.id for recipe in recipes]
+        # The three child queries are independent, so they share the pool concurrently
+        ingredients, steps, images = await asyncio.gather(
+            self._select_by_recipe_ids("recipe_ingredients", "*", recipe_ids, "get_complete_recipes", chunk_size),
+            self._select_by_recipe_ids("recipe_steps", "*", recipe_ids, "get_complete_recipes", chunk_size),
+            self._select_by_recipe_ids("recipe_images", "*", recipe_ids, "get_complete_recipes", chunk_size),
+            return_exceptions=True
+        )
+
+        for result in (ingredients, steps):
+            if isinstance(result, BaseAppException):
+                raise result
+            if isinstance(result, Exception):
+                logger.error("Error fetching recipes additional info: %s", result)
+                raise DatabaseException(f"Error fetching recipes additional info: {str(result)}")
+
+        if isinstance(images, Exception):
+            logger.warning("Error fetching recipe images: %s", images)
+            # Don't raise here as image is optional
+            image_rows = []
+        else:
+            image_rows = images
+
+        ingredients_by_recipe = defaultdict(list)
+        for item in ingredients:
+            ingredients_by_recipe[item["recipe_id"]].append(RecipeIngredient.model_validate(item))
+
+        steps_by_recipe = defaultdict(list)
+        for item in steps:
+            steps_by_recipe[item["recipe_id"]].append(RecipeStep.model_validate(item))
+
+        image_by_recipe = {}
+        for item in image_rows:
+            image_by_recipe.setdefault(item["recipe_id"], RecipeImage.model_validate(item))
+
+        return [
+            CompleteRecipe(
+                **recipe.model_dump(),
+                ingredients=ingredients_by_recipe.get(recipe.id, []),
+                steps=steps_by_recipe.get(recipe.id, []),
+                image=image_by_recipe.get(recipe.id)
+            )
+            for recipe in recipes
+        ]
+
+    async def insert_recipe(self, recipe: RecipeInsert) -> Recipe | None:
+        # Stored names are canonical so search, matching and caching all see the same key
+        if recipe.ingredients:
+            recipe = recipe.model_copy(update={"ingredients": [
+                ingredient.model_copy(update={"name": ingredient_canonicalizer.canonicalize(ingredient.name)})
+                for ingredient in recipe.ingredients
+            ]})
+
         try:
-            # Extract nested data
-            recipe_data = recipe.model_dump(mode="json")
-            ingredients = recipe_data.pop("ingredients", None)
-            steps = recipe_data.pop("steps", None)
-            image_url = recipe_data.pop("image_url", None)
-            
-            print(f"DEBUG: insert_recipe called. Image URL present: {bool(image_url)}")
-            if image_url:
-                print(f"DEBUG: Image URL: {image_url}")
-
-            # Insert main recipe
-            response = self.client.table("recipes").insert(recipe_data).execute()
-            
-            if not response.data:
+            # Recipe, ingredients, steps and image are written in one transaction by the database function
+            response = await execute_query(self.client.rpc("insert_complete_recipe", {"p_recipe": recipe.model_dump(mode="json")}), "insert_recipe", idempotent=False)
+
+            row = response.data[0] if isinstance(response.data, list) and response.data else response.data
+            if not row:
                 return None
-                
-            new_recipe = Recipe.model_validate(response.data[0])
-            recipe_id = new_recipe.id
-
-            # Insert ingredients if present
-            if ingredients:
-                for ing in ingredients:
-                    ing["recipe_id"] = recipe_id
-                self.client.table("recipe_ingredients").insert(ingredients).execute()
-
-            # Insert steps if present
-            if steps:
-                steps_insert = {"recipe_id": recipe_id, "instructions": steps}
-                self.client.table("recipe_steps").insert(steps_insert).execute()
-
-            # Insert image if present
-            if image_url:
-                image_insert = {"recipe_id": recipe_id, "image_url": image_url}
-                self.client.table("recipe_images").insert(image_insert).execute()
-
-            return new_recipe
+
+            return Recipe.model_validate(row)
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error inserting recipe: {e}")
+            logger.error("Error inserting recipe: %s", e)
             raise DatabaseException(f"Error inserting recipe: {str(e)}")
 
-    def insert_recipe_ingredient(self, ingredient: RecipeIngredientInsert) -> RecipeIngredient | None:
+    async def copy_recipe_to_user(self, recipe_id: int, user_id: str, source_type: str, source_data: str) -> Recipe | None:
         try:
-            response = self.client.table("recipe_ingredients").insert(ingredient.model_dump(mode="json")).execute()
+            recipe = await execute_query(self.client.from_("recipes").select("*").eq("id", recipe_id).limit(1), "copy_recipe_to_user")
+        except BaseAppException:
+            raise
+        except Exception as e:
+            logger.error("Error fetching recipe %s: %s", recipe_id, e)
+            raise DatabaseException(f"Error fetching recipe: {str(e)}")
+
+        if not recipe.data:
+            return None
+
+        complete_recipe = (await self.get_complete_recipes([Recipe.model_validate(recipe.data[0])]))[0]
+        return await self.insert_recipe(RecipeInsert(
+            user_id=user_id,
+            title=complete_recipe.title,
+            recipe_metadata=complete_recipe.recipe_metadata.model_dump() if complete_recipe.recipe_metadata else None,
+            source_type=source_type,
+            source_data=source_data,
+            ingredients=[
+                {"name": ingredient.name, "quantity": ingredient.quantity, "unit": ingredient.unit}
+                for ingredient in complete_recipe.ingredients
+            ],
+            steps=[step.model_dump() for step in complete_recipe.steps[0].instructions] if complete_recipe.steps else None,
+            image_url=complete_recipe.image.image_url if complete_recipe.image else None
+        ))
+
+    async def insert_recipe_ingredient(self, ingredient: RecipeIngredientInsert) -> RecipeIngredient | None:
+        try:
+            response = await execute_query(self.client.table("recipe_ingredients").insert(ingredient.model_dump(mode="json")), "insert_recipe_ingredient", idempotent=False)
             return RecipeIngredient.model_validate(response.data[0]) if response.data else None
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error inserting recipe ingredient: {e}")
+            logger.error("Error inserting recipe ingredient: %s", e)
             raise DatabaseException(f"Error inserting recipe ingredient: {str(e)}")
 
-    def insert_recipe_step(self, recipe_steps: RecipeStepsInsert) -> RecipeStepsInsert | None:
+    async def insert_recipe_step(self, recipe_steps: RecipeStepsInsert) -> RecipeStepsInsert | None:
         try:
-            response = self.client.table("recipe_steps").insert(recipe_steps.model_dump(mode="json")).execute()
+            response = await execute_query(self.client.table("recipe_steps").insert(recipe_steps.model_dump(mode="json")), "insert_recipe_step", idempotent=False)
             return RecipeStepsInsert.model_validate(response.data[0]) if response.data else None
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error inserting recipe step: {e}")
+            logger.error("Error inserting recipe step: %s", e)
             raise DatabaseException(f"Error inserting recipe step: {str(e)}")
     
-    def insert_recipe_image(self, recipe_image: RecipeImageInsert) -> RecipeImage | None:
+    async def insert_recipe_image(self, recipe_image: RecipeImageInsert) -> RecipeImage | None:
         try:
-            response = self.client.table("recipe_images").insert(recipe_image.model_dump(mode="json")).execute()
+            response = await execute_query(self.client.table("recipe_images").insert(recipe_image.model_dump(mode="json")), "insert_recipe_image", idempotent=False)
             return RecipeImage.model_validate(response.data[0]) if response.data else None
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error inserting recipe image: {e}")
+            logger.error("Error inserting recipe image: %s", e)
             raise DatabaseException(f"Error inserting recipe image: {str(e)}")
     
 
 
-    def delete_by_id(self, recipe_id: int, user_id: int) -> bool:
+    async def delete_by_id(self, recipe_id: int, user_id: int) -> bool:
         try:
-            recipe = self.client.from_("recipes").select("*").eq("id", recipe_id).eq("user_id", user_id).execute()
-            
-            if not recipe.data:
-                return False
-            
-            self.client.from_("recipe_ingredients").delete().eq("recipe_id", recipe_id).execute()
-            self.client.from_("recipe_steps").delete().eq("recipe_id", recipe_id).execute()
-            self.client.from_("recipes").delete().eq("id", recipe_id).execute()
-            
-            return True
+            response = await execute_query(self.client.rpc("delete_complete_recipe", {"p_recipe_id": recipe_id, "p_user_id": user_id}), "delete_by_id")
+            return bool(response.data)
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error deleting recipe {recipe_id}: {e}")
+            logger.error("Error deleting recipe %s: %s", recipe_id, e)
             raise DatabaseException(f"Error deleting recipe: {str(e)}")
-
-# Standalone functions for Agents
-# These instantiate their own repository since agents might not use DI context
-def _get_repo():
-    return RecipeRepository(SupabaseClient())
-
-@function_tool(description_override="Insert a new recipe with all its details (ingredients, steps, image)")
-def insert_recipe(recipe: RecipeInsert):
-    result = _get_repo().insert_recipe(recipe)
-    if result:
-        return {"status": "success", "id": result.id, "title": result.title}
-    return {"status": "error", "message": "Failed to insert recipe"}
-
-@function_tool(description_override="Insert ingredients associated with a recipe")
-def insert_recipe_ingredient(ingredient: RecipeIngredientInsert):
-    result = _get_repo().insert_recipe_ingredient(ingredient)
-    if result:
-        return {"status": "success", "data": result.model_dump()}
-    return {"status": "error", "message": "Failed to insert ingredient"}
-
-@function_tool(description_override="Insert steps associated with a recipe")
-def insert_recipe_step(recipe_steps: RecipeStepsInsert):
-    result = _get_repo().insert_recipe_step(recipe_steps)
-    if result:
-        return {"status": "success", "data": result.model_dump()}
-    return {"status": "error", "message": "Failed to insert steps"}
-    
-@function_tool(description_override="Insert image associated with a recipe")
-def insert_recipe_image(recipe_image: RecipeImageInsert):
-    result = _get_repo().insert_recipe_image(recipe_image)
-    if result:
-        return {"status": "success", "data": result.model_dump()}
-    return {"status": "error", "message": "Failed to insert image"}
\ No newline at end of file
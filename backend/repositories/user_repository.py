@@ -1,70 +1,88 @@
-from clients.supabase_client import SupabaseClient
+from clients.supabase_client import AsyncSupabaseClient
 from fastapi import Depends
-from utils.exceptions import DatabaseException
+from utils.exceptions import BaseAppException, DatabaseException
+from utils.resilience_utils import execute_query
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
 
 class UserRepository:
-    def __init__(self, client: SupabaseClient = Depends(SupabaseClient)):
+    def __init__(self, client: AsyncSupabaseClient = Depends(AsyncSupabaseClient)):
         self.client = client.get_client()
 
-    def get_user_nutritional_preferences(self, user_id: str) -> dict | None:
+    async def get_user_nutritional_preferences(self, user_id: str) -> dict | None:
         try:
-            response = self.client.table("user_preferences").select("preferences").eq("user_id", user_id).execute()
+            response = await execute_query(self.client.table("user_preferences").select("preferences").eq("user_id", user_id), "get_user_nutritional_preferences")
             if response and response.data and len(response.data) > 0:
                 return response.data[0]['preferences']
             return None
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error fetching user preferences: {e}")
+            logger.error("Error fetching user preferences: %s", e)
             raise DatabaseException(f"Error fetching user preferences: {str(e)}")
 
-    def get_user_nutritional_preference_by_user(self, user_id: str) -> str | None:
+    async def get_user_nutritional_preference_by_user(self, user_id: str) -> str | None:
         try:
-            response = self.client.table("user_preferences").select("id").eq("user_id", user_id).execute()
+            response = await execute_query(self.client.table("user_preferences").select("id").eq("user_id", user_id), "get_user_nutritional_preference_by_user")
             if response and response.data and len(response.data) > 0:
                 return response.data[0]['id']
             return None
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error fetching user preferences: {e}")
+            logger.error("Error fetching user preferences: %s", e)
             raise DatabaseException(f"Error fetching user preferences: {str(e)}")
     
-    def insert_user_nutritional_preferences(self, user_id: str, data: dict):
+    async def insert_user_nutritional_preferences(self, user_id: str, data: dict):
         try:
-            response = self.client.table("user_preferences").insert({"preferences": data, "user_id": user_id}).execute()
+            response = await execute_query(self.client.table("user_preferences").insert({"preferences": data, "user_id": user_id}), "insert_user_nutritional_preferences", idempotent=False)
             return response.data
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error inserting user preferences: {e}")
+            logger.error("Error inserting user preferences: %s", e)
             raise DatabaseException(f"Error inserting user preferences: {str(e)}")
     
-    def update_user_nutritional_preferences(self, user_id: str, data: dict):
+    async def update_user_nutritional_preferences(self, user_id: str, data: dict):
         try:
-            response = self.client.table("user_preferences").update({"preferences": data}).eq("user_id", user_id).execute()
+            response = await execute_query(self.client.table("user_preferences").update({"preferences": data}).eq("user_id", user_id), "update_user_nutritional_preferences")
             return response.data
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error updating user preferences: {e}")
+            logger.error("Error updating user preferences: %s", e)
             raise DatabaseException(f"Error updating user preferences: {str(e)}")
 
-    def delete_user_nutritional_preferences(self, user_id: str):
+    async def delete_user_nutritional_preferences(self, user_id: str):
         try:
-            response = self.client.table("user_preferences").delete().eq("user_id", user_id).execute()
+            response = await execute_query(self.client.table("user_preferences").delete().eq("user_id", user_id), "delete_user_nutritional_preferences")
             return response.data
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error deleting user preferences: {e}")
+            logger.error("Error deleting user preferences: %s", e)
             raise DatabaseException(f"Error deleting user preferences: {str(e)}")
 
-    def get_user_profile(self, user_id: str) -> dict | None:
+    async def get_user_profile(self, user_id: str) -> dict | None:
         try:
-            response = self.client.table("profiles").select("*").eq("id", user_id).execute()
+            response = await execute_query(self.client.table("profiles").select("*").eq("id", user_id), "get_user_profile")
             if response and response.data and len(response.data) > 0:
                 return response.data[0]
             return None
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error fetching user profile: {e}")
+            logger.error("Error fetching user profile: %s", e)
             raise DatabaseException(f"Error fetching user profile: {str(e)}")
 
-    def update_user_profile(self, user_id: str, data: dict):
+    async def update_user_profile(self, user_id: str, data: dict):
         try:
-            response = self.client.table("profiles").update(data).eq("id", user_id).execute()
+            response = await execute_query(self.client.table("profiles").update(data).eq("id", user_id), "update_user_profile")
             return response.data
+        except BaseAppException:
+            raise
         except Exception as e:
-            print(f"Error updating user profile: {e}")
+            logger.error("Error updating user profile: %s", e)
             raise DatabaseException(f"Error updating user profile: {str(e)}")
 
@@ -1,12 +1,76 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from utils.auth_utils import get_current_user
-from ai.orchestrator import orchestrate_message
-from schemas.ai_schema import McpMetadata
+from ai.orchestrator import orchestrate_message, orchestrate_upload, stream_orchestration
+from ai.prompt_registry import prompt_registry
+from schemas.ai_schema import McpMetadata, GenerationResponse, JobStatusResponse
+from services.job_service import job_service
+from services.admission_service import admission_controller
+from utils.sse_utils import format_sse_event, with_heartbeat
+from utils.upload_utils import receive_upload
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 
-@router.post("")
+@router.post("", response_model=GenerationResponse)
 async def handle_message(content: McpMetadata, user = Depends(get_current_user)):
-    return await orchestrate_message(content, user.id)
\ No newline at end of file
+    async with await admission_controller.admit(user.id, "message", content.tool):
+        return await orchestrate_message(content, user.id)
+
+@router.post("/upload", response_model=GenerationResponse)
+async def handle_upload(
+    request: Request,
+    tool: Literal["image", "audio"],
+    type: str = "quick-recipe",
+    mode: Literal["agent", "pipeline", "structured"] | None = None,
+    user = Depends(get_current_user)
+):
+    # Rate and per-user limits before reading the body, a rejected upload should not cost the bandwidth.
+    # The shared LLM concurrency budget is only taken once the body is in, so slow uploads never hold it
+    async with await admission_controller.reserve(user.id, "upload", tool) as ticket:
+        upload = await receive_upload(request, tool)
+        try:
+            await ticket.schedule()
+            return await orchestrate_upload(upload, tool, type, user.id, mode)
+        finally:
+            upload.file.close()
+
+@router.post("/stream")
+async def stream_message(content: McpMetadata, user = Depends(get_current_user)):
+    # Admitted up front so a rejection is a plain 429 rather than an error event
+    ticket = await admission_controller.admit(user.id, "stream", content.tool)
+
+    async def events():
+        try:
+            async for event, data in stream_orchestration(content, user.id):
+                yield format_sse_event(event, data)
+        finally:
+            await ticket.release()
+
+    return StreamingResponse(
+        with_heartbeat(events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Covers clients that disconnect before the stream starts
+        background=BackgroundTask(ticket.release),
+    )
+
+@router.post("/jobs", status_code=202, response_model=JobStatusResponse)
+async def create_job(content: McpMetadata, user = Depends(get_current_user)):
+    # Jobs only pass the rate limits here, the workers take their share of the concurrency budget when they run
+    await admission_controller.check_rate(user.id, "jobs", content.tool)
+    job = await job_service.enqueue(content, user.id)
+    return job.model_dump()
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, user = Depends(get_current_user)):
+    job = await job_service.get_job(job_id, user.id)
+    return job.model_dump()
+
+@router.get("/prompts")
+def get_prompt_versions(user = Depends(get_current_user)):
+    return prompt_registry.versions()
\ No newline at end of file
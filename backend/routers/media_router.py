@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import FileResponse
+
+from clients.blob_store_client import BlobStoreClient
+from utils.exceptions import NotFoundException
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.get("/{key}")
+def get_media(key: str):
+    path = BlobStoreClient().get_store().path_for(key)
+    if not path:
+        raise NotFoundException("Media not found")
+
+    # Keys embed the content hash, so the bytes behind a URL never change
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
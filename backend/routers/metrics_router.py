@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from utils.metrics_utils import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
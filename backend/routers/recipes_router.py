@@ -1,23 +1,59 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
 
 from utils.auth_utils import get_current_user
 from services.recipe_service import RecipeService
-from schemas.recipe_schema import CompleteRecipe
+from schemas.recipe_schema import CompleteRecipe, RecipeSummary, RecipeSearchResult, PantryMatch, PantryMatchRequest
+from utils.etag_utils import cached_json_response
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
-@router.get("", response_model=list[CompleteRecipe])
-def get_recipes(
+@router.get("", response_model=list[CompleteRecipe] | list[RecipeSummary])
+async def get_recipes(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=100),
+    cursor: str | None = None,
+    view: Literal["full", "summary"] = "full",
+    user = Depends(get_current_user),
+    recipe_service: RecipeService = Depends(RecipeService)
+):
+    return cached_json_response(request, await recipe_service.get_recipes_response(user.id, limit, cursor, view))
+
+@router.get("/search", response_model=list[RecipeSearchResult])
+async def search_recipes(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user = Depends(get_current_user),
+    recipe_service: RecipeService = Depends(RecipeService)
+):
+    return cached_json_response(request, await recipe_service.search_recipes_response(user.id, q.strip(), limit, offset))
+
+@router.post("/matches", response_model=list[PantryMatch])
+async def match_pantry(
+    body: PantryMatchRequest,
+    user = Depends(get_current_user),
+    recipe_service: RecipeService = Depends(RecipeService)
+):
+    # Answered from stored recipes; POST /ai still generates a fresh one
+    return await recipe_service.match_pantry(user.id, body.ingredients, body.limit, body.max_missing, body.scope)
+
+@router.get("/{recipe_id}", response_model=CompleteRecipe)
+async def get_recipe(
+    request: Request,
+    recipe_id: int,
     user = Depends(get_current_user),
     recipe_service: RecipeService = Depends(RecipeService)
 ):
-    return recipe_service.get_recipes_by_user(user.id)
+    return cached_json_response(request, await recipe_service.get_recipe_response(recipe_id, user.id))
 
 @router.delete("/{recipe_id}")
-def delete_recipe(
+async def delete_recipe(
     recipe_id: int, 
     user=Depends(get_current_user),
     recipe_service: RecipeService = Depends(RecipeService)
 ):
-    return recipe_service.delete_recipe_by_id(recipe_id, user.id)
\ No newline at end of file
+    return await recipe_service.delete_recipe_by_id(recipe_id, user.id)
\ No newline at end of file
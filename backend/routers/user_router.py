@@ -1,38 +1,41 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
 from utils.auth_utils import get_current_user
 from services.user_service import UserService
 from schemas.user_schema import NutritionPreferences, UserProfile
+from utils.etag_utils import cached_json_response
 
 router = APIRouter(prefix="/user", tags=["user"])
 
 
 @router.post("/nutritional-preferences")
-def set_nutritional_preferences(
+async def set_nutritional_preferences(
     data: NutritionPreferences, 
     user = Depends(get_current_user),
     user_service: UserService = Depends(UserService)
 ):
-    return user_service.set_user_preferences(data.model_dump(), user.id)
+    return await user_service.set_user_preferences(data.model_dump(), user.id)
 
 @router.get("/nutritional-preferences")
-def get_nutritional_preferences(
+async def get_nutritional_preferences(
+    request: Request,
     user = Depends(get_current_user),
     user_service: UserService = Depends(UserService)
 ):
-    return user_service.get_user_preferences(user.id)
+    return cached_json_response(request, await user_service.get_user_preferences_response(user.id))
 
 @router.get("/profile")
-def get_user_profile(
+async def get_user_profile(
+    request: Request,
     user = Depends(get_current_user),
     user_service: UserService = Depends(UserService)
 ):
-    return user_service.get_user_profile(user.id)
+    return cached_json_response(request, await user_service.get_user_profile_response(user.id))
 
 @router.put("/profile")
-def update_user_profile(
+async def update_user_profile(
     data: UserProfile,
     user = Depends(get_current_user),
     user_service: UserService = Depends(UserService)
 ):
-    return user_service.update_user_profile(user.id, data.model_dump())
\ No newline at end of file
+    return await user_service.update_user_profile(user.id, data.model_dump())
\ No newline at end of file
@@ -1,6 +1,47 @@
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+
 from pydantic import BaseModel
 
+from schemas.recipe_schema import RecipeIngredientCreate
+
 class McpMetadata(BaseModel):
     type: str
     tool: str
-    content: str
\ No newline at end of file
+    content: str
+    mode: Optional[Literal["agent", "pipeline", "structured"]] = None
+
+
+class GenerationResponse(BaseModel):
+    # Same shape in every orchestration mode; message carries the orchestrator's reply in agent mode
+    status: Literal["success", "error"]
+    id: Optional[int] = None
+    title: Optional[str] = None
+    message: Optional[str] = None
+
+
+class Job(BaseModel):
+    id: str
+    user_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    payload: McpMetadata
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class JobStatusResponse(BaseModel):
+    id: str
+    status: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class RecipeDesign(BaseModel):
+    title: str
+    description: str
+    tags: List[str]
+    calorias: int
+    ingredients: List[RecipeIngredientCreate]
+    image_prompt: str
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -27,6 +27,8 @@ class RecipeImage(BaseModel):
     id: int
     recipe_id: int
     image_url: str
+    thumbnail_url: Optional[str] = None
+    card_url: Optional[str] = None
 
 class Recipe(BaseModel):
     id: int
@@ -49,6 +51,31 @@ class CompleteRecipe(BaseModel):
     source_type: str
     source_data: str
 
+class RecipeSummary(BaseModel):
+    id: int
+    title: str
+    tags: List[str] = []
+    calorias: Optional[int] = None
+    thumbnail_url: Optional[str] = None
+    created_at: datetime
+    # Stored image the thumbnail is derived from, never sent to clients
+    image_url: Optional[str] = Field(default=None, exclude=True)
+
+class RecipeSearchResult(RecipeSummary):
+    score: float
+
+class PantryMatch(RecipeSummary):
+    coverage: float
+    matched_ingredients: List[str]
+    missing_ingredients: List[str]
+    shared: bool = False
+
+class PantryMatchRequest(BaseModel):
+    ingredients: List[str] | str
+    limit: int = Field(10, ge=1, le=50)
+    max_missing: int = Field(2, ge=0, le=10)
+    scope: Literal["own", "all"] = "all"
+
 # Pydantic models to insert data
 
 class RecipeMetadataInsert(BaseModel):
@@ -74,6 +101,23 @@ class RecipeInsert(BaseModel):
     steps: Optional[List[RecipeStepMetadataInsert]] = None
     image_url: Optional[str] = None
 
+# Structured output the model fills in; the backend adds user_id, source and image_url
+class RecipeGeneration(BaseModel):
+    title: str
+    recipe_metadata: RecipeMetadataInsert
+    ingredients: List[RecipeIngredientCreate]
+    steps: List[RecipeStepMetadataInsert]
+    image_prompt: str
+
+    def to_insert(self, user_id: str, source_type: str, source_data: str, image_url: Optional[str] = None) -> RecipeInsert:
+        return RecipeInsert(
+            **self.model_dump(exclude={"image_prompt"}),
+            user_id=user_id,
+            source_type=source_type,
+            source_data=source_data,
+            image_url=image_url
+        )
+
 class RecipeIngredientInsert(BaseModel):
     recipe_id: int
     name: str
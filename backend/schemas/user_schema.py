@@ -15,3 +15,9 @@ class UserProfile(BaseModel):
     username: Optional[str] = None
     full_name: Optional[str] = None
     avatar_url: Optional[str] = None
+
+
+class AuthenticatedUser(BaseModel):
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
@@ -0,0 +1,348 @@
+import os
+import json
+import math
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+
+from utils.exceptions import TooManyRequestsException
+from utils.metrics_utils import ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS, AI_IN_FLIGHT
+
+# Image and audio generations make extra model calls, so they draw more from the buckets
+DEFAULT_INPUT_COSTS = {"text": 1.0, "image": 3.0, "audio": 2.0}
+
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    user_rate_per_minute: float = 6
+    user_burst: float = 6
+    max_in_flight: int = 2
+    # How long a request may wait for the global concurrency budget before it is turned away
+    queue_timeout: float = 30
+    in_flight_retry_after: int = 10
+
+
+class MemoryAdmissionBackend:
+    """Token buckets and in-flight slots for a single worker process.
+
+    Async only to share the SQLite backend's interface, nothing here blocks."""
+
+    def __init__(self, max_buckets: int = 10000, clock=time.monotonic):
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self._buckets = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    async def take(self, buckets: list[tuple[str, float, float]], cost: float) -> float:
+        # All-or-nothing over (key, rate per second, burst): returns 0 when taken, else seconds until it would be
+        with self._lock:
+            now = self.clock()
+            levels = []
+            wait = 0.0
+            for key, rate, burst in buckets:
+                tokens, updated_at, _, _ = self._buckets.get(key, (burst, now, rate, burst))
+                tokens = min(burst, tokens + (now - updated_at) * rate)
+                needed = min(cost, burst)
+                if tokens < needed:
+                    wait = max(wait, (needed - tokens) / rate)
+                levels.append((key, tokens - needed, rate, burst))
+
+            if wait > 0:
+                return wait
+
+            for key, tokens, rate, burst in levels:
+                self._buckets[key] = (tokens, now, rate, burst)
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely carries no state worth keeping
+        for key, (tokens, updated_at, rate, burst) in list(self._buckets.items()):
+            if tokens + (now - updated_at) * rate >= burst:
+                del self._buckets[key]
+
+    async def acquire_slot(self, user_id: str, limit: int, lease: float) -> str | None:
+        with self._lock:
+            slots = self._slots.setdefault(user_id, set())
+            if len(slots) >= limit:
+                return None
+            slot_id = uuid.uuid4().hex
+            slots.add(slot_id)
+            return slot_id
+
+    async def release_slot(self, user_id: str, slot_id: str):
+        with self._lock:
+            slots = self._slots.get(user_id)
+            if slots is not None:
+                slots.discard(slot_id)
+                if not slots:
+                    del self._slots[user_id]
+
+
+class SqliteAdmissionBackend:
+    """Buckets and slots in a SQLite file shared by every worker on the host.
+
+    Every call runs in a worker thread: BEGIN IMMEDIATE can wait up to the busy timeout for another process."""
+
+    def __init__(self, path: str, clock=time.time):
+        # Wall clock, the file is shared with other processes
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS admission_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS admission_slots (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS admission_slots_user_idx ON admission_slots (user_id)")
+
+    def _transaction(self, operation):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across processes
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(self._connection)
+                self._connection.execute("COMMIT")
+                return result
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    async def take(self, buckets: list[tuple[str, float, float]], cost: float) -> float:
+        def operation(connection):
+            now = self.clock()
+            levels = []
+            wait = 0.0
+            for key, rate, burst in buckets:
+                row = connection.execute("SELECT tokens, updated_at FROM admission_buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated_at = row if row else (burst, now)
+                tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+                needed = min(cost, burst)
+                if tokens < needed:
+                    wait = max(wait, (needed - tokens) / rate)
+                levels.append((key, tokens - needed))
+
+            if wait > 0:
+                return wait
+
+            connection.executemany(
+                "INSERT OR REPLACE INTO admission_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                [(key, tokens, now) for key, tokens in levels],
+            )
+            return 0.0
+
+        return await asyncio.to_thread(self._transaction, operation)
+
+    async def acquire_slot(self, user_id: str, limit: int, lease: float) -> str | None:
+        # Slots expire after the lease, so a worker that dies mid-generation cannot lock a user out
+        def operation(connection):
+            now = self.clock()
+            connection.execute("DELETE FROM admission_slots WHERE expires_at <= ?", (now,))
+            (count,) = connection.execute("SELECT COUNT(*) FROM admission_slots WHERE user_id = ?", (user_id,)).fetchone()
+            if count >= limit:
+                return None
+            slot_id = uuid.uuid4().hex
+            connection.execute("INSERT INTO admission_slots (id, user_id, expires_at) VALUES (?, ?, ?)", (slot_id, user_id, now + lease))
+            return slot_id
+
+        return await asyncio.to_thread(self._transaction, operation)
+
+    async def release_slot(self, user_id: str, slot_id: str):
+        await asyncio.to_thread(self._transaction, lambda connection: connection.execute("DELETE FROM admission_slots WHERE id = ?", (slot_id,)))
+
+
+class FairScheduler:
+    """Process-wide LLM concurrency budget; when it is full, freed slots go to waiting users in round-robin order."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        self._waiters: OrderedDict[str, deque] = OrderedDict()
+
+    async def acquire(self, user_id: str, timeout: float):
+        if self.active < self.capacity and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up, pass it on
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+
+    def _discard(self, user_id: str, future):
+        waiters = self._waiters.get(user_id)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                del self._waiters[user_id]
+
+    def release(self):
+        while self._waiters:
+            # Serve the user at the head, then send them to the back if they still have requests waiting
+            user_id, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(user_id)
+            else:
+                del self._waiters[user_id]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionTicket:
+    def __init__(self, controller, user_id: str, route: str, slot_id: str):
+        self.controller = controller
+        self.user_id = user_id
+        self.route = route
+        self.slot_id = slot_id
+        self.scheduled = False
+        self._released = False
+
+    async def schedule(self, wait: bool = False):
+        await self.controller.schedule(self, wait)
+
+    async def release(self):
+        # Safe to call more than once: streaming responses release from both the generator and a background task
+        if self._released:
+            return
+        self._released = True
+        if self.scheduled:
+            self.controller.scheduler.release()
+            AI_IN_FLIGHT.dec()
+        await self.controller.backend.release_slot(self.user_id, self.slot_id)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+
+class AdmissionController:
+    """Rate limits, per-user in-flight caps and fair queueing in front of every generation."""
+
+    def __init__(self, backend, max_concurrency: int, default_limits: AdmissionLimits, route_limits: dict[str, AdmissionLimits] | None = None,
+                 input_costs: dict[str, float] | None = None, global_rate_per_minute: float = 120, global_burst: float = 30):
+        self.backend = backend
+        self.scheduler = FairScheduler(max_concurrency)
+        self.default_limits = default_limits
+        self.route_limits = route_limits or {}
+        self.input_costs = input_costs or DEFAULT_INPUT_COSTS
+        self.global_rate_per_minute = global_rate_per_minute
+        self.global_burst = global_burst
+
+    def limits_for(self, route: str) -> AdmissionLimits:
+        return self.route_limits.get(route, self.default_limits)
+
+    def _reject(self, route: str, reason: str, message: str, retry_after: float):
+        ADMISSION_REJECTIONS.labels(route, reason).inc()
+        raise TooManyRequestsException(message, retry_after=max(1, math.ceil(retry_after)))
+
+    async def check_rate(self, user_id: str, route: str, tool: str):
+        limits = self.limits_for(route)
+        wait = await self.backend.take([
+            (f"user:{route}:{user_id}", limits.user_rate_per_minute / 60, limits.user_burst),
+            ("global", self.global_rate_per_minute / 60, self.global_burst),
+        ], self.input_costs.get(tool, 1.0))
+        if wait > 0:
+            self._reject(route, "rate", "Too many generation requests, try again later", wait)
+
+    async def reserve(self, user_id: str, route: str, tool: str) -> AdmissionTicket:
+        """Per-user slot and rate limits only; the ticket still has to schedule() before calling a model."""
+        limits = self.limits_for(route)
+
+        # Cheap in-flight check first so a user at their cap does not spend rate tokens
+        slot_id = await self.backend.acquire_slot(user_id, limits.max_in_flight, lease=limits.queue_timeout + 600)
+        if slot_id is None:
+            self._reject(route, "in_flight", "A generation is already in progress", limits.in_flight_retry_after)
+
+        try:
+            await self.check_rate(user_id, route, tool)
+        except BaseException:
+            await self.backend.release_slot(user_id, slot_id)
+            raise
+        return AdmissionTicket(self, user_id, route, slot_id)
+
+    async def claim_slot(self, user_id: str, route: str) -> AdmissionTicket | None:
+        """Per-user in-flight slot without the rate check, for work that was rate limited when it was accepted.
+
+        None while the user is at their cap."""
+        limits = self.limits_for(route)
+        slot_id = await self.backend.acquire_slot(user_id, limits.max_in_flight, lease=limits.queue_timeout + 600)
+        return AdmissionTicket(self, user_id, route, slot_id) if slot_id else None
+
+    async def schedule(self, ticket: AdmissionTicket, wait: bool = False):
+        # wait=True queues for as long as it takes, for background work with nobody waiting on a response
+        limits = self.limits_for(ticket.route)
+        start = time.perf_counter()
+        try:
+            await self.scheduler.acquire(ticket.user_id, None if wait else limits.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject(ticket.route, "queue_timeout", "The service is busy, try again later", limits.queue_timeout)
+        ADMISSION_WAIT_SECONDS.labels(ticket.route).observe(time.perf_counter() - start)
+
+        ticket.scheduled = True
+        AI_IN_FLIGHT.inc()
+
+    async def admit(self, user_id: str, route: str, tool: str) -> AdmissionTicket:
+        ticket = await self.reserve(user_id, route, tool)
+        try:
+            await ticket.schedule()
+        except BaseException:
+            await ticket.release()
+            raise
+        return ticket
+
+
+def parse_route_limits(raw: str | None, default_limits: AdmissionLimits) -> dict[str, AdmissionLimits]:
+    # AI_ROUTE_LIMITS='{"upload": {"user_rate_per_minute": 2, "max_in_flight": 1}}'
+    if not raw:
+        return {}
+    return {route: replace(default_limits, **overrides) for route, overrides in json.loads(raw).items()}
+
+def create_admission_controller() -> AdmissionController:
+    backend = os.getenv("ADMISSION_BACKEND", "memory")
+    default_limits = AdmissionLimits(
+        user_rate_per_minute=float(os.getenv("AI_USER_RATE_PER_MINUTE", "6")),
+        user_burst=float(os.getenv("AI_USER_BURST", "6")),
+        max_in_flight=int(os.getenv("AI_USER_MAX_IN_FLIGHT", "2")),
+        queue_timeout=float(os.getenv("AI_QUEUE_TIMEOUT", "30")),
+        in_flight_retry_after=int(os.getenv("AI_IN_FLIGHT_RETRY_AFTER", "10")),
+    )
+
+    if backend == "sqlite":
+        store = SqliteAdmissionBackend(os.getenv("ADMISSION_SQLITE_PATH", "admission.sqlite3"))
+    elif backend == "memory":
+        store = MemoryAdmissionBackend()
+    else:
+        raise ValueError(f"Unknown ADMISSION_BACKEND: {backend}")
+
+    return AdmissionController(
+        store,
+        max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", "16")),
+        default_limits=default_limits,
+        route_limits=parse_route_limits(os.getenv("AI_ROUTE_LIMITS"), default_limits),
+        input_costs={**DEFAULT_INPUT_COSTS, **json.loads(os.getenv("AI_INPUT_COSTS", "{}"))},
+        global_rate_per_minute=float(os.getenv("AI_GLOBAL_RATE_PER_MINUTE", "120")),
+        global_burst=float(os.getenv("AI_GLOBAL_BURST", "30")),
+    )
+
+
+admission_controller = create_admission_controller()
@@ -0,0 +1,54 @@
+import os
+import asyncio
+import hashlib
+
+from clients.blob_store_client import BlobStoreClient
+from clients.http_client import HttpClient
+from schemas.recipe_schema import CompleteRecipe, RecipeSummary
+from utils.image_utils import build_webp_renditions
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_DOWNLOAD_TIMEOUT = float(os.getenv("IMAGE_DOWNLOAD_TIMEOUT", "30"))
+
+
+async def persist_generated_image(image_url: str) -> str:
+    # Returns the URL of the stored "full" rendition, or the original URL if anything fails
+    if not image_url.startswith(("http://", "https://")):
+        return image_url
+
+    store = BlobStoreClient().get_store()
+    if image_url.startswith(store.base_url):
+        return image_url
+
+    try:
+        response = await HttpClient().get_client().get(image_url, timeout=IMAGE_DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+
+        data = response.content
+        content_hash = hashlib.sha256(data).hexdigest()[:32]
+        renditions = await asyncio.to_thread(build_webp_renditions, data)
+
+        for name, rendition in renditions.items():
+            await asyncio.to_thread(store.put, f"{content_hash}-{name}.webp", rendition)
+
+        return store.url_for(f"{content_hash}-full.webp")
+    except Exception as e:
+        logger.error("Error persisting generated image: %s", e)
+        return image_url
+
+def rendition_url(image_url: str, rendition: str) -> str:
+    # Stored images point at the "full" rendition; siblings share the same content hash
+    if image_url.endswith("-full.webp"):
+        return image_url.removesuffix("-full.webp") + f"-{rendition}.webp"
+    return image_url
+
+def add_rendition_urls(items: list[CompleteRecipe] | list[RecipeSummary]) -> list[CompleteRecipe] | list[RecipeSummary]:
+    for item in items:
+        if isinstance(item, RecipeSummary):
+            item.thumbnail_url = rendition_url(item.image_url, "thumbnail") if item.image_url else None
+        elif item.image:
+            item.image.thumbnail_url = rendition_url(item.image.image_url, "thumbnail")
+            item.image.card_url = rendition_url(item.image.image_url, "card")
+    return items
@@ -0,0 +1,100 @@
+import os
+import uuid
+import asyncio
+from datetime import datetime, timezone
+
+from ai.orchestrator import orchestrate_message
+from repositories.job_repository import create_job_repository
+from services.admission_service import admission_controller
+from schemas.ai_schema import Job, McpMetadata
+from utils.exceptions import BaseAppException, NotFoundException, TooManyRequestsException
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# How long a job whose user is at their in-flight cap waits before it is queued again
+JOB_SLOT_RETRY_SECONDS = float(os.getenv("JOB_SLOT_RETRY_SECONDS", "2"))
+
+
+class JobService:
+    """In-process recipe generation queue drained by a fixed pool of async workers."""
+
+    def __init__(self, repository=None, workers: int | None = None, max_queue_size: int | None = None, admission=None):
+        self.repository = repository or create_job_repository()
+        self.admission = admission or admission_controller
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.max_queue_size = max_queue_size or int(os.getenv("JOB_QUEUE_MAX_SIZE", "100"))
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        # Jobs left queued by a previous process are picked up again. Running ones may already have
+        # inserted their recipe and paid for the models, so they fail instead of running twice
+        for job in await self.repository.get_unfinished():
+            if job.status == "running":
+                await self.repository.update(job.id, status="failed", error="Interrupted by a restart, submit the request again")
+            else:
+                self._queue.put_nowait(job.id)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, content: McpMetadata, user_id: str) -> Job:
+        if self._queue.qsize() >= self.max_queue_size:
+            raise TooManyRequestsException("Generation queue is full, try again later", retry_after=30)
+
+        now = datetime.now(timezone.utc)
+        job = Job(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status="queued",
+            payload=content,
+            created_at=now,
+            updated_at=now,
+        )
+        await self.repository.create(job)
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get_job(self, job_id: str, user_id: str) -> Job:
+        job = await self.repository.get(job_id)
+        if not job or job.user_id != user_id:
+            raise NotFoundException("Job not found")
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.repository.get(job_id)
+                if not job or job.status != "queued":
+                    continue
+
+                # Jobs count towards the same per-user in-flight cap as interactive requests;
+                # a user at their cap has the job put back so other users' jobs are not held up
+                ticket = await self.admission.claim_slot(job.user_id, "jobs")
+                if ticket is None:
+                    asyncio.get_running_loop().call_later(JOB_SLOT_RETRY_SECONDS, self._queue.put_nowait, job_id)
+                    continue
+
+                async with ticket:
+                    # Queued jobs compete for the LLM budget on the same round-robin as interactive requests
+                    await ticket.schedule(wait=True)
+                    await self.repository.update(job_id, status="running")
+                    result = await orchestrate_message(job.payload, job.user_id)
+                await self.repository.update(job_id, status="done", result=result.model_dump())
+            except BaseAppException as e:
+                await self.repository.update(job_id, status="failed", error=e.message)
+            except Exception as e:
+                logger.exception("Error processing job %s: %s", job_id, e)
+                await self.repository.update(job_id, status="failed", error="Error generating recipe")
+            finally:
+                self._queue.task_done()
+
+
+job_service = JobService()
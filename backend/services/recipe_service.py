@@ -1,48 +1,278 @@
+import os
+import asyncio
+
+from agents import function_tool
 from fastapi import Depends
+from clients.supabase_client import AsyncSupabaseClient
 from repositories.recipe_repository import RecipeRepository
-from schemas.recipe_schema import CompleteRecipe, Recipe
+from services.image_rendition_service import add_rendition_urls
+from schemas.recipe_schema import CompleteRecipe, Recipe, RecipeSummary, RecipeSearchResult, PantryMatch, RecipeIngredient, RecipeStep, RecipeImage, RecipeInsert, RecipeIngredientInsert, RecipeStepsInsert, RecipeImageInsert
+from utils.exceptions import NotFoundException
+from utils.pagination_utils import encode_cursor, decode_cursor
+from utils.cache_utils import CachedResponse, TTLCache, user_response_cache
+from utils.search_utils import InvertedIndex
+from utils.pantry_utils import PantryMatcher
+from utils.ingredient_utils import split_ingredients
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# "postgres" uses the search_recipes RPC (migrations/003_recipe_search.sql),
+# "memory" builds a per-user inverted index for databases without the migration
+RECIPE_SEARCH_BACKEND = os.getenv("RECIPE_SEARCH_BACKEND", "postgres")
+
+# Keyed by the user's "recipes" generation, so inserts and deletes rebuild the index
+search_index_cache = TTLCache(
+    maxsize=int(os.getenv("RECIPE_SEARCH_INDEX_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("RECIPE_SEARCH_INDEX_TTL", "600"))
+)
+
+# Recipes of this account are offered to every user by the pantry matcher
+SHARED_RECIPES_USER_ID = os.getenv("SHARED_RECIPES_USER_ID")
+
+pantry_matcher_cache = TTLCache(
+    maxsize=int(os.getenv("PANTRY_MATCHER_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("PANTRY_MATCHER_TTL", "600"))
+)
 
 class RecipeService:
     def __init__(self, recipe_repository: RecipeRepository = Depends(RecipeRepository)):
         self.recipe_repository = recipe_repository
 
-    def get_recipes_by_user(self, user_id: int) -> list[CompleteRecipe]:
+    async def get_recipes_by_user(self, user_id: int) -> list[CompleteRecipe]:
         try:
-            recipes = self.recipe_repository.get_recipes_by_user_id(user_id)
+            recipes = await self.recipe_repository.get_recipes_by_user_id(user_id)
 
             if not recipes:
                 return []
 
-            complete_recipes = []
-            for recipe in recipes:
-                complete_recipes.append(self.get_recipe_additional_info(recipe))
+            return add_rendition_urls(await self.recipe_repository.get_complete_recipes(recipes))
+        except Exception as e:
+            logger.error("Error fetching recipes: %s", e)
+            raise e
+
+    async def get_recipes_response(self, user_id: str, limit: int | None = None, cursor: str | None = None, view: str = "full") -> CachedResponse:
+        async def load():
+            # Without limit/cursor/view keep returning the whole history for older clients
+            if limit is None and cursor is None and view == "full":
+                return await self.get_recipes_by_user(user_id), {}
+
+            recipes, next_cursor = await self.get_recipes_page(user_id, limit or 20, cursor, view)
+            return recipes, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+        return await user_response_cache.get_or_load(user_id, "recipes", load, variant=f"{limit}|{cursor}|{view}")
+
+    async def search_recipes_response(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> CachedResponse:
+        async def load():
+            results, total = await self.search_recipes(user_id, query, limit, offset)
+            return results, {"X-Total-Count": str(total)}
+
+        return await user_response_cache.get_or_load(user_id, "recipes", load, variant=f"search|{query}|{limit}|{offset}")
+
+    async def search_recipes(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> tuple[list[RecipeSearchResult], int]:
+        try:
+            if RECIPE_SEARCH_BACKEND == "memory":
+                index = await self.get_search_index(user_id)
+                ranked, total = index.search(query, limit, offset, sort_key=lambda payload: payload[0])
+                matches = [(index.documents[recipe_id][1], score) for recipe_id, score in ranked]
+            else:
+                matches, total = await self.recipe_repository.search_recipes(user_id, query, limit, offset)
+
+            summaries = add_rendition_urls(await self.recipe_repository.build_recipe_summaries([row for row, _ in matches]))
+            results = [
+                RecipeSearchResult(**summary.model_dump(), score=round(score, 4))
+                for summary, (_, score) in zip(summaries, matches)
+            ]
+            return results, total
+        except Exception as e:
+            logger.error("Error searching recipes: %s", e)
+            raise e
+
+    async def get_search_index(self, user_id: str) -> InvertedIndex:
+        key = (user_id, user_response_cache.generation(user_id, "recipes"))
+        index = search_index_cache.get(key)
+        if index is not None:
+            return index
+
+        documents = await self.recipe_repository.get_recipe_search_documents(user_id)
+        # Newest first, so equal scores keep the order of the recipe list
+        documents.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+
+        index = InvertedIndex()
+        for position, row in enumerate(documents):
+            metadata = row.get("recipe_metadata") or {}
+            index.add(row["id"], {
+                "title": row["title"],
+                "tags": " ".join(metadata.get("tags") or []),
+                "ingredients": " ".join(row.pop("ingredients")),
+            }, payload=(position, row))
+
+        search_index_cache.set(key, index)
+        return index
+
+    async def match_pantry(self, user_id: str, ingredients: list[str] | str, limit: int = 10, max_missing: int = 2, scope: str = "all") -> list[PantryMatch]:
+        try:
+            pantry = split_ingredients(ingredients) if isinstance(ingredients, str) else ingredients
+            owners = [user_id]
+            if scope == "all" and SHARED_RECIPES_USER_ID and SHARED_RECIPES_USER_ID != user_id:
+                owners.append(SHARED_RECIPES_USER_ID)
+
+            matchers = await asyncio.gather(*[self.get_pantry_matcher(owner) for owner in owners])
+            matches = []
+            for owner, matcher in zip(owners, matchers):
+                for row, coverage, matched, missing in matcher.match(pantry, limit, max_missing):
+                    matches.append((row, coverage, matched, missing, owner != user_id))
+
+            # The user's own recipes win ties against the shared pool
+            matches.sort(key=lambda match: (len(match[3]), -match[1], match[4]))
+            matches = matches[:limit]
+
+            summaries = add_rendition_urls(await self.recipe_repository.build_recipe_summaries([row for row, *_ in matches]))
+            return [
+                PantryMatch(**summary.model_dump(), coverage=round(coverage, 4), matched_ingredients=matched, missing_ingredients=missing, shared=shared)
+                for summary, (_, coverage, matched, missing, shared) in zip(summaries, matches)
+            ]
+        except Exception as e:
+            logger.error("Error matching pantry: %s", e)
+            raise e
+
+    async def get_pantry_matcher(self, user_id: str) -> PantryMatcher:
+        key = (user_id, user_response_cache.generation(user_id, "recipes"))
+        matcher = pantry_matcher_cache.get(key)
+        if matcher is not None:
+            return matcher
+
+        documents = await self.recipe_repository.get_recipe_search_documents(user_id)
+        documents.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        matcher = PantryMatcher([(row, row.pop("ingredients")) for row in documents])
+
+        pantry_matcher_cache.set(key, matcher)
+        return matcher
+
+    async def get_recipe_response(self, recipe_id: int, user_id: str) -> CachedResponse:
+        async def load():
+            return await self.get_recipe_by_id(recipe_id, user_id), {}
+
+        return await user_response_cache.get_or_load(user_id, "recipes", load, variant=f"id:{recipe_id}")
+
+    async def get_recipes_page(self, user_id: int, limit: int, cursor: str | None = None, view: str = "full") -> tuple[list[CompleteRecipe] | list[RecipeSummary], str | None]:
+        try:
+            keyset = decode_cursor(cursor) if cursor else None
+
+            # Ask for one extra row to know whether there is a next page
+            if view == "summary":
+                items = await self.recipe_repository.get_recipe_summaries_by_user_id(user_id, limit + 1, keyset)
+            else:
+                items = await self.recipe_repository.get_recipes_by_user_id(user_id, limit + 1, keyset)
 
-            return complete_recipes
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+            if view != "summary":
+                items = await self.recipe_repository.get_complete_recipes(items)
+
+            return add_rendition_urls(items), next_cursor
         except Exception as e:
-            print(f"Error fetching recipes: {e}")
+            logger.error("Error fetching recipes page: %s", e)
             raise e
 
-    def get_recipe_additional_info(self, recipe: Recipe) -> CompleteRecipe:
+    async def get_recipe_by_id(self, recipe_id: int, user_id: int) -> CompleteRecipe:
         try:
-            ingredients = self.recipe_repository.get_recipe_ingredients(recipe.id) or []
-            steps = self.recipe_repository.get_recipe_steps(recipe.id) or []
-            image = self.recipe_repository.get_recipe_image(recipe.id)
+            recipe = await self.recipe_repository.get_recipe_by_id(recipe_id, user_id)
 
-            return CompleteRecipe(
+            if not recipe:
+                raise NotFoundException("Recipe not found")
+
+            return await self.get_recipe_additional_info(recipe)
+        except Exception as e:
+            logger.error("Error fetching recipe %s: %s", recipe_id, e)
+            raise e
+
+    async def get_recipe_additional_info(self, recipe: Recipe) -> CompleteRecipe:
+        try:
+            ingredients, steps, image = await asyncio.gather(
+                self.recipe_repository.get_recipe_ingredients(recipe.id),
+                self.recipe_repository.get_recipe_steps(recipe.id),
+                self.recipe_repository.get_recipe_image(recipe.id)
+            )
+
+            return add_rendition_urls([CompleteRecipe(
                 **recipe.model_dump(),
-                ingredients=ingredients,
-                steps=steps,
+                ingredients=ingredients or [],
+                steps=steps or [],
                 image=image
-            )
+            )])[0]
 
         except Exception as e:
-            print(f"Error fetching recipe additional info for {recipe.id}: {e}")
+            logger.error("Error fetching recipe additional info for %s: %s", recipe.id, e)
             raise e
     
-    def delete_recipe_by_id(self, recipe_id: int, user_id: int) -> bool:
+    async def delete_recipe_by_id(self, recipe_id: int, user_id: int) -> bool:
         try:
-            return self.recipe_repository.delete_by_id(recipe_id, user_id)
+            deleted = await self.recipe_repository.delete_by_id(recipe_id, user_id)
+            if deleted:
+                user_response_cache.invalidate(user_id, "recipes")
+            return deleted
         except Exception as e:
-            print(f"Error deleting recipe {recipe_id}: {e}")
+            logger.error("Error deleting recipe %s: %s", recipe_id, e)
             raise e
-        
\ No newline at end of file
+
+    async def insert_recipe(self, recipe: RecipeInsert) -> Recipe | None:
+        inserted = await self.recipe_repository.insert_recipe(recipe)
+        if inserted:
+            user_response_cache.invalidate(recipe.user_id, "recipes")
+        return inserted
+
+    async def copy_recipe_to_user(self, recipe_id: int, user_id: str, source_type: str, source_data: str) -> Recipe | None:
+        copied = await self.recipe_repository.copy_recipe_to_user(recipe_id, user_id, source_type, source_data)
+        if copied:
+            user_response_cache.invalidate(user_id, "recipes")
+        return copied
+
+    # The rows below only know their recipe, so whoever drives them calls recipes_changed once done
+    async def insert_recipe_ingredient(self, ingredient: RecipeIngredientInsert) -> RecipeIngredient | None:
+        return await self.recipe_repository.insert_recipe_ingredient(ingredient)
+
+    async def insert_recipe_step(self, recipe_steps: RecipeStepsInsert) -> RecipeStep | None:
+        return await self.recipe_repository.insert_recipe_step(recipe_steps)
+
+    async def insert_recipe_image(self, recipe_image: RecipeImageInsert) -> RecipeImage | None:
+        return await self.recipe_repository.insert_recipe_image(recipe_image)
+
+    def recipes_changed(self, user_id: str):
+        user_response_cache.invalidate(user_id, "recipes")
+
+# Standalone functions for Agents
+# These instantiate their own service since agents might not use DI context
+def _get_service():
+    return RecipeService(RecipeRepository(AsyncSupabaseClient()))
+
+@function_tool(description_override="Insert a new recipe with all its details (ingredients, steps, image)")
+async def insert_recipe(recipe: RecipeInsert):
+    result = await _get_service().insert_recipe(recipe)
+    if result:
+        return {"status": "success", "id": result.id, "title": result.title}
+    return {"status": "error", "message": "Failed to insert recipe"}
+
+@function_tool(description_override="Insert ingredients associated with a recipe")
+async def insert_recipe_ingredient(ingredient: RecipeIngredientInsert):
+    result = await _get_service().insert_recipe_ingredient(ingredient)
+    if result:
+        return {"status": "success", "data": result.model_dump()}
+    return {"status": "error", "message": "Failed to insert ingredient"}
+
+@function_tool(description_override="Insert steps associated with a recipe")
+async def insert_recipe_step(recipe_steps: RecipeStepsInsert):
+    result = await _get_service().insert_recipe_step(recipe_steps)
+    if result:
+        return {"status": "success", "data": result.model_dump()}
+    return {"status": "error", "message": "Failed to insert steps"}
+    
+@function_tool(description_override="Insert image associated with a recipe")
+async def insert_recipe_image(recipe_image: RecipeImageInsert):
+    result = await _get_service().insert_recipe_image(recipe_image)
+    if result:
+        return {"status": "success", "data": result.model_dump()}
+    return {"status": "error", "message": "Failed to insert image"}
@@ -1,27 +1,38 @@
 from fastapi import Depends
 from repositories.user_repository import UserRepository
+from utils.cache_utils import CachedResponse, user_response_cache
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
 
 class UserService:
     def __init__(self, user_repository: UserRepository = Depends(UserRepository)):
         self.user_repository = user_repository
 
-    def set_user_preferences(self, data: dict, user_id: str):
+    async def set_user_preferences(self, data: dict, user_id: str):
         try:
-            existing = self.user_repository.get_user_nutritional_preferences(user_id)
+            existing = await self.user_repository.get_user_nutritional_preferences(user_id)
             
             if existing:
-                result = self.user_repository.update_user_nutritional_preferences(user_id, data)
+                result = await self.user_repository.update_user_nutritional_preferences(user_id, data)
             else:
-                result = self.user_repository.insert_user_nutritional_preferences(user_id, data)
-            
+                result = await self.user_repository.insert_user_nutritional_preferences(user_id, data)
+
+            user_response_cache.invalidate(user_id, "preferences")
             return {"message": "Preferencias guardadas correctamente", "data": result}
         except Exception as e:
-            print(f"Error setting user preferences: {e}")
+            logger.error("Error setting user preferences: %s", e)
             raise e
 
-    def get_user_preferences(self, user_id: str):
+    async def get_user_preferences_response(self, user_id: str) -> CachedResponse:
+        async def load():
+            return await self.get_user_preferences(user_id), {}
+
+        return await user_response_cache.get_or_load(user_id, "preferences", load)
+
+    async def get_user_preferences(self, user_id: str):
         try:
-            user_nutritional_preferences = self.user_repository.get_user_nutritional_preferences(user_id)
+            user_nutritional_preferences = await self.user_repository.get_user_nutritional_preferences(user_id)
             
             if not user_nutritional_preferences:
                 return {
@@ -34,26 +45,34 @@ class UserService:
             
             return user_nutritional_preferences
         except Exception as e:
-            print(f"Error fetching user preferences: {e}")
+            logger.error("Error fetching user preferences: %s", e)
             raise e
 
-    def get_user_profile(self, user_id: str):
+    async def get_user_profile_response(self, user_id: str) -> CachedResponse:
+        async def load():
+            return await self.get_user_profile(user_id), {}
+
+        return await user_response_cache.get_or_load(user_id, "profile", load)
+
+    async def get_user_profile(self, user_id: str):
         try:
-            profile = self.user_repository.get_user_profile(user_id)
+            profile = await self.user_repository.get_user_profile(user_id)
             if not profile:
                 # Should not happen if trigger works, but handle gracefully
                 return {}
             return profile
         except Exception as e:
-            print(f"Error fetching user profile: {e}")
+            logger.error("Error fetching user profile: %s", e)
             raise e
 
-    def update_user_profile(self, user_id: str, data: dict):
+    async def update_user_profile(self, user_id: str, data: dict):
         try:
             # Filter out None values to avoid overwriting with nulls if partial update
             clean_data = {k: v for k, v in data.items() if v is not None}
-            return self.user_repository.update_user_profile(user_id, clean_data)
+            result = await self.user_repository.update_user_profile(user_id, clean_data)
+            user_response_cache.invalidate(user_id, "profile")
+            return result
         except Exception as e:
-            print(f"Error updating user profile: {e}")
+            logger.error("Error updating user profile: %s", e)
             raise e
 
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from services.admission_service import (
+    AdmissionController, AdmissionLimits, FairScheduler, MemoryAdmissionBackend, SqliteAdmissionBackend,
+)
+from utils.exceptions import TooManyRequestsException
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, clock, tmp_path):
+    if request.param == "memory":
+        return MemoryAdmissionBackend(clock=clock)
+    return SqliteAdmissionBackend(str(tmp_path / "admission.sqlite3"), clock=clock)
+
+
+async def test_bucket_refills_at_its_rate(backend, clock):
+    bucket = [("user:message:user-1", 1.0, 2.0)]
+    assert await backend.take(bucket, 1) == 0
+    assert await backend.take(bucket, 1) == 0
+    assert await backend.take(bucket, 1) == pytest.approx(1.0)
+
+    clock.advance(0.5)
+    assert await backend.take(bucket, 1) == pytest.approx(0.5)
+
+    clock.advance(0.5)
+    assert await backend.take(bucket, 1) == 0
+
+
+async def test_take_is_all_or_nothing(backend):
+    user, shared = ("user:message:user-1", 1.0, 5.0), ("global", 1.0, 1.0)
+    assert await backend.take([user, shared], 1) == 0
+    assert await backend.take([user, shared], 1) > 0
+    # The rejected call took nothing from the user's bucket
+    for _ in range(4):
+        assert await backend.take([user], 1) == 0
+
+
+async def test_sqlite_slot_lease_expires(clock, tmp_path):
+    # Memory slots live as long as the process holding them; shared ones must outlive a crashed worker
+    backend = SqliteAdmissionBackend(str(tmp_path / "admission.sqlite3"), clock=clock)
+    slot_id = await backend.acquire_slot("user-1", limit=1, lease=10)
+    assert slot_id is not None
+    assert await backend.acquire_slot("user-1", limit=1, lease=10) is None
+
+    clock.advance(11)
+    assert await backend.acquire_slot("user-1", limit=1, lease=10) is not None
+
+
+async def test_released_slot_can_be_taken_again(backend):
+    slot_id = await backend.acquire_slot("user-1", limit=1, lease=10)
+    await backend.release_slot("user-1", slot_id)
+    assert await backend.acquire_slot("user-1", limit=1, lease=10) is not None
+
+
+async def test_scheduler_serves_waiting_users_round_robin():
+    scheduler = FairScheduler(capacity=1)
+    await scheduler.acquire("holder", timeout=1)
+
+    order = []
+
+    async def wait(user_id: str):
+        await scheduler.acquire(user_id, timeout=1)
+        order.append(user_id)
+
+    # user-a queues three requests before user-b queues one
+    tasks = [asyncio.create_task(wait(user_id)) for user_id in ("user-a", "user-a", "user-a", "user-b")]
+    await asyncio.sleep(0)
+
+    for _ in tasks:
+        scheduler.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    assert order == ["user-a", "user-b", "user-a", "user-a"]
+    assert scheduler.active == 1
+
+
+async def test_scheduler_timeout_gives_up_its_place():
+    scheduler = FairScheduler(capacity=1)
+    await scheduler.acquire("holder", timeout=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.acquire("user-1", timeout=0.01)
+
+    scheduler.release()
+    assert scheduler.active == 0
+
+
+def make_controller(clock, **limits) -> AdmissionController:
+    return AdmissionController(MemoryAdmissionBackend(clock=clock), max_concurrency=1, default_limits=AdmissionLimits(**limits))
+
+
+async def test_rate_limit_sets_retry_after(clock):
+    controller = make_controller(clock, user_rate_per_minute=6, user_burst=1)
+    await controller.check_rate("user-1", "message", "text")
+
+    with pytest.raises(TooManyRequestsException) as error:
+        await controller.check_rate("user-1", "message", "text")
+    assert error.value.headers == {"Retry-After": "10"}
+
+    clock.advance(10)
+    await controller.check_rate("user-1", "message", "text")
+
+
+async def test_in_flight_cap_rejects_before_spending_rate(clock):
+    controller = make_controller(clock, max_in_flight=1, user_burst=2, in_flight_retry_after=7)
+    ticket = await controller.reserve("user-1", "message", "text")
+
+    with pytest.raises(TooManyRequestsException) as error:
+        await controller.reserve("user-1", "message", "text")
+    assert error.value.headers == {"Retry-After": "7"}
+
+    await ticket.release()
+    # Only the first reservation took a token, so the second one still fits in the burst
+    await (await controller.reserve("user-1", "message", "text")).release()
+
+
+async def test_queue_timeout_is_rejected_with_429(clock):
+    controller = make_controller(clock, queue_timeout=0.01)
+    first = await controller.admit("user-1", "message", "text")
+
+    with pytest.raises(TooManyRequestsException):
+        await controller.admit("user-2", "message", "text")
+
+    await first.release()
+    # The rejected request released its slot and left no waiter behind
+    second = await controller.admit("user-2", "message", "text")
+    await second.release()
+    assert controller.scheduler.active == 0
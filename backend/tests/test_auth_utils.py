@@ -0,0 +1,105 @@
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import utils.auth_utils as auth
+from schemas.user_schema import AuthenticatedUser
+
+SECRET = "test-jwt-secret-with-enough-bytes-for-hs256"
+
+
+def make_token(key=SECRET, algorithm: str = "HS256", expires_in: float = 300, headers: dict | None = None, **claims) -> str:
+    payload = {"sub": "user-1", "email": "ana@example.com", "role": "authenticated", "aud": "authenticated", "exp": int(time.time() + expires_in), **claims}
+    return jwt.encode(payload, key, algorithm=algorithm, headers=headers)
+
+
+def credentials(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+class FakeSupabaseAuth:
+    def __init__(self, user=None):
+        self.user = user
+        self.calls = 0
+
+    async def get_user(self, token: str):
+        self.calls += 1
+        return SimpleNamespace(user=self.user)
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    remote = FakeSupabaseAuth(SimpleNamespace(id="user-1", email="ana@example.com", role="authenticated"))
+    client = SimpleNamespace(get_client=lambda: SimpleNamespace(auth=remote))
+    monkeypatch.setattr(auth, "AsyncSupabaseClient", lambda: client)
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "AUTH_REMOTE_FALLBACK", True)
+    auth.remote_user_cache.clear()
+    auth.signing_key_cache.clear()
+    return remote
+
+
+async def test_hs256_token_is_verified_in_process(remote):
+    user = await auth.get_current_user(credentials(make_token()))
+
+    assert user == AuthenticatedUser(id="user-1", email="ana@example.com", role="authenticated")
+    assert remote.calls == 0
+
+
+async def test_expired_token_is_rejected_without_a_remote_call(remote):
+    with pytest.raises(HTTPException) as error:
+        await auth.get_current_user(credentials(make_token(expires_in=-60)))
+    assert error.value.status_code == 401
+    assert remote.calls == 0
+
+
+async def test_unverifiable_token_falls_back_to_supabase_and_is_cached(remote):
+    token = make_token(key="some-other-project-secret-with-enough-bytes")
+
+    first = await auth.get_current_user(credentials(token))
+    second = await auth.get_current_user(credentials(token))
+
+    assert first == second == AuthenticatedUser(id="user-1", email="ana@example.com", role="authenticated")
+    assert remote.calls == 1
+
+
+async def test_without_fallback_an_unverifiable_token_is_a_401(remote, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_REMOTE_FALLBACK", False)
+
+    with pytest.raises(HTTPException) as error:
+        await auth.get_current_user(credentials(make_token(key="some-other-project-secret-with-enough-bytes")))
+    assert error.value.status_code == 401
+    assert remote.calls == 0
+
+
+async def test_wrong_audience_is_never_accepted_locally(remote):
+    remote.user = None
+
+    with pytest.raises(HTTPException) as error:
+        await auth.get_current_user(credentials(make_token(aud="service_role")))
+    assert error.value.status_code == 401
+    assert remote.calls == 1
+
+
+async def test_rs256_keys_are_fetched_once_per_kid(remote, monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    fetches = []
+
+    class FakeJWKSClient:
+        def get_signing_key_from_jwt(self, token):
+            fetches.append(jwt.get_unverified_header(token)["kid"])
+            return SimpleNamespace(key=private_key.public_key())
+
+    monkeypatch.setattr(auth, "get_jwks_client", lambda: FakeJWKSClient())
+
+    for _ in range(3):
+        user = await auth.get_current_user(credentials(make_token(private_key, "RS256", headers={"kid": "key-1"})))
+        assert user.id == "user-1"
+
+    assert fetches == ["key-1"]
+    assert remote.calls == 0
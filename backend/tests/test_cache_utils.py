@@ -0,0 +1,29 @@
+from utils.cache_utils import UserResponseCache
+
+
+async def test_generations_are_bounded_and_never_reused_after_eviction():
+    cache = UserResponseCache(max_generations=2)
+    loads = []
+
+    async def loader():
+        loads.append(len(loads))
+        return {"version": len(loads)}, {}
+
+    first = await cache.get_or_load("user-1", "recipes", loader)
+    cache.generation("user-2", "recipes")
+    cache.generation("user-3", "recipes")
+
+    # user-1 was evicted; its response cached under the old generation must not be served again
+    assert len(cache._generations) == 2
+    second = await cache.get_or_load("user-1", "recipes", loader)
+    assert len(loads) == 2
+    assert second.etag != first.etag
+
+
+async def test_invalidate_moves_to_a_new_generation():
+    cache = UserResponseCache()
+    generation = cache.generation("user-1", "recipes")
+    assert cache.generation("user-1", "recipes") == generation
+
+    cache.invalidate("user-1", "recipes")
+    assert cache.generation("user-1", "recipes") > generation
@@ -0,0 +1,62 @@
+import pytest
+
+from utils.canonicalization_utils import IngredientCanonicalizer, edit_distance, is_typo_of
+
+
+@pytest.fixture(scope="module")
+def canonicalizer():
+    canonicalizer = IngredientCanonicalizer()
+    canonicalizer.load()
+    return canonicalizer
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Tomates", "tomate"),
+    ("jitomate", "tomate"),
+    ("tomate cherry", "tomate"),
+    ("200 g de tomates maduros", "tomate"),
+    ("Champiñones", "champiñón"),
+    ("papa", "patata"),
+])
+def test_exact_and_synonym_hits_are_canonicalized(canonicalizer, name, expected):
+    assert canonicalizer.canonicalize(name) == expected
+
+
+@pytest.mark.parametrize("name, neighbour", [
+    ("pechuga", "lechuga"),
+    ("pechugas", "lechuga"),
+    ("bollo", "pollo"),
+    ("cocino", "comino"),
+])
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_different_ingredients_one_edit_apart_are_never_merged(canonicalizer, name, neighbour, fuzzy):
+    assert canonicalizer.canonicalize(name, fuzzy) == name
+    assert canonicalizer.canonicalize(name, fuzzy) != neighbour
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("cebola", "cebolla"),
+    ("zanahori", "zanahoria"),
+    ("berengena", "berenjena"),
+])
+def test_fuzzy_lookups_correct_typos(canonicalizer, name, expected):
+    assert canonicalizer.canonicalize(name, fuzzy=True) == expected
+
+
+def test_stored_names_never_come_from_a_fuzzy_match(canonicalizer):
+    assert canonicalizer.canonicalize("cebola") == "cebola"
+    assert canonicalizer.canonicalize_many("cebola, Tomates, pechuga") == ["cebola", "tomate", "pechuga"]
+
+
+def test_exclusions_are_kept_apart(canonicalizer):
+    assert canonicalizer.canonicalize("sin huevo") == "sin huevo"
+    assert canonicalizer.canonicalize_many("arroz, sin huevo") == ["arroz"]
+    assert canonicalizer.exclusions("arroz, Sin huevo") == ["sin huevo"]
+
+
+def test_typos_keep_the_first_letter_and_short_words_never_substitute():
+    assert edit_distance("pechuga", "lechuga") == 1
+    assert not is_typo_of("pechuga", "lechuga")
+    assert not is_typo_of("cocino", "comino")
+    assert is_typo_of("cebola", "cebolla")
+    assert is_typo_of("berengena", "berenjena")
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import services.job_service as job_module
+from repositories.job_repository import MemoryJobRepository, SqliteJobRepository
+from schemas.ai_schema import GenerationResponse, Job, McpMetadata
+from services.admission_service import AdmissionController, AdmissionLimits, MemoryAdmissionBackend
+from services.job_service import JobService
+from utils.exceptions import TooManyRequestsException
+
+CONTENT = McpMetadata(type="quick-recipe", tool="text", content="arroz, huevo")
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, content, user_id):
+        self.calls.append(user_id)
+        return GenerationResponse(status="success", id=len(self.calls), title="Arroz con huevo")
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    orchestrator = FakeOrchestrator()
+    monkeypatch.setattr(job_module, "orchestrate_message", orchestrator)
+    monkeypatch.setattr(job_module, "JOB_SLOT_RETRY_SECONDS", 0.01)
+    return orchestrator
+
+
+def make_admission(max_in_flight: int = 2) -> AdmissionController:
+    return AdmissionController(MemoryAdmissionBackend(), max_concurrency=4, default_limits=AdmissionLimits(max_in_flight=max_in_flight))
+
+
+def make_job(job_id: str, status: str) -> Job:
+    now = datetime.now(timezone.utc)
+    return Job(id=job_id, user_id="user-1", status=status, payload=CONTENT, created_at=now, updated_at=now)
+
+
+async def wait_for_status(service: JobService, job_id: str, status: str):
+    for _ in range(200):
+        if (await service.repository.get(job_id)).status == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+async def test_full_queue_is_rejected_with_429(orchestrator):
+    service = JobService(MemoryJobRepository(), workers=1, max_queue_size=1, admission=make_admission())
+    await service.enqueue(CONTENT, "user-1")
+
+    with pytest.raises(TooManyRequestsException) as error:
+        await service.enqueue(CONTENT, "user-1")
+    assert error.value.status_code == 429
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_restart_requeues_queued_jobs_and_fails_interrupted_ones(orchestrator, tmp_path, backend):
+    repository = MemoryJobRepository() if backend == "memory" else SqliteJobRepository(str(tmp_path / "jobs.sqlite3"))
+    await repository.create(make_job("queued-job", "queued"))
+    await repository.create(make_job("running-job", "running"))
+
+    service = JobService(repository, workers=1, admission=make_admission())
+    await service.start()
+    try:
+        await wait_for_status(service, "queued-job", "done")
+    finally:
+        await service.stop()
+
+    interrupted = await repository.get("running-job")
+    assert interrupted.status == "failed"
+    assert orchestrator.calls == ["user-1"]
+
+
+async def test_jobs_respect_the_per_user_in_flight_cap(orchestrator):
+    admission = make_admission(max_in_flight=1)
+    service = JobService(MemoryJobRepository(), workers=2, admission=admission)
+    await service.start()
+    try:
+        # An interactive request holds the user's only slot
+        ticket = await admission.admit("user-1", "message", "text")
+        job = await service.enqueue(CONTENT, "user-1")
+        await asyncio.sleep(0.05)
+        assert orchestrator.calls == []
+        assert (await service.repository.get(job.id)).status == "queued"
+
+        await ticket.release()
+        await wait_for_status(service, job.id, "done")
+    finally:
+        await service.stop()
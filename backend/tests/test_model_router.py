@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from prometheus_client import REGISTRY
+
+import ai.model_router as router_module
+from ai.model_router import ModelRouter
+
+CONFIG = {
+    "prices": {
+        "gpt-4o": {"input_cost_per_million": 2.5, "output_cost_per_million": 10.0},
+        "dall-e-3": {"cost_per_call": 0.04},
+    },
+    "tiers": {
+        "strong": {"model_env": "TEST_STRONG_MODEL"},
+        "image": {"model_env": "TEST_IMAGE_MODEL"},
+    },
+    "stages": {
+        "design_recipe": {"default": "strong"},
+        "generate_recipe_image": {"default": "image"},
+    },
+}
+
+
+class Usage:
+    input_tokens = 1_000
+    output_tokens = 500
+
+
+@pytest.fixture
+def make_router(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEST_STRONG_MODEL", "gpt-4o-2024-08-06")
+    monkeypatch.setenv("TEST_IMAGE_MODEL", "dall-e-3")
+
+    def make_router(config=CONFIG) -> ModelRouter:
+        path = tmp_path / "model_routing.json"
+        path.write_text(json.dumps(config), encoding="utf-8")
+        router = ModelRouter(path)
+        router.load()
+        return router
+
+    return make_router
+
+
+def cost(stage: str, tier: str) -> float:
+    return REGISTRY.get_sample_value("frigochef_model_route_cost_usd_total", {"stage": stage, "tier": tier}) or 0
+
+
+def test_routed_tiers_are_priced_by_their_model(make_router):
+    router = make_router()
+    before = cost("design_recipe", "strong")
+
+    router.observe(router.route("design_recipe"), 1.0, usage=Usage())
+
+    # The dated snapshot is billed like gpt-4o
+    assert cost("design_recipe", "strong") - before == pytest.approx(1_000 * 2.5 / 1e6 + 500 * 10.0 / 1e6)
+
+
+def test_per_call_price_counts_every_call(make_router):
+    router = make_router()
+    before = cost("generate_recipe_image", "image")
+
+    router.observe(router.route("generate_recipe_image"), 1.0, calls=2)
+
+    assert cost("generate_recipe_image", "image") - before == pytest.approx(0.08)
+
+
+def test_unpriced_model_refuses_to_load(make_router, monkeypatch):
+    monkeypatch.setenv("TEST_IMAGE_MODEL", "gpt-image-2")
+
+    with pytest.raises(ValueError, match="gpt-image-2"):
+        make_router()
+
+
+def test_prices_from_the_environment_cover_other_models(make_router, monkeypatch):
+    monkeypatch.setenv("TEST_IMAGE_MODEL", "my-image-proxy")
+    monkeypatch.setattr(router_module, "MODEL_ROUTING_PRICES", json.dumps({"my-image-proxy": {"cost_per_call": 0.01}}))
+
+    router = make_router()
+    assert router.route("generate_recipe_image").model == "my-image-proxy"
+
+
+def test_disabled_tiers_need_no_price(make_router, monkeypatch):
+    monkeypatch.delenv("TEST_IMAGE_MODEL")
+    make_router({**CONFIG, "prices": {"gpt-4o": CONFIG["prices"]["gpt-4o"]}})
+
+
+def test_shipped_config_has_no_missing_prices():
+    config = json.loads(router_module.DEFAULT_CONFIG_PATH.read_text(encoding="utf-8"))
+    for model, price in config["prices"].items():
+        assert price and all(value is not None for value in price.values()), model
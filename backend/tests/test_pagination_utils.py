@@ -0,0 +1,93 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from repositories.recipe_repository import RecipeRepository
+from schemas.recipe_schema import RecipeSummary
+from services.recipe_service import RecipeService
+from utils.exceptions import BadRequestException
+from utils.pagination_utils import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2026, 1, 1, tzinfo=timezone.utc),
+    datetime(2026, 3, 14, 15, 9, 26, 535897, tzinfo=timezone(timedelta(hours=-5))),
+])
+def test_cursor_round_trip(created_at):
+    cursor = encode_cursor(created_at, 42)
+
+    assert decode_cursor(cursor) == (created_at, 42)
+    # Safe to put in a query string as is
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    base64.urlsafe_b64encode(b"2026-01-01T00:00:00+00:00").decode(),
+    base64.urlsafe_b64encode(b"yesterday|42").decode(),
+    base64.urlsafe_b64encode(b"2026-01-01T00:00:00+00:00|abc").decode(),
+    base64.urlsafe_b64encode("\xff".encode("latin-1")).decode(),
+])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(BadRequestException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+
+class RecordingClient:
+    def __init__(self):
+        self.query = RecordingQuery()
+
+    def get_client(self):
+        return self
+
+    def from_(self, table: str):
+        return self.query
+
+
+def test_keyset_filter_continues_after_the_cursor_row():
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    client = RecordingClient()
+
+    RecipeRepository(client)._user_recipes_query("*", "user-1", limit=21, cursor=decode_cursor(encode_cursor(created_at, 42)))
+
+    calls = client.query.calls
+    assert ("eq", ("user_id", "user-1"), {}) in calls
+    assert ("or_", ('created_at.lt."2026-01-01T00:00:00+00:00",and(created_at.eq."2026-01-01T00:00:00+00:00",id.lt.42)',), {}) in calls
+    assert [call for call in calls if call[0] == "order"] == [("order", ("created_at",), {"desc": True}), ("order", ("id",), {"desc": True})]
+    assert ("limit", (21,), {}) in calls
+
+
+class SummaryRepository:
+    def __init__(self, count: int):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.summaries = [RecipeSummary(id=recipe_id, title=f"Receta {recipe_id}", created_at=start + timedelta(minutes=recipe_id)) for recipe_id in range(count, 0, -1)]
+
+    async def get_recipe_summaries_by_user_id(self, user_id, limit, cursor=None):
+        rows = [summary for summary in self.summaries if cursor is None or (summary.created_at, summary.id) < cursor]
+        return rows[:limit]
+
+
+async def test_pages_chain_through_the_cursor_until_the_last_one():
+    service = RecipeService(SummaryRepository(5))
+
+    seen, cursor = [], None
+    for _ in range(3):
+        page, cursor = await service.get_recipes_page("user-1", 2, cursor, view="summary")
+        seen.extend(summary.id for summary in page)
+
+    assert seen == [5, 4, 3, 2, 1]
+    assert cursor is None
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from utils.pantry_utils import PantryMatcher, canonical_ingredient
+
+
+@pytest.fixture
+def matcher():
+    return PantryMatcher([
+        ("tortilla", ["Huevos", "patata", "cebolla", "aceite", "sal"]),
+        ("ensalada", ["tomate cherry", "lechuga", "pepino", "aceite"]),
+        ("pisto", ["tomate", "pimiento rojo", "calabacín", "cebolla", "berenjena"]),
+        ("pollo", ["pechuga", "limón", "ajo"]),
+    ])
+
+
+def test_staples_are_never_required(matcher):
+    assert matcher.required.tolist() == [3, 3, 5, 3]
+
+
+def test_recipes_are_ranked_by_fewest_missing_then_coverage(matcher):
+    results = matcher.match(["huevo", "patatas", "cebolla", "tomate", "lechuga"], limit=10, max_missing=2)
+
+    assert [(key, round(coverage, 2)) for key, coverage, _, _ in results] == [("tortilla", 1.0), ("ensalada", 0.67)]
+    _, _, matched, missing = results[1]
+    assert matched == ["tomate cherry", "lechuga"]
+    assert missing == ["pepino"]
+
+
+def test_max_missing_and_limit_filter_results(matcher):
+    pantry = ["huevo", "patata", "cebolla", "tomate", "lechuga"]
+    assert [key for key, *_ in matcher.match(pantry, max_missing=0)] == ["tortilla"]
+    assert len(matcher.match(pantry, limit=1, max_missing=5)) == 1
+
+
+def test_synonyms_and_specific_names_cover_each_other(matcher):
+    # "jitomate" is tomate; "pimiento" covers "pimiento rojo"
+    results = {key: missing for key, _, _, missing in matcher.match(["jitomate", "pimiento", "calabacin", "cebolla"], max_missing=1)}
+    assert results["pisto"] == ["berenjena"]
+
+
+def test_exclusions_never_count_as_owned(matcher):
+    assert matcher.match(["sin huevo", "patata", "cebolla"], max_missing=0) == []
+
+
+def test_pantry_typos_are_corrected_but_different_ingredients_are_not(matcher):
+    assert [key for key, *_ in matcher.match(["cebola", "patata", "huevo"], max_missing=0)] == ["tortilla"]
+    # lechuga is one letter away from pechuga, but never the same ingredient
+    assert matcher.match(["lechuga", "limon", "ajo"], max_missing=0) == []
+
+
+def test_recipes_without_any_match_are_left_out(matcher):
+    assert matcher.match(["chocolate"], max_missing=10) == []
+    assert PantryMatcher([]).match(["huevo"]) == []
+
+
+def test_bitsets_are_packed_over_the_vocabulary(matcher):
+    assert matcher.matrix.dtype == np.uint8
+    assert matcher.matrix.shape == (4, (len(matcher.vocabulary) + 7) // 8)
+    assert canonical_ingredient("Tomates cherry") == canonical_ingredient("jitomate")
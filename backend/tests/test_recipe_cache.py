@@ -0,0 +1,44 @@
+import pytest
+
+from ai.recipe_cache import RecipeCache, MemoryRecipeCacheBackend
+from prometheus_client import REGISTRY
+
+
+@pytest.fixture
+def cache():
+    return RecipeCache(MemoryRecipeCacheBackend(), variants_per_key=1)
+
+
+@pytest.mark.parametrize("first, second", [
+    (["pechuga", "arroz"], ["lechuga", "arroz"]),
+    (["bollo", "leche"], ["pollo", "leche"]),
+    (["cocino", "arroz"], ["comino", "arroz"]),
+    (["cebola", "arroz"], ["cebolla", "arroz"]),
+])
+def test_near_spellings_get_distinct_keys(cache, first, second):
+    assert cache.build_key(first) != cache.build_key(second)
+
+
+def test_synonyms_order_and_plurals_share_a_key(cache):
+    assert cache.build_key("Tomates, arroz") == cache.build_key(["arroz", "jitomate"])
+
+
+def test_exclusions_and_preferences_change_the_key(cache):
+    assert cache.build_key("arroz, sin huevo") != cache.build_key("arroz, huevo")
+    assert cache.build_key("arroz, sin huevo") != cache.build_key("arroz")
+    assert cache.build_key("arroz", {"diet_type": ["vegana"]}) != cache.build_key("arroz")
+
+
+def lookup_count(result: str) -> float:
+    return REGISTRY.get_sample_value("frigochef_recipe_cache_lookups_total", {"result": result}) or 0.0
+
+
+def test_lookups_are_counted_in_prometheus(cache):
+    before = lookup_count("hit"), lookup_count("miss")
+
+    key = cache.build_key("arroz")
+    assert cache.lookup(key) is None
+    cache.store(key, {"recipe_id": 1, "message": None})
+    assert cache.lookup(key) == {"recipe_id": 1, "message": None}
+
+    assert (lookup_count("hit"), lookup_count("miss")) == (before[0] + 1, before[1] + 1)
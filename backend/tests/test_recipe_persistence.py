@@ -0,0 +1,18 @@
+import os
+import asyncio
+
+import pytest
+
+from benchmarks.recipe_persistence_check import is_available, run_checks
+
+# Started with: docker compose -f docker/docker-compose.db.yml up -d
+POSTGREST_URL = os.getenv("PERSISTENCE_CHECK_URL", "http://localhost:54321")
+
+pytestmark = pytest.mark.skipif(
+    not asyncio.run(is_available(POSTGREST_URL)),
+    reason=f"Postgres/PostgREST stand-in not reachable at {POSTGREST_URL}",
+)
+
+
+async def test_recipe_persistence_is_atomic():
+    await run_checks(POSTGREST_URL)
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from repositories.recipe_repository import RecipeRepository, RECIPE_ID_CHUNK_SIZE
+from services.recipe_service import RecipeService
+
+
+class FakeQuery:
+    def __init__(self, client, table: str):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.in_sizes = []
+        self.row_limit = None
+
+    def select(self, columns: str):
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column: str, values: list):
+        values = set(values)
+        self.in_sizes.append(len(values))
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        return self
+
+    def limit(self, row_limit: int):
+        self.row_limit = row_limit
+        return self
+
+    async def execute(self):
+        self.client.queries.append(self)
+        rows = [row for row in self.client.tables[self.table] if all(match(row) for match in self.filters)]
+        return SimpleNamespace(data=rows[:self.row_limit] if self.row_limit else rows)
+
+
+class CountingPostgrestClient:
+    """Just enough of the PostgREST query builder to count round trips per request."""
+
+    def __init__(self, tables: dict[str, list[dict]]):
+        self.tables = tables
+        self.queries = []
+
+    def from_(self, table: str) -> FakeQuery:
+        return FakeQuery(self, table)
+
+    table = from_
+
+    def get_client(self):
+        return self
+
+
+def seed(recipe_count: int) -> dict[str, list[dict]]:
+    recipes = [
+        {
+            "id": recipe_id,
+            "user_id": "user-1",
+            "title": f"Receta {recipe_id}",
+            "recipe_metadata": {"tags": ["rapida"], "calorias": 400},
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "source_type": "text",
+            "source_data": "tomate, arroz",
+        }
+        for recipe_id in range(1, recipe_count + 1)
+    ]
+    return {
+        "recipes": recipes,
+        "recipe_ingredients": [
+            {"recipe_id": recipe["id"], "name": name, "quantity": "1", "unit": "u"}
+            for recipe in recipes for name in ("tomate", "arroz")
+        ],
+        "recipe_steps": [
+            {"id": recipe["id"], "recipe_id": recipe["id"], "instructions": [{"instruction": "Cocinar", "step_number": 1}]}
+            for recipe in recipes
+        ],
+        "recipe_images": [
+            {"id": recipe["id"], "recipe_id": recipe["id"], "image_url": f"https://cdn.example.com/{recipe['id']}.png"}
+            for recipe in recipes
+        ],
+    }
+
+
+@pytest.mark.parametrize("recipe_count", [1, 50])
+async def test_full_history_uses_one_query_per_table(recipe_count):
+    client = CountingPostgrestClient(seed(recipe_count))
+
+    recipes = await RecipeService(RecipeRepository(client)).get_recipes_by_user("user-1")
+
+    # One for the recipes, then one per child table however many recipes there are
+    assert len(client.queries) == 1 + 3
+    assert [query.table for query in client.queries[1:]].count("recipe_ingredients") == 1
+    assert len(recipes) == recipe_count
+    assert all(len(recipe.ingredients) == 2 and len(recipe.steps) == 1 and recipe.image for recipe in recipes)
+
+
+async def test_long_histories_are_chunked():
+    recipe_count = RECIPE_ID_CHUNK_SIZE * 2 + 1
+    client = CountingPostgrestClient(seed(recipe_count))
+
+    recipes = await RecipeService(RecipeRepository(client)).get_recipes_by_user("user-1")
+
+    assert len(client.queries) == 1 + 3 * 3
+    assert max(size for query in client.queries for size in query.in_sizes) <= RECIPE_ID_CHUNK_SIZE
+    assert len(recipes) == recipe_count
+    assert all(len(recipe.ingredients) == 2 for recipe in recipes)
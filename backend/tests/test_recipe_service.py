@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from schemas.recipe_schema import Recipe, RecipeInsert
+from services.recipe_service import RecipeService
+from utils.cache_utils import user_response_cache
+
+INSERT = {"title": "Arroz con huevo", "recipe_metadata": None, "source_type": "text", "source_data": "arroz, huevo"}
+RECIPE = {**INSERT, "id": 1, "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc)}
+
+
+class FakeRepository:
+    def __init__(self, saved: bool = True):
+        self.saved = saved
+
+    def recipe(self, user_id: str) -> Recipe | None:
+        return Recipe.model_validate({**RECIPE, "user_id": user_id}) if self.saved else None
+
+    async def insert_recipe(self, recipe: RecipeInsert) -> Recipe | None:
+        return self.recipe(recipe.user_id)
+
+    async def copy_recipe_to_user(self, recipe_id, user_id, source_type, source_data) -> Recipe | None:
+        return self.recipe(user_id)
+
+    async def delete_by_id(self, recipe_id, user_id) -> bool:
+        return self.saved
+
+
+async def test_every_write_path_drops_the_users_cached_recipes():
+    service = RecipeService(FakeRepository())
+    writes = [
+        lambda: service.insert_recipe(RecipeInsert.model_validate({**INSERT, "user_id": "user-1"})),
+        lambda: service.copy_recipe_to_user(7, "user-1", "text", "arroz, huevo"),
+        lambda: service.delete_recipe_by_id(1, "user-1"),
+    ]
+
+    for write in writes:
+        generation = user_response_cache.generation("user-1", "recipes")
+        await write()
+        assert user_response_cache.generation("user-1", "recipes") > generation
+
+
+async def test_failed_writes_keep_the_cached_recipes():
+    service = RecipeService(FakeRepository(saved=False))
+    generation = user_response_cache.generation("user-2", "recipes")
+
+    await service.insert_recipe(RecipeInsert.model_validate({**INSERT, "user_id": "user-2"}))
+    await service.copy_recipe_to_user(7, "user-2", "text", "arroz, huevo")
+    await service.delete_recipe_by_id(1, "user-2")
+
+    assert user_response_cache.generation("user-2", "recipes") == generation
@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+from postgrest.exceptions import APIError as PostgrestAPIError
+
+import utils.resilience_utils as resilience
+from utils.exceptions import ServiceUnavailableException
+from utils.resilience_utils import CallPolicy, CircuitBreaker, DeadlineExceeded, deadline, remaining_budget, resilient_call
+
+FAST_RETRIES = CallPolicy(timeout=1, retries=2, backoff_base=0.001, backoff_max=0.002)
+
+
+class FakeCall:
+    """Fails with the given errors in order, then answers; optionally slow on every call."""
+
+    def __init__(self, *errors: BaseException, delay: float = 0, result="ok"):
+        self.errors = list(errors)
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+def postgrest_error(code: str) -> PostgrestAPIError:
+    return PostgrestAPIError({"code": code, "message": "error", "hint": None, "details": None})
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    monkeypatch.setitem(resilience._breakers, "test", breaker)
+    return breaker
+
+
+async def test_retryable_errors_are_retried_with_full_jitter(breaker, monkeypatch):
+    ceilings = []
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: ceilings.append((low, high)) or 0)
+    breaker.failure_threshold = 5
+    call = FakeCall(postgrest_error("40001"), postgrest_error("57014"))
+
+    assert await resilient_call("test", "read", call, FAST_RETRIES) == "ok"
+    assert call.calls == 3
+    # Each delay is drawn from [0, min(max, base * 2^attempt)]
+    assert ceilings == [(0, 0.001), (0, 0.002)]
+
+
+async def test_non_retryable_postgrest_error_is_not_retried(breaker):
+    call = FakeCall(postgrest_error("23505"))
+
+    with pytest.raises(PostgrestAPIError):
+        await resilient_call("test", "insert", call, FAST_RETRIES)
+    assert call.calls == 1
+    # A client error says nothing about the upstream's health
+    assert breaker.failures == 0
+
+
+async def test_retries_stop_after_the_policy_limit(breaker):
+    call = FakeCall(*[postgrest_error("40001")] * 5)
+
+    with pytest.raises(PostgrestAPIError):
+        await resilient_call("test", "read", call, CallPolicy(timeout=1, retries=1, backoff_base=0.001))
+    assert call.calls == 2
+
+
+async def test_breaker_opens_rejects_with_503_and_closes_after_a_probe(breaker):
+    failing = CallPolicy(timeout=1)
+    for _ in range(2):
+        with pytest.raises(PostgrestAPIError):
+            await resilient_call("test", "read", FakeCall(postgrest_error("57014")), failing)
+    assert breaker.state == "open"
+
+    call = FakeCall()
+    with pytest.raises(ServiceUnavailableException) as error:
+        await resilient_call("test", "read", call, failing)
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
+    assert call.calls == 0
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert await resilient_call("test", "read", call, failing) == "ok"
+    assert breaker.state == "closed"
+
+
+async def test_failed_probe_reopens_the_breaker(breaker):
+    breaker.record_failure("read", probe=False)
+    breaker.record_failure("read", probe=False)
+    await asyncio.sleep(0.06)
+
+    with pytest.raises(PostgrestAPIError):
+        await resilient_call("test", "read", FakeCall(postgrest_error("57014")), CallPolicy(timeout=1))
+    assert breaker.state == "open"
+
+
+async def test_half_open_breaker_lets_a_single_probe_through(breaker):
+    breaker.record_failure("read", probe=False)
+    breaker.record_failure("read", probe=False)
+    await asyncio.sleep(0.06)
+
+    slow = FakeCall(delay=0.05)
+    probe = asyncio.create_task(resilient_call("test", "read", slow, CallPolicy(timeout=1)))
+    await asyncio.sleep(0.01)
+    with pytest.raises(ServiceUnavailableException):
+        await resilient_call("test", "read", FakeCall(), CallPolicy(timeout=1))
+
+    assert await probe == "ok"
+    assert breaker.state == "closed"
+
+
+async def test_hedge_answers_with_the_faster_request(breaker):
+    delays = [0.5, 0.01]
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert await resilient_call("test", "read", call, CallPolicy(timeout=1, hedge_after=0.02)) == 0.01
+
+
+async def test_hedge_cancels_the_slower_request(breaker):
+    started, cancelled = [], []
+
+    async def call():
+        index = len(started)
+        started.append(index)
+        try:
+            await asyncio.sleep(0.5 if index == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+
+    assert await resilient_call("test", "read", call, CallPolicy(timeout=1, hedge_after=0.02)) == 1
+    await asyncio.sleep(0)
+    assert cancelled == [0]
+
+
+async def test_fast_answer_never_hedges(breaker):
+    call = FakeCall(delay=0.001)
+    assert await resilient_call("test", "read", call, CallPolicy(timeout=1, hedge_after=0.2)) == "ok"
+    assert call.calls == 1
+
+
+async def test_deadline_caps_the_attempt_timeout(breaker):
+    call = FakeCall(delay=0.5)
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded) as error:
+            await resilient_call("test", "read", call, FAST_RETRIES)
+    assert error.value.status_code == 504
+    # Our own budget ran out, which is not the upstream's fault and is never retried
+    assert call.calls == 1
+    assert breaker.failures == 0
+
+
+async def test_exhausted_deadline_skips_the_call(breaker):
+    call = FakeCall()
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            await resilient_call("test", "read", call, FAST_RETRIES)
+    assert call.calls == 0
+
+
+def test_nested_deadlines_only_shorten_the_budget():
+    assert remaining_budget() is None
+    with deadline(10):
+        with deadline(60):
+            assert remaining_budget() <= 10
+        with deadline(1):
+            assert remaining_budget() <= 1
+    assert remaining_budget() is None
@@ -0,0 +1,77 @@
+import pytest
+
+from utils.search_utils import InvertedIndex, stem, tokenize
+
+
+@pytest.fixture
+def index():
+    index = InvertedIndex()
+    index.add(1, {"title": "Tortilla de patatas", "tags": "clasica", "ingredients": "huevo patata cebolla"}, payload=(0, "tortilla"))
+    index.add(2, {"title": "Ensalada de tomate", "tags": "rapida", "ingredients": "tomate cebolla aceite"}, payload=(1, "ensalada"))
+    index.add(3, {"title": "Pollo al horno", "tags": "cena", "ingredients": "pollo patata tomate"}, payload=(2, "pollo"))
+    return index
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("tomates", "tomat"),
+    ("tomate", "tomat"),
+    ("limones", "limon"),
+    ("limón", "limon"),
+    ("nueces", "nuez"),
+])
+def test_plurals_and_accents_fold_to_one_term(word, expected):
+    assert tokenize(word) == [expected]
+
+
+def test_stopwords_are_dropped():
+    assert tokenize("Pollo con patatas de la abuela") == ["pollo", stem("patatas"), "abuela"]
+
+
+def test_every_term_must_match(index):
+    results, total = index.search("patata tomate")
+    assert [document_id for document_id, _ in results] == [3]
+    assert total == 1
+
+
+def test_last_term_matches_as_a_prefix(index):
+    results, _ = index.search("ensal")
+    assert [document_id for document_id, _ in results] == [2]
+
+    # Only the last word may be incomplete
+    assert index.search("ensal tomate") == ([], 0)
+
+
+def test_title_hits_rank_above_ingredient_hits(index):
+    results, _ = index.search("patatas")
+    assert [document_id for document_id, _ in results] == [1, 3]
+
+
+def test_rarer_terms_weigh_more(index):
+    # Both are ingredients of the tortilla, but only the tortilla has huevo
+    huevo_scores = dict(index.search("huevo")[0])
+    cebolla_scores = dict(index.search("cebolla")[0])
+    assert huevo_scores[1] > cebolla_scores[1]
+
+
+def test_ties_keep_the_payload_order_and_pages_report_the_total(index):
+    results, total = index.search("cebolla", sort_key=lambda payload: payload[0])
+    assert [document_id for document_id, _ in results] == [1, 2]
+    assert total == 2
+
+    page, total = index.search("cebolla", limit=1, offset=1, sort_key=lambda payload: payload[0])
+    assert [document_id for document_id, _ in page] == [2]
+    assert total == 2
+
+
+def test_empty_queries_and_unknown_terms_return_nothing(index):
+    assert index.search("") == ([], 0)
+    assert index.search("de la") == ([], 0)
+    assert index.search("lentejas") == ([], 0)
+    assert InvertedIndex().search("pollo") == ([], 0)
+
+
+def test_new_documents_are_searchable_by_prefix(index):
+    index.search("pol")
+    index.add(4, {"title": "Polenta cremosa", "ingredients": "polenta leche"})
+    results, _ = index.search("pol")
+    assert {document_id for document_id, _ in results} == {3, 4}
@@ -0,0 +1,87 @@
+import pytest
+from starlette.requests import Request
+
+import utils.upload_utils as upload_module
+from utils.exceptions import BadRequestException, PayloadTooLargeException, UnsupportedMediaTypeException
+from utils.upload_utils import receive_upload
+
+BOUNDARY = "frigochef-boundary"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048
+
+
+def multipart_body(data: bytes, content_type: str = "image/png", field_name: str = "file", filename: str = "nevera.png") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\n'
+        f"huevos y tomate\r\n"
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class StreamedRequest:
+    """A Starlette request whose body arrives in chunks, counting how many were read."""
+
+    def __init__(self, body: bytes, chunk_size: int = 512, content_type: str = f"multipart/form-data; boundary={BOUNDARY}", content_length: int | None = None):
+        self.chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)]
+        self.read = 0
+        headers = [(b"content-type", content_type.encode())]
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        self.request = Request({"type": "http", "method": "POST", "path": "/ai/upload", "headers": headers}, self.receive)
+
+    async def receive(self):
+        chunk = self.chunks[self.read] if self.read < len(self.chunks) else b""
+        self.read += 1
+        return {"type": "http.request", "body": chunk, "more_body": self.read < len(self.chunks)}
+
+
+@pytest.fixture(autouse=True)
+def small_limits(monkeypatch):
+    monkeypatch.setitem(upload_module.UPLOAD_MAX_BYTES, "image", 4096)
+    monkeypatch.setattr(upload_module, "UPLOAD_SPOOL_MAX_MEMORY", 1024)
+
+
+async def test_file_field_is_spooled_with_its_metadata():
+    upload = await receive_upload(StreamedRequest(multipart_body(PNG)).request, "image")
+    try:
+        assert (upload.filename, upload.content_type, upload.size) == ("nevera.png", "image/png", len(PNG))
+        assert upload.file.read() == PNG
+        # Bigger than the in-memory threshold, so it rolled over to disk
+        assert upload.file._rolled
+    finally:
+        upload.file.close()
+
+
+async def test_body_over_the_limit_stops_streaming_with_413():
+    request = StreamedRequest(multipart_body(b"\x00" * 64 * 1024), chunk_size=1024)
+
+    with pytest.raises(PayloadTooLargeException) as error:
+        await receive_upload(request.request, "image")
+    assert error.value.status_code == 413
+    assert request.read < len(request.chunks)
+
+
+async def test_declared_length_over_the_limit_is_rejected_before_reading():
+    request = StreamedRequest(multipart_body(PNG), content_length=1024 * 1024)
+
+    with pytest.raises(PayloadTooLargeException):
+        await receive_upload(request.request, "image")
+    assert request.read == 0
+
+
+async def test_unexpected_content_type_is_a_415():
+    with pytest.raises(UnsupportedMediaTypeException) as error:
+        await receive_upload(StreamedRequest(multipart_body(PNG, content_type="application/pdf")).request, "image")
+    assert error.value.status_code == 415
+
+
+@pytest.mark.parametrize("request_factory, tool", [
+    (lambda: StreamedRequest(multipart_body(PNG), content_type="application/json"), "image"),
+    (lambda: StreamedRequest(multipart_body(PNG, field_name="photo")), "image"),
+    (lambda: StreamedRequest(multipart_body(PNG)), "video"),
+])
+async def test_malformed_uploads_are_a_400(request_factory, tool):
+    with pytest.raises(BadRequestException):
+        await receive_upload(request_factory().request, tool)
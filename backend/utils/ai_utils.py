@@ -1,23 +1,16 @@
 import os
 import base64
 import tempfile
-from pathlib import Path
 
+from ai.prompt_registry import prompt_registry
+from utils.logging_utils import get_logger
 
-def load_personal_data_file(file_name):
-    routes = os.getenv("AGENT_ROUTES")
-    if not routes:
-        raise EnvironmentError("AGENT_ROUTES environment variable is not set")
-
-    # Resuelve la ruta desde la raíz del proyecto
-    base_dir = Path(__file__).parent.parent  # Desde utils/ai_utils.py hacia la raíz del backend
-    path = base_dir / routes.lstrip('/') / f"{file_name}.md"
+logger = get_logger(__name__)
 
-    if not path.exists():
-        raise FileNotFoundError(f"Agent instructions file not found: {path}")   
 
-    with open(path, "r", encoding="utf-8") as file:
-        return file.read()
+def load_personal_data_file(file_name):
+    # Served from memory by the prompt registry, no disk I/O per call
+    return prompt_registry.get(file_name)
     
 def base64_to_temp_file(base64_string, suffix):
     decoded_data = base64.b64decode(base64_string)
@@ -30,4 +23,4 @@ def delete_temp_file(file_path):
     try:
         os.remove(file_path)
     except OSError as e:
-        print(f"Error deleting temporary file: {e}")
\ No newline at end of file
+        logger.warning("Error deleting temporary file: %s", e)
\ No newline at end of file
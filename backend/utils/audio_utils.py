@@ -1,10 +1,27 @@
+import io
 import os
+import wave
 import base64
+import shutil
 import tempfile
+import subprocess
+
+import numpy as np
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+TARGET_SAMPLE_RATE = int(os.getenv("AUDIO_TARGET_SAMPLE_RATE", "16000"))
+SILENCE_THRESHOLD_DB = float(os.getenv("AUDIO_SILENCE_THRESHOLD_DB", "-40"))
+MAX_CHUNK_SECONDS = float(os.getenv("AUDIO_MAX_CHUNK_SECONDS", "30"))
+MIN_SILENCE_MS = int(os.getenv("AUDIO_MIN_SILENCE_MS", "400"))
+COMPACT_CODEC = os.getenv("AUDIO_COMPACT_CODEC", "")
+FRAME_MS = 30
+
 
 def base64_to_audio_tempfile(base64_string, suffix=".wav"):
     audio_data = base64.b64decode(base64_string)
-    
+
     with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_audio:
         temp_audio.write(audio_data)
         temp_audio.flush()
@@ -14,4 +31,142 @@ def delete_temp_audio_file(file_path):
     try:
         os.remove(file_path)
     except OSError as e:
-        print(f"Error deleting temporary audio file: {e}")
\ No newline at end of file
+        logger.warning("Error deleting temporary audio file: %s", e)
+
+def decode_wav(data: bytes) -> tuple[np.ndarray, int]:
+    # PCM WAV -> mono float32 samples in [-1, 1]
+    with wave.open(io.BytesIO(data), "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)) << 8 >> 8).astype(np.float32) / 8388608
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+    return samples, sample_rate
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return output.getvalue()
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    if source_rate == target_rate or not len(samples):
+        return samples
+
+    if source_rate % target_rate == 0:
+        # Integer ratio (48k -> 16k): averaging each block doubles as the anti-aliasing filter
+        factor = source_rate // target_rate
+        usable = len(samples) - len(samples) % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1)
+
+    duration = len(samples) / source_rate
+    target_positions = np.arange(int(duration * target_rate)) / target_rate
+    return np.interp(target_positions, np.arange(len(samples)) / source_rate, samples).astype(np.float32)
+
+def frame_levels_db(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    frame_size = max(1, sample_rate * FRAME_MS // 1000)
+    usable = len(samples) - len(samples) % frame_size
+    if not usable:
+        return np.array([], dtype=np.float32)
+    rms = np.sqrt(np.mean(samples[:usable].reshape(-1, frame_size) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+def trim_silence(samples: np.ndarray, sample_rate: int, threshold_db: float = SILENCE_THRESHOLD_DB) -> np.ndarray:
+    levels = frame_levels_db(samples, sample_rate)
+    voiced = np.flatnonzero(levels > threshold_db)
+    if not len(voiced):
+        return samples[:0]
+
+    frame_size = max(1, sample_rate * FRAME_MS // 1000)
+    return samples[voiced[0] * frame_size:(voiced[-1] + 1) * frame_size]
+
+def split_on_silence(samples: np.ndarray, sample_rate: int, max_chunk_seconds: float = MAX_CHUNK_SECONDS, threshold_db: float = SILENCE_THRESHOLD_DB) -> list[np.ndarray]:
+    # Cut inside the last long enough pause before each max_chunk_seconds boundary so no word is split
+    max_chunk = int(max_chunk_seconds * sample_rate)
+    if len(samples) <= max_chunk:
+        return [samples]
+
+    frame_size = max(1, sample_rate * FRAME_MS // 1000)
+    levels = frame_levels_db(samples, sample_rate)
+    min_silence_frames = max(1, MIN_SILENCE_MS // FRAME_MS)
+
+    chunks = []
+    start = 0
+    while len(samples) - start > max_chunk:
+        first_frame = (start + max_chunk // 2) // frame_size
+        last_frame = (start + max_chunk) // frame_size
+        window = levels[first_frame:last_frame]
+
+        cut_frame = None
+        run = 0
+        for index in range(len(window) - 1, -1, -1):
+            run = run + 1 if window[index] <= threshold_db else 0
+            if run >= min_silence_frames:
+                cut_frame = first_frame + index + run // 2
+                break
+        if cut_frame is None:
+            # No pause long enough, fall back to the quietest frame
+            cut_frame = first_frame + int(np.argmin(window)) if len(window) else last_frame
+
+        end = max(start + frame_size, cut_frame * frame_size)
+        chunks.append(samples[start:end])
+        start = end
+
+    chunks.append(samples[start:])
+    return chunks
+
+def encode_compact(wav_data: bytes, codec: str = COMPACT_CODEC) -> tuple[bytes, str]:
+    # Optional ffmpeg step; plain 16 kHz mono WAV is used when it isn't available
+    if codec != "opus" or not shutil.which("ffmpeg"):
+        return wav_data, "wav"
+
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", "-c:a", "libopus", "-b:a", "24k", "-f", "ogg", "pipe:1"],
+        input=wav_data,
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode != 0 or not result.stdout:
+        return wav_data, "wav"
+    return result.stdout, "ogg"
+
+def preprocess_audio(data: bytes, file_name: str = "audio.wav") -> list[tuple[bytes, str]]:
+    # Returns the (bytes, file name) chunks to transcribe, in order
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        # Compressed browser formats (webm/ogg) are already compact
+        return [(data, file_name)]
+
+    try:
+        samples, sample_rate = decode_wav(data)
+    except (wave.Error, ValueError) as e:
+        logger.warning("Error decoding audio, sending it untouched: %s", e)
+        return [(data, file_name)]
+
+    samples = trim_silence(resample(samples, sample_rate), TARGET_SAMPLE_RATE)
+    if not len(samples):
+        return []
+
+    chunks = []
+    for index, chunk in enumerate(split_on_silence(samples, TARGET_SAMPLE_RATE)):
+        chunk_data, extension = encode_compact(encode_wav(chunk, TARGET_SAMPLE_RATE))
+        chunks.append((chunk_data, f"chunk_{index}.{extension}"))
+    return chunks
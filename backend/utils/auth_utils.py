@@ -3,25 +3,117 @@ from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 import os
-from supabase import create_client, Client
+import time
+import asyncio
+import hashlib
+
+from clients.supabase_client import AsyncSupabaseClient
+from schemas.user_schema import AuthenticatedUser
+from utils.cache_utils import TTLCache
 
 security = HTTPBearer()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+AUTH_REMOTE_FALLBACK = os.getenv("AUTH_REMOTE_FALLBACK", "true").lower() == "true"
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+# Remote validations are cached by token hash, never longer than the token lifetime
+remote_user_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+)
+
+# Signing keys by kid, so only a key rotation reaches the JWKS endpoint
+signing_key_cache = TTLCache(maxsize=64, ttl=float(os.getenv("AUTH_JWKS_TTL", "600")))
+
+_jwks_client = None
+
+
+def get_jwks_client() -> jwt.PyJWKClient | None:
+    global _jwks_client
+    if _jwks_client is None and SUPABASE_URL:
+        _jwks_client = jwt.PyJWKClient(
+            f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json",
+            cache_keys=True,
+            lifespan=int(os.getenv("AUTH_JWKS_TTL", "600")),
+        )
+    return _jwks_client
+
+async def get_verification_key(token: str):
+    # Returns (None, alg) when the token can't be checked in-process so the caller can fall back
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+
+    if algorithm == "HS256" and SUPABASE_JWT_SECRET:
+        return SUPABASE_JWT_SECRET, algorithm
 
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        jwks_client = get_jwks_client()
+        if jwks_client:
+            kid = header.get("kid")
+            key = signing_key_cache.get(kid) if kid else None
+            if key is None:
+                # PyJWKClient fetches the JWKS with blocking urllib, keep it off the event loop
+                key = (await asyncio.to_thread(jwks_client.get_signing_key_from_jwt, token)).key
+                if kid:
+                    signing_key_cache.set(kid, key)
+            return key, algorithm
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return None, algorithm
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)):
+def verify_token_locally(token: str, key, algorithm: str) -> AuthenticatedUser:
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]},
+    )
+    return AuthenticatedUser(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role"),
+    )
+
+async def get_user_remotely(token: str) -> AuthenticatedUser:
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    user = remote_user_cache.get(token_hash)
+    if user:
+        return user
+
+    response = await AsyncSupabaseClient().get_client().auth.get_user(token)
+    if not response.user:
+        raise HTTPException(status_code=401, detail="User not found in Supabase")
+    # Same type as the local path, so routes never depend on which one authenticated the request
+    user = AuthenticatedUser(id=response.user.id, email=response.user.email, role=response.user.role)
+
+    expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    ttl = min(remote_user_cache.ttl, expires_at - time.time()) if expires_at else remote_user_cache.ttl
+    remote_user_cache.set(token_hash, user, ttl)
+    return user
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)) -> AuthenticatedUser:
     token = credentials.credentials
     try:
-        response = supabase.auth.get_user(token)
-        user = response.user
-        if user:
-            return user
-        else:
-            raise HTTPException(status_code=401, detail="User not found in Supabase")
+        key, algorithm = await get_verification_key(token)
+        if key is not None:
+            return verify_token_locally(token, key, algorithm)
+    except jwt.ExpiredSignatureError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
+    except jwt.PyJWTError as e:
+        if not AUTH_REMOTE_FALLBACK:
+            raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
+
+    if not AUTH_REMOTE_FALLBACK:
+        raise HTTPException(status_code=401, detail="Token can't be verified locally")
+
+    try:
+        return await get_user_remotely(token)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
@@ -0,0 +1,129 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pydantic_core import to_json
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry expiry and LRU eviction."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: dict = field(default_factory=dict)
+
+
+class UserResponseCache:
+    """Serialized per-user read responses with strong ETags, dropped whenever the user writes."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300, max_generations: int = 65536):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # LRU of (user, resource) -> generation; an evicted pair comes back with a fresh generation
+        self._generations = OrderedDict()
+        self.max_generations = max_generations
+        self._last_generation = 0
+        self._lock = threading.Lock()
+
+    def _next_generation(self) -> int:
+        # A timestamp, strictly increasing, so a pair that was evicted never gets back a generation
+        # that older cache entries (and their ETags) were stored under
+        self._last_generation = max(self._last_generation + 1, time.time_ns())
+        return self._last_generation
+
+    def _set_generation(self, pair: tuple, generation: int):
+        self._generations[pair] = generation
+        self._generations.move_to_end(pair)
+        while len(self._generations) > self.max_generations:
+            self._generations.popitem(last=False)
+
+    async def get_or_load(self, user_id: str, resource: str, loader, variant: str = "") -> CachedResponse:
+        # Invalidation bumps the generation, so a load racing with a write is stored under the old one
+        generation = self.generation(user_id, resource)
+        key = (user_id, resource, generation, variant)
+
+        cached = self._cache.get(key)
+        if cached:
+            return cached
+
+        data, headers = await loader()
+        body = to_json(data)
+        cached = CachedResponse(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', headers or {})
+        self._cache.set(key, cached)
+        return cached
+
+    def generation(self, user_id: str, resource: str) -> int:
+        # Lets other per-user caches (e.g. the search index) follow the same invalidation
+        pair = (user_id, resource)
+        with self._lock:
+            generation = self._generations.get(pair)
+            if generation is None:
+                generation = self._next_generation()
+            self._set_generation(pair, generation)
+            return generation
+
+    def invalidate(self, user_id: str, resource: str):
+        with self._lock:
+            self._set_generation((user_id, resource), self._next_generation())
+
+
+# Entries and generations live in this process: with several uvicorn workers, a write only invalidates
+# the worker that handled it, and the others keep serving the old body and answering 304 to the old
+# ETag for up to RESPONSE_CACHE_TTL. Run a single worker, or set RESPONSE_CACHE_TTL=0 to turn it off.
+user_response_cache = UserResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    max_generations=int(os.getenv("RESPONSE_CACHE_GENERATIONS", "65536")),
+)
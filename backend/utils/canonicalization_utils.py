@@ -0,0 +1,180 @@
+import re
+import threading
+
+from utils.ingredient_utils import fold_text, split_ingredients
+from utils.ingredient_vocabulary import INGREDIENT_SYNONYMS
+from utils.search_utils import TOKEN_PATTERN, tokenize
+
+
+QUANTITY_PATTERN = re.compile(r"^\d+[a-z]*$")
+# Words around an ingredient that never change which ingredient it is: "tengo unos 200 g de tomates maduros"
+FILLER_WORDS = {
+    "tengo", "hay", "quiero", "usar", "algo", "poco", "poca", "mucho", "mucha", "medio", "media", "mas", "tambien", "solo",
+    "un", "uno", "unos", "unas", "dos", "tres", "cuatro", "cinco", "par", "puñado", "pizca", "chorro", "trozo",
+    "g", "gr", "gramo", "kg", "kilo", "ml", "l", "litro", "taza", "cucharada", "cucharadita", "lata", "bote", "paquete", "unidad",
+    "fresco", "fresca", "grande", "pequeño", "pequeña", "picado", "picada", "troceado", "troceada", "rallado", "rallada",
+    "entero", "entera", "congelado", "congelada", "crudo", "cruda", "maduro", "madura", "ecologico", "ecologica",
+}
+FILLER_TOKENS = set(tokenize(" ".join(FILLER_WORDS)))
+# "sin huevo" is an exclusion, not an ingredient: a segment with any of these words is never reduced to the bare name
+NEGATION_WORDS = {"sin", "no", "ni", "nada", "without", "except"}
+# Maximum edit distance for fuzzy matches by key length: short words are too easy to confuse
+FUZZY_DISTANCES = ((5, 0), (8, 1))
+MAX_FUZZY_DISTANCE = 2
+# Below this length a substituted letter is more often a different word than a typo: "pechuga"/"lechuga", "cocino"/"comino"
+FUZZY_SUBSTITUTION_MIN_LENGTH = 9
+
+
+def is_negated(text: str) -> bool:
+    return not NEGATION_WORDS.isdisjoint(TOKEN_PATTERN.findall(fold_text(text)))
+
+def edit_distance(first: str, second: str) -> int:
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + (first_char != second_char)))
+        previous = current
+    return previous[-1]
+
+def fuzzy_distance_for(key: str) -> int:
+    for max_length, distance in FUZZY_DISTANCES:
+        if len(key) <= max_length:
+            return distance
+    return MAX_FUZZY_DISTANCE
+
+def is_typo_of(word: str, candidate: str) -> bool:
+    # Typos keep the first letter, and in short words they drop or double a letter rather than change one
+    if word[:1] != candidate[:1]:
+        return False
+    distance = edit_distance(word, candidate)
+    if distance > fuzzy_distance_for(word):
+        return False
+    return len(word) >= FUZZY_SUBSTITUTION_MIN_LENGTH or abs(len(word) - len(candidate)) == distance
+
+
+def deletions(word: str, depth: int) -> set[str]:
+    # Every string reachable from word by removing up to depth characters
+    variants, frontier = {word}, {word}
+    for _ in range(depth):
+        frontier = {variant[:position] + variant[position + 1:] for variant in frontier for position in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyIndex:
+    """Symmetric-delete index: two words within distance d share a variant with at most d characters removed,
+    so a lookup only verifies the few keys that share one instead of scanning the vocabulary."""
+
+    def __init__(self, words, max_distance: int = MAX_FUZZY_DISTANCE):
+        self.max_distance = max_distance
+        self._variants = {}
+        for word in words:
+            for variant in deletions(word, max_distance):
+                self._variants.setdefault(variant, set()).add(word)
+
+    def closest(self, word: str, max_distance: int) -> str | None:
+        if max_distance <= 0:
+            return None
+
+        candidates = set()
+        for variant in deletions(word, min(max_distance, self.max_distance)):
+            candidates |= self._variants.get(variant, set())
+
+        best, best_distance = None, max_distance + 1
+        for candidate in sorted(candidates):
+            if abs(len(candidate) - len(word)) >= best_distance or not is_typo_of(word, candidate):
+                continue
+            distance = edit_distance(word, candidate)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+
+class IngredientCanonicalizer:
+    """Maps free-text ingredient names to one canonical spelling: "Tomates", "jitomate" and "tomate cherry" -> "tomate".
+
+    Only exact and synonym hits rewrite a name. Fuzzy matching is typo correction for lookups (fuzzy=True),
+    never for names that get stored or used as cache keys."""
+
+    def __init__(self, synonyms: dict[str, list[str]] | None = None, memo_size: int = 50000):
+        self.synonyms = synonyms if synonyms is not None else INGREDIENT_SYNONYMS
+        self.memo_size = memo_size
+        self._aliases = None
+        self._fuzzy_index = None
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, keep_fillers: bool = False) -> str:
+        # Folded, plural-stemmed words without stopwords or quantities, and optionally without fillers
+        return " ".join(
+            token for token in tokenize(text)
+            if not QUANTITY_PATTERN.match(token) and (keep_fillers or token not in FILLER_TOKENS)
+        )
+
+    def load(self):
+        # Built once at startup; both structures are read-only afterwards
+        aliases, stripped = {}, {}
+        for canonical, synonyms in self.synonyms.items():
+            for alias in (canonical, *synonyms):
+                # A canonical name always wins over another entry's synonym
+                alias_key = self.key(alias, keep_fillers=True)
+                if alias_key and (alias_key not in aliases or alias == canonical):
+                    aliases[alias_key] = canonical
+                # "queso rallado" is an entry of its own, but "tomate maduro" is just "tomate"
+                stripped_key = self.key(alias)
+                if stripped_key and (stripped_key not in stripped or alias == canonical):
+                    stripped[stripped_key] = canonical
+        for stripped_key, canonical in stripped.items():
+            aliases.setdefault(stripped_key, canonical)
+        fuzzy_index = FuzzyIndex(aliases)
+
+        with self._lock:
+            self._aliases, self._fuzzy_index = aliases, fuzzy_index
+            self._memo = {}
+
+    def _resolve(self, name: str, fuzzy: bool) -> str:
+        name_key = self.key(name)
+        if not name_key:
+            return name.strip().lower()
+
+        canonical = self._aliases.get(self.key(name, keep_fillers=True)) or self._aliases.get(name_key)
+        if canonical is None and fuzzy:
+            match = self._fuzzy_index.closest(name_key, fuzzy_distance_for(name_key))
+            canonical = self._aliases[match] if match else None
+        # Unknown ingredients keep the user's wording so nothing is lost
+        return canonical or name.strip().lower()
+
+    def canonicalize(self, name: str, fuzzy: bool = False) -> str:
+        if is_negated(name):
+            return name.strip().lower()
+        if self._aliases is None:
+            self.load()
+
+        canonical = self._memo.get((name, fuzzy))
+        if canonical is None:
+            canonical = self._resolve(name, fuzzy)
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[(name, fuzzy)] = canonical
+        return canonical
+
+    def canonicalize_many(self, names: list[str] | str) -> list[str]:
+        """Canonical names for a whole list (or comma separated text), deduplicated in input order.
+
+        Exclusions such as "sin huevo" are left out, use exclusions() for those."""
+        if isinstance(names, str):
+            names = split_ingredients(names)
+        return list(dict.fromkeys(self.canonicalize(name) for name in names if name.strip() and not is_negated(name)))
+
+    def exclusions(self, names: list[str] | str) -> list[str]:
+        # The excluded segments as the user wrote them, folded: "Sin huevo" -> "sin huevo"
+        if isinstance(names, str):
+            names = split_ingredients(names)
+        return list(dict.fromkeys(" ".join(TOKEN_PATTERN.findall(fold_text(name))) for name in names if is_negated(name)))
+
+
+ingredient_canonicalizer = IngredientCanonicalizer()
@@ -0,0 +1,19 @@
+from fastapi import Request, Response
+
+from utils.cache_utils import CachedResponse
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (candidate.strip() for candidate in if_none_match.split(","))
+
+def cached_json_response(request: Request, cached: CachedResponse) -> Response:
+    # private: per-user data; no-cache: browsers revalidate with If-None-Match every time
+    headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -1,9 +1,14 @@
 class BaseAppException(Exception):
-    def __init__(self, message: str, status_code: int = 400):
+    def __init__(self, message: str, status_code: int = 400, headers: dict | None = None):
         self.message = message
         self.status_code = status_code
+        self.headers = headers
         super().__init__(message)
 
+class BadRequestException(BaseAppException):
+    def __init__(self, message: str = "Bad request"):
+        super().__init__(message, status_code=400)
+
 class NotFoundException(BaseAppException):
     def __init__(self, message: str = "Resource not found"):
         super().__init__(message, status_code=404)
@@ -11,3 +16,29 @@ class NotFoundException(BaseAppException):
 class DatabaseException(BaseAppException):
     def __init__(self, message: str = "Database error occurred"):
         super().__init__(message, status_code=500)
+
+class PayloadTooLargeException(BaseAppException):
+    def __init__(self, message: str = "Payload too large"):
+        super().__init__(message, status_code=413)
+
+class UnsupportedMediaTypeException(BaseAppException):
+    def __init__(self, message: str = "Unsupported media type"):
+        super().__init__(message, status_code=415)
+
+class TooManyRequestsException(BaseAppException):
+    def __init__(self, message: str = "Too many requests", retry_after: int | None = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        super().__init__(message, status_code=429, headers=headers)
+
+class ServiceUnavailableException(BaseAppException):
+    def __init__(self, message: str = "Service unavailable", retry_after: int | None = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        super().__init__(message, status_code=503, headers=headers)
+
+class BadGatewayException(BaseAppException):
+    def __init__(self, message: str = "Upstream service error"):
+        super().__init__(message, status_code=502)
+
+class GatewayTimeoutException(BaseAppException):
+    def __init__(self, message: str = "Upstream service timed out"):
+        super().__init__(message, status_code=504)
@@ -1,9 +1,88 @@
+import io
+import os
 import base64
 
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from utils.exceptions import PayloadTooLargeException
+
+# The vision model tiles images at 512px and never looks past ~2048px on the long side
+VISION_MAX_SIDE = int(os.getenv("VISION_MAX_SIDE", "1536"))
+VISION_MAX_BYTES = int(os.getenv("VISION_MAX_BYTES", str(512 * 1024)))
+# Below this long side ingredients stop being readable, so an image that still doesn't fit is rejected
+VISION_MIN_SIDE = int(os.getenv("VISION_MIN_SIDE", "512"))
+
+# Long side in pixels for each stored rendition of a generated recipe image
+RENDITION_SIZES = {"thumbnail": 256, "card": 640, "full": 1024}
+RENDITION_QUALITY = int(os.getenv("RENDITION_WEBP_QUALITY", "80"))
+
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
 def encode_base64(image_path: str):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode("utf-8")
     
 def decode_base64_to_file(base64_string: str, output_path: str):
     with open(output_path, "wb") as output_file:
-        output_file.write(base64.b64decode(base64_string))
\ No newline at end of file
+        output_file.write(base64.b64decode(base64_string))
+
+def sniff_image_format(data: bytes) -> str | None:
+    for signature, image_format in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return image_format
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "heic"
+    return None
+
+def prepare_image_for_vision(data: bytes, max_side: int = VISION_MAX_SIDE, max_bytes: int = VISION_MAX_BYTES) -> tuple[bytes, str]:
+    # Returns (bytes, mime type) ready for a data URL: rotated, downscaled, EXIF-free JPEG
+    image_format = sniff_image_format(data)
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError):
+        # Formats Pillow can't decode (e.g. HEIC without a plugin) go through untouched as long as they fit
+        if len(data) > max_bytes:
+            raise PayloadTooLargeException(f"Image exceeds {max_bytes} bytes and could not be downscaled")
+        return data, f"image/{image_format or 'jpeg'}"
+
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    # Lower the quality first, then keep shrinking the image until it fits
+    while True:
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        for quality in (85, 75, 65, 55):
+            output = io.BytesIO()
+            resized.save(output, format="JPEG", quality=quality, optimize=True)
+            if output.tell() <= max_bytes:
+                return output.getvalue(), "image/jpeg"
+        if max(resized.size) <= VISION_MIN_SIDE:
+            raise PayloadTooLargeException(f"Image does not fit in {max_bytes} bytes even at {VISION_MIN_SIDE}px")
+        max_side = max(VISION_MIN_SIDE, int(max(resized.size) * 0.75))
+
+def image_to_data_url(data: bytes, mime_type: str) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+def build_webp_renditions(data: bytes) -> dict[str, bytes]:
+    image = Image.open(io.BytesIO(data))
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    renditions = {}
+    for name, max_side in RENDITION_SIZES.items():
+        rendition = image.copy()
+        rendition.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        rendition.save(output, format="WEBP", quality=RENDITION_QUALITY, method=6)
+        renditions[name] = output.getvalue()
+    return renditions
+
@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+
+INGREDIENT_SEPARATORS = re.compile(r"[,;\n]|\s+y\s+|\s+e\s+")
+
+
+def fold_text(text: str) -> str:
+    # Lowercase and strip accents: "Plátano" -> "platano"
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).strip()
+
+def split_ingredients(text: str) -> list[str]:
+    return [part.strip(" .\"'") for part in INGREDIENT_SEPARATORS.split(text) if part.strip(" .\"'")]
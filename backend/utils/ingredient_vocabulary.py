@@ -0,0 +1,122 @@
+# Canonical ingredient name -> other ways users, the image reader and the transcription model write it.
+# Plurals, accents and case are folded by the canonicalizer, only list genuinely different wordings.
+INGREDIENT_SYNONYMS = {
+    # Verduras y hortalizas
+    "tomate": ["jitomate", "tomatito", "tomate cherry", "tomate pera", "tomate rama", "tomate maduro"],
+    "tomate triturado": ["tomate frito", "salsa de tomate", "tomate natural triturado", "pure de tomate"],
+    "cebolla": ["cebolla blanca", "cebolla amarilla", "cebolla dulce"],
+    "cebolla morada": ["cebolla roja", "cebolla purpura"],
+    "cebolleta": ["cebollino", "cebolla de verdeo", "cebolla tierna", "cebollin", "cebolla larga"],
+    "ajo": ["diente de ajo", "cabeza de ajo", "ajo fresco"],
+    "puerro": ["poro", "porro"],
+    "pimiento rojo": ["morron rojo", "pimenton rojo", "chile morron rojo", "aji rojo"],
+    "pimiento verde": ["morron verde", "pimenton verde", "chile morron verde", "aji verde", "pimiento italiano"],
+    "pimiento": ["morron", "chile morron"],
+    "guindilla": ["chile", "aji picante", "chile picante", "cayena", "jalapeno"],
+    "patata": ["papa", "patata nueva", "papa blanca"],
+    "boniato": ["batata", "camote", "papa dulce"],
+    "zanahoria": ["carlota"],
+    "calabacín": ["zucchini", "zapallito", "calabacita", "zapallo italiano"],
+    "calabaza": ["zapallo", "auyama", "ahuyama", "ayote"],
+    "berenjena": [],
+    "pepino": [],
+    "lechuga": ["lechuga romana", "lechuga iceberg", "cogollo"],
+    "espinaca": ["espinaca fresca", "hoja de espinaca"],
+    "acelga": [],
+    "col": ["repollo", "berza", "col blanca"],
+    "brócoli": ["brecol", "brocolis"],
+    "coliflor": [],
+    "champiñón": ["champignon", "seta", "hongo", "portobello", "callampa"],
+    "judía verde": ["ejote", "vainita", "chaucha", "habichuela", "poroto verde"],
+    "guisante": ["arveja", "chicharo", "petit pois"],
+    "maíz": ["elote", "choclo", "mazorca", "maiz dulce"],
+    "aguacate": ["palta"],
+    "apio": [],
+    "alcachofa": ["alcaucil"],
+    "espárrago": ["esparrago verde", "esparrago triguero"],
+    "remolacha": ["betabel", "betarraga"],
+    "rábano": [],
+    # Frutas
+    "plátano": ["banana", "banano", "cambur", "guineo"],
+    "manzana": [],
+    "pera": [],
+    "naranja": [],
+    "limón": ["lima", "limon verde"],
+    "fresa": ["frutilla"],
+    "melocotón": ["durazno"],
+    "albaricoque": ["damasco", "chabacano"],
+    "piña": ["anana"],
+    "mango": [],
+    "uva": [],
+    "sandía": ["patilla"],
+    "melón": [],
+    "frutos rojos": ["arandano", "frambuesa", "mora"],
+    # Carnes y pescados
+    "pollo": ["pechuga de pollo", "muslo de pollo", "contramuslo de pollo", "ala de pollo", "pollo entero"],
+    "pavo": ["pechuga de pavo"],
+    "ternera": ["carne de res", "res", "vacuno", "filete de ternera", "bistec"],
+    "carne picada": ["carne molida", "carne picada de ternera", "carne picada mixta"],
+    "cerdo": ["lomo de cerdo", "chuleta de cerdo", "puerco", "chancho", "costilla de cerdo"],
+    "cordero": [],
+    "bacon": ["panceta", "beicon", "tocino", "tocineta"],
+    "jamón serrano": ["jamon curado", "jamon iberico"],
+    "jamón cocido": ["jamon york", "jamon dulce"],
+    "chorizo": [],
+    "salchicha": ["frankfurt", "vienesa"],
+    "merluza": [],
+    "salmón": [],
+    "atún": ["atun en lata", "bonito"],
+    "bacalao": [],
+    "gamba": ["camaron", "langostino"],
+    "mejillón": ["cholga", "chorito"],
+    "calamar": [],
+    # Huevos y lácteos
+    "huevo": ["huevo de gallina", "huevo campero"],
+    "leche": ["leche entera", "leche desnatada", "leche semidesnatada"],
+    "nata": ["crema de leche", "nata para cocinar", "crema para batir", "nata liquida"],
+    "mantequilla": ["manteca"],
+    "yogur": ["yogurt", "yogur natural", "yoghurt"],
+    "queso": ["queso fresco"],
+    "queso rallado": ["queso parmesano", "parmesano", "grana padano"],
+    "mozzarella": ["queso mozzarella", "muzzarella"],
+    "queso de cabra": ["rulo de cabra"],
+    # Despensa
+    "arroz": ["arroz blanco", "arroz redondo", "arroz largo", "arroz bomba"],
+    "pasta": ["macarron", "espagueti", "spaghetti", "tallarin", "fideo", "penne", "tornillo"],
+    "harina": ["harina de trigo", "harina comun"],
+    "pan": ["barra de pan", "pan de molde", "pan lactal", "baguette"],
+    "pan rallado": ["pan molido", "miga de pan"],
+    "garbanzo": ["garbanzo cocido"],
+    "lenteja": ["lenteja cocida"],
+    "alubia": ["frijol", "frejol", "poroto", "judia blanca", "habichuela roja", "caraota"],
+    "avena": ["copo de avena"],
+    "azúcar": ["azucar blanco", "azucar moreno"],
+    "sal": ["sal fina", "sal gruesa", "sal marina"],
+    "pimienta": ["pimienta negra", "pimienta molida"],
+    "aceite de oliva": ["aceite de oliva virgen", "aceite de oliva virgen extra", "aove", "aceite"],
+    "aceite de girasol": ["aceite vegetal", "aceite de maiz"],
+    "vinagre": ["vinagre de vino", "vinagre de manzana"],
+    "caldo de pollo": ["caldo de ave", "consome de pollo", "pastilla de caldo"],
+    "caldo de verduras": ["caldo vegetal"],
+    "vino blanco": [],
+    "vino tinto": [],
+    "miel": [],
+    "chocolate": ["chocolate negro", "chocolate para fundir", "cacao"],
+    "levadura": ["polvo de hornear", "levadura quimica", "polvo para hornear"],
+    "tofu": [],
+    "nuez": ["nuez pelada"],
+    "almendra": ["almendra laminada", "almendra molida"],
+    # Hierbas y especias
+    "perejil": [],
+    "cilantro": ["culantro"],
+    "albahaca": [],
+    "orégano": [],
+    "romero": [],
+    "tomillo": [],
+    "laurel": ["hoja de laurel"],
+    "comino": [],
+    "pimentón": ["paprika", "pimenton dulce", "pimenton de la vera"],
+    "canela": [],
+    "jengibre": ["kion"],
+    "curry": ["curry en polvo"],
+}
@@ -0,0 +1,163 @@
+import time
+import logging
+from contextlib import contextmanager
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+from utils.logging_utils import get_logger
+
+logger = get_logger("metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "frigochef_http_request_duration_seconds", "API request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+SPAN_SECONDS = Histogram(
+    "frigochef_span_duration_seconds", "Duration of agent tools, runner turns, model calls and Supabase calls",
+    ["kind", "name", "model", "status"], buckets=LATENCY_BUCKETS,
+)
+SPAN_PAYLOAD_BYTES = Histogram(
+    "frigochef_span_payload_bytes", "Payload size sent to or received from an upstream",
+    ["kind", "name", "direction"], buckets=BYTES_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "frigochef_llm_tokens_total", "Tokens consumed per model",
+    ["model", "direction"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "frigochef_admission_rejections_total", "Generation requests turned away by admission control",
+    ["route", "reason"],
+)
+MODEL_ROUTE_DECISIONS = Counter(
+    "frigochef_model_route_decisions_total", "Model tier picked per pipeline stage and why",
+    ["stage", "tier", "reason"],
+)
+MODEL_ROUTE_SECONDS = Histogram(
+    "frigochef_model_route_duration_seconds", "Latency of each pipeline stage per model tier",
+    ["stage", "tier", "status"], buckets=LATENCY_BUCKETS,
+)
+MODEL_ROUTE_TOKENS = Counter(
+    "frigochef_model_route_tokens_total", "Tokens consumed per pipeline stage and model tier",
+    ["stage", "tier", "direction"],
+)
+MODEL_ROUTE_COST = Counter(
+    "frigochef_model_route_cost_usd_total", "Estimated spend per pipeline stage and model tier, from the prices in the routing config",
+    ["stage", "tier"],
+)
+RECIPE_CACHE_LOOKUPS = Counter(
+    "frigochef_recipe_cache_lookups_total", "Generated-recipe cache lookups by result",
+    ["result"],
+)
+RESILIENCE_EVENTS = Counter(
+    "frigochef_resilience_events_total", "Timeouts, retries, hedges and circuit breaker decisions per upstream call",
+    ["upstream", "operation", "event"],
+)
+CIRCUIT_STATE = Gauge(
+    "frigochef_circuit_open", "1 while the circuit breaker of an upstream is open",
+    ["upstream"],
+)
+AI_IN_FLIGHT = Gauge(
+    "frigochef_ai_in_flight", "Generations currently holding a slot in this process",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "frigochef_admission_wait_seconds", "Time a generation waited for a slot in the LLM concurrency budget",
+    ["route"], buckets=LATENCY_BUCKETS,
+)
+
+
+class Span:
+    __slots__ = ("kind", "name", "model", "status", "request_bytes", "response_bytes")
+
+    def __init__(self, kind: str, name: str, model: str | None = None):
+        self.kind = kind
+        self.name = name
+        self.model = model
+        self.status = "ok"
+        self.request_bytes = None
+        self.response_bytes = None
+
+    def record_usage(self, usage, model: str | None = None):
+        record_llm_usage(model or self.model, usage)
+
+
+@contextmanager
+def span(kind: str, name: str, model: str | None = None):
+    current = Span(kind, name, model)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        observe_span(current, time.perf_counter() - start)
+
+def observe_span(current: Span, duration: float):
+    SPAN_SECONDS.labels(current.kind, current.name, current.model or "", current.status).observe(duration)
+    if current.request_bytes is not None:
+        SPAN_PAYLOAD_BYTES.labels(current.kind, current.name, "request").observe(current.request_bytes)
+    if current.response_bytes is not None:
+        SPAN_PAYLOAD_BYTES.labels(current.kind, current.name, "response").observe(current.response_bytes)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("span finished", extra={
+            "kind": current.kind,
+            "span": current.name,
+            "model": current.model,
+            "status": current.status,
+            "duration_ms": round(duration * 1000, 2),
+            "request_bytes": current.request_bytes,
+            "response_bytes": current.response_bytes,
+        })
+
+def usage_tokens(usage) -> tuple[int | None, int | None]:
+    # Accepts Responses API usage objects, the Agents SDK Usage and plain dicts
+    if not usage:
+        return None, None
+    if isinstance(usage, dict):
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    input_tokens = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None)
+    return input_tokens, output_tokens
+
+def record_llm_usage(model: str | None, usage):
+    input_tokens, output_tokens = usage_tokens(usage)
+    if input_tokens:
+        LLM_TOKENS.labels(model or "", "input").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(model or "", "output").inc(output_tokens)
+
+def upstream_span_name(kind: str, path: str) -> str:
+    # "/rest/v1/recipes" -> "recipes", "/rest/v1/rpc/insert_complete_recipe" -> "rpc/insert_complete_recipe"
+    parts = [part for part in path.split("/") if part]
+    if kind == "supabase" and len(parts) >= 2 and parts[1].startswith("v"):
+        parts = ([parts[0]] if parts[0] != "rest" else []) + parts[2:]
+    elif parts and parts[0].startswith("v") and parts[0][1:].isdigit():
+        parts = parts[1:]
+    return "/".join(parts) or "/"
+
+def httpx_span_hooks(kind: str) -> dict:
+    # Times every call made through a shared httpx pool, measured up to the response headers
+    async def on_request(request: httpx.Request):
+        request.extensions["span_start"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response):
+        start = response.request.extensions.get("span_start")
+        if start is None:
+            return
+
+        current = Span(kind, f"{response.request.method} {upstream_span_name(kind, response.request.url.path)}")
+        current.status = "ok" if response.status_code < 400 else str(response.status_code)
+        current.request_bytes = int(response.request.headers.get("content-length", 0))
+        if "content-length" in response.headers:
+            current.response_bytes = int(response.headers["content-length"])
+        observe_span(current, time.perf_counter() - start)
+
+    return {"request": [on_request], "response": [on_response]}
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,17 @@
+import base64
+from datetime import datetime
+
+from utils.exceptions import BadRequestException
+
+
+def encode_cursor(created_at: datetime, recipe_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{recipe_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, recipe_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(recipe_id)
+    except Exception:
+        raise BadRequestException("Invalid pagination cursor")
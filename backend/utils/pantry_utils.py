@@ -0,0 +1,91 @@
+import numpy as np
+
+from utils.search_utils import tokenize
+from utils.canonicalization_utils import ingredient_canonicalizer, is_negated
+
+
+# Basics every kitchen has, never reported as missing
+PANTRY_STAPLES = {tokenize(name)[0] for name in ("sal", "aceite", "agua", "pimienta", "vinagre", "azucar")}
+# Set bits per byte, so popcounts over packed rows stay vectorized on any numpy version
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def canonical_ingredient(name: str, fuzzy: bool = False) -> tuple[str, ...]:
+    # "Tomates cherry" -> ("tomat",), "jitomate" -> ("tomat",), "salsa de ostras" -> ("salsa", "ostra")
+    return tuple(tokenize(ingredient_canonicalizer.canonicalize(name, fuzzy)))
+
+def is_staple(tokens: tuple[str, ...]) -> bool:
+    return bool(tokens) and tokens[0] in PANTRY_STAPLES
+
+
+class PantryMatcher:
+    """Recipe ingredient sets packed as bitsets over a shared vocabulary, ranked against a pantry in one numpy pass."""
+
+    def __init__(self, recipes: list[tuple[object, list[str]]]):
+        self.vocabulary = []
+        self._ids = {}
+        self._postings = {}
+
+        # Per recipe: vocabulary id -> ingredient name as the recipe spells it
+        self.names = []
+        for _, ingredients in recipes:
+            names = {}
+            for name in ingredients:
+                tokens = canonical_ingredient(name)
+                if tokens and not is_staple(tokens):
+                    names.setdefault(self._vocabulary_id(tokens), name)
+            self.names.append(names)
+
+        self.keys = [key for key, _ in recipes]
+        self.required = np.array([len(names) for names in self.names], dtype=np.int32)
+
+        bits = np.zeros((len(self.names), max(len(self.vocabulary), 1)), dtype=bool)
+        for position, names in enumerate(self.names):
+            bits[position, list(names)] = True
+        self.matrix = np.packbits(bits, axis=1)
+
+    def _vocabulary_id(self, tokens: tuple[str, ...]) -> int:
+        vocabulary_id = self._ids.get(tokens)
+        if vocabulary_id is None:
+            vocabulary_id = self._ids[tokens] = len(self.vocabulary)
+            self.vocabulary.append(tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(vocabulary_id)
+        return vocabulary_id
+
+    def encode_pantry(self, pantry: list[str]) -> np.ndarray:
+        # A pantry item covers every recipe ingredient that is a more or less specific name for it:
+        # "pimiento" covers "pimiento rojo" and "pimiento rojo" covers "pimiento"
+        covered = np.zeros(max(len(self.vocabulary), 1), dtype=bool)
+        # "sin huevo" says what the user does not have; typos in what they do have are corrected
+        for tokens in (canonical_ingredient(name, fuzzy=True) for name in pantry if not is_negated(name)):
+            candidates = set().union(*(self._postings.get(token, set()) for token in tokens)) if tokens else set()
+            for vocabulary_id in candidates:
+                entry = self.vocabulary[vocabulary_id]
+                if set(tokens) <= set(entry) or set(entry) <= set(tokens):
+                    covered[vocabulary_id] = True
+        return np.packbits(covered)
+
+    def decode(self, position: int, packed_row: np.ndarray) -> list[str]:
+        bits = np.unpackbits(packed_row)[:len(self.vocabulary)]
+        return [self.names[position][vocabulary_id] for vocabulary_id in np.flatnonzero(bits)]
+
+    def match(self, pantry: list[str], limit: int = 10, max_missing: int = 2) -> list[tuple[object, float, list[str], list[str]]]:
+        """Returns (key, coverage, matched, missing) for the best recipes, fewest missing ingredients first."""
+        if not self.keys:
+            return []
+
+        pantry_bits = self.encode_pantry(pantry)
+        have = self.matrix & pantry_bits
+        matched_counts = POPCOUNT[have].sum(axis=1)
+        missing_counts = self.required - matched_counts
+        coverage = np.divide(matched_counts, self.required, out=np.zeros(len(self.keys)), where=self.required > 0)
+
+        candidates = np.flatnonzero((matched_counts > 0) & (missing_counts <= max_missing))
+        # Stable sort keeps the caller's order (newest first) between equal matches
+        order = candidates[np.lexsort((-coverage[candidates], missing_counts[candidates]))][:limit]
+
+        return [
+            (self.keys[position], float(coverage[position]), self.decode(position, have[position]), self.decode(position, self.matrix[position] & ~pantry_bits))
+            for position in order
+        ]
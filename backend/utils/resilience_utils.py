@@ -0,0 +1,253 @@
+import os
+import time
+import random
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import httpx
+import openai
+from postgrest.exceptions import APIError as PostgrestAPIError
+
+from utils.exceptions import ServiceUnavailableException, GatewayTimeoutException
+from utils.logging_utils import get_logger
+from utils.metrics_utils import RESILIENCE_EVENTS, CIRCUIT_STATE
+
+logger = get_logger(__name__)
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[float | None] = ContextVar("frigochef_deadline", default=None)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+# Statement timeout, serialization failure, deadlock; 08xxx and 53xxx are connection and resource errors
+RETRYABLE_POSTGRES_CODES = {"57014", "40001", "40P01"}
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    timeout: float
+    retries: int = 0
+    backoff_base: float = 0.2
+    backoff_max: float = 2.0
+    # Start a second identical request when the first has not answered after this many seconds
+    hedge_after: float | None = None
+
+
+class DeadlineExceeded(GatewayTimeoutException, asyncio.TimeoutError):
+    # Still a TimeoutError for callers that handle timeouts, and a 504 when it reaches the client
+    pass
+
+
+@contextmanager
+def deadline(seconds: float):
+    # Nested budgets can only shorten the one already in place
+    current = _deadline.get()
+    token = _deadline.set(min(current, time.monotonic() + seconds) if current else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_budget() -> float | None:
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, PostgrestAPIError):
+        code = str(error.code or "")
+        return code in RETRYABLE_POSTGRES_CODES or code.startswith(("08", "53")) or (code.isdigit() and int(code) in RETRYABLE_STATUS_CODES)
+    return False
+
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures, then lets a single probe through once the cooldown has passed."""
+
+    def __init__(self, upstream: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self, operation: str) -> bool:
+        # Returns whether this call is the half-open probe
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+
+        RESILIENCE_EVENTS.labels(self.upstream, operation, "circuit_rejected").inc()
+        retry_after = max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)))
+        raise ServiceUnavailableException(f"{self.upstream} is unavailable, try again later", retry_after=retry_after)
+
+    def release_probe(self):
+        self._probing = False
+
+    def record_success(self, probe: bool):
+        if probe or self.opened_at is not None:
+            logger.info("Circuit for %s closed", self.upstream)
+            CIRCUIT_STATE.labels(self.upstream).set(0)
+        if probe:
+            self._probing = False
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self, operation: str, probe: bool):
+        if probe:
+            self._probing = False
+        self.failures += 1
+        if probe or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            logger.warning("Circuit for %s opened after %s failures", self.upstream, self.failures)
+            RESILIENCE_EVENTS.labels(self.upstream, operation, "circuit_opened").inc()
+            CIRCUIT_STATE.labels(self.upstream).set(1)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    breaker = _breakers.get(upstream)
+    if breaker is None:
+        breaker = _breakers[upstream] = CircuitBreaker(
+            upstream,
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+        )
+    return breaker
+
+
+async def _hedged(upstream: str, operation: str, call, hedge_after: float):
+    # First answer wins; the slower request is cancelled, and so is everything if the caller goes away
+    first = asyncio.ensure_future(call())
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        RESILIENCE_EVENTS.labels(upstream, operation, "hedge").inc()
+        second = asyncio.ensure_future(call())
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        RESILIENCE_EVENTS.labels(upstream, operation, "hedge_won").inc()
+                    return task.result()
+        # Both failed, surface the original request's error
+        return first.result()
+    finally:
+        for task in pending:
+            if not task.done():
+                task.cancel()
+
+async def resilient_call(upstream: str, operation: str, call, policy: CallPolicy):
+    """Runs call() under the request deadline, the upstream's circuit breaker, retries with full jitter and optional hedging.
+
+    Only pass retries or hedge_after for calls that are safe to repeat."""
+    breaker = get_breaker(upstream)
+    attempt = 0
+    while True:
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            RESILIENCE_EVENTS.labels(upstream, operation, "deadline_exceeded").inc()
+            raise DeadlineExceeded(f"Request budget exhausted before {upstream}.{operation}")
+        budget_capped = remaining is not None and remaining < policy.timeout
+        timeout = min(policy.timeout, remaining) if budget_capped else policy.timeout
+
+        probe = breaker.before_call(operation)
+        try:
+            # asyncio.timeout cancels in place, wait_for would cost an extra task per call
+            async with asyncio.timeout(timeout):
+                if policy.hedge_after and policy.hedge_after < timeout:
+                    result = await _hedged(upstream, operation, call, policy.hedge_after)
+                else:
+                    result = await call()
+        except asyncio.CancelledError:
+            # The caller went away, which says nothing about the upstream
+            if probe:
+                breaker.release_probe()
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError) and budget_capped:
+                # Our own request budget ran out, the upstream was not necessarily slow
+                if probe:
+                    breaker.release_probe()
+                RESILIENCE_EVENTS.labels(upstream, operation, "deadline_exceeded").inc()
+                raise DeadlineExceeded(f"Request budget exhausted during {upstream}.{operation}") from e
+
+            retryable = is_retryable(e)
+            if isinstance(e, asyncio.TimeoutError):
+                RESILIENCE_EVENTS.labels(upstream, operation, "timeout").inc()
+            # Client errors say nothing about the upstream's health
+            if retryable:
+                breaker.record_failure(operation, probe)
+            elif probe:
+                breaker.record_success(probe)
+
+            if not retryable or attempt >= policy.retries:
+                raise
+
+            delay = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+            remaining = remaining_budget()
+            if remaining is not None and delay >= remaining:
+                raise
+            attempt += 1
+            RESILIENCE_EVENTS.labels(upstream, operation, "retry").inc()
+            logger.warning("Retrying %s.%s after %s (attempt %s)", upstream, operation, type(e).__name__, attempt)
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success(probe)
+        return result
+
+
+def _env_float(name: str, default: str) -> float | None:
+    value = float(os.getenv(name, default))
+    return value if value > 0 else None
+
+# Timeouts are per attempt; the request deadline caps them further
+OPENAI_TEXT_POLICY = CallPolicy(
+    timeout=float(os.getenv("OPENAI_CALL_TIMEOUT", "60")),
+    retries=int(os.getenv("OPENAI_CALL_RETRIES", "2")),
+    backoff_base=0.5,
+    backoff_max=4.0,
+    hedge_after=_env_float("OPENAI_HEDGE_AFTER", "0"),
+)
+OPENAI_IMAGE_POLICY = CallPolicy(
+    timeout=float(os.getenv("OPENAI_IMAGE_CALL_TIMEOUT", "90")),
+    retries=int(os.getenv("OPENAI_CALL_RETRIES", "2")),
+    backoff_base=0.5,
+    backoff_max=4.0,
+)
+SUPABASE_READ_POLICY = CallPolicy(
+    timeout=float(os.getenv("SUPABASE_CALL_TIMEOUT", "10")),
+    retries=int(os.getenv("SUPABASE_CALL_RETRIES", "2")),
+    hedge_after=_env_float("SUPABASE_HEDGE_AFTER", "0"),
+)
+# Inserts are not idempotent: a timed out write may still have committed
+SUPABASE_WRITE_POLICY = CallPolicy(timeout=float(os.getenv("SUPABASE_CALL_TIMEOUT", "10")))
+
+
+async def execute_query(query, operation: str, idempotent: bool = True):
+    return await resilient_call("supabase", operation, query.execute, SUPABASE_READ_POLICY if idempotent else SUPABASE_WRITE_POLICY)
@@ -0,0 +1,85 @@
+import re
+import math
+from bisect import bisect_left
+
+from utils.ingredient_utils import fold_text
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9ñ]+")
+STOPWORDS = {"a", "al", "con", "de", "del", "e", "el", "en", "la", "las", "lo", "los", "o", "para", "por", "sin", "un", "una", "y"}
+# Title hits matter more than tag hits, which matter more than ingredient hits
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "ingredients": 1.0}
+
+
+def stem(token: str) -> str:
+    # Light Spanish plural folding, applied the same way to documents and queries:
+    # "tomates"/"tomate" -> "tomat", "limones"/"limón" -> "limon", "nueces" -> "nuez"
+    if len(token) > 4 and token.endswith("ces"):
+        return token[:-3] + "z"
+    if len(token) > 3 and token.endswith("s"):
+        token = token[:-1]
+    if len(token) > 4 and token.endswith("e") and token[-2] not in "aeiou":
+        token = token[:-1]
+    return token
+
+def tokenize(text: str) -> list[str]:
+    return [stem(token) for token in TOKEN_PATTERN.findall(fold_text(text)) if token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """Weighted term -> document postings with AND queries, prefix matching on the last term and idf ranking."""
+
+    def __init__(self):
+        self.postings = {}
+        self.documents = {}
+        self._vocabulary = None
+
+    def add(self, document_id, fields: dict[str, str], payload=None):
+        self.documents[document_id] = payload
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for term in set(tokenize(text or "")):
+                postings = self.postings.setdefault(term, {})
+                postings[document_id] = postings.get(document_id, 0.0) + weight
+        self._vocabulary = None
+
+    def _terms_with_prefix(self, prefix: str) -> list[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, sort_key=None) -> tuple[list[tuple[object, float]], int]:
+        terms = tokenize(query)
+        if not terms or not self.documents:
+            return [], 0
+
+        total_documents = len(self.documents)
+        scores = None
+        for position, term in enumerate(terms):
+            # The last word may still be being typed
+            expansions = self._terms_with_prefix(term) if position == len(terms) - 1 else [term]
+
+            term_scores = {}
+            for expansion in expansions:
+                postings = self.postings.get(expansion, {})
+                idf = math.log(1 + total_documents / len(postings)) if postings else 0.0
+                for document_id, weight in postings.items():
+                    term_scores[document_id] = max(term_scores.get(document_id, 0.0), weight * idf)
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {document_id: score + term_scores[document_id] for document_id, score in scores.items() if document_id in term_scores}
+            if not scores:
+                return [], 0
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], sort_key(self.documents[item[0]]) if sort_key else 0),
+        )
+        return ranked[offset:offset + limit], len(ranked)
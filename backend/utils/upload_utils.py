@@ -0,0 +1,116 @@
+import os
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+
+from fastapi import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from utils.exceptions import BadRequestException, PayloadTooLargeException, UnsupportedMediaTypeException
+
+UPLOAD_MAX_BYTES = {
+    "image": int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024))),
+    "audio": int(os.getenv("AUDIO_UPLOAD_MAX_BYTES", str(25 * 1024 * 1024))),
+}
+UPLOAD_CONTENT_TYPES = {
+    "image": ("image/jpeg", "image/png", "image/webp", "image/gif", "image/heic", "image/heif"),
+    "audio": ("audio/wav", "audio/x-wav", "audio/wave", "audio/webm", "audio/ogg", "audio/mpeg", "audio/mp4", "audio/x-m4a"),
+}
+# Uploads up to this size stay in memory, larger ones roll over to disk
+UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+# Room for the multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+@dataclass
+class SpooledUpload:
+    file: SpooledTemporaryFile
+    filename: str
+    content_type: str
+    size: int
+
+
+async def receive_upload(request: Request, tool: str, field_name: str = "file") -> SpooledUpload:
+    # Streams the multipart body into a spooled buffer, enforcing the per-type limits as bytes arrive
+    if tool not in UPLOAD_MAX_BYTES:
+        raise BadRequestException(f"Unsupported upload tool: {tool}")
+
+    max_bytes = UPLOAD_MAX_BYTES[tool]
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise PayloadTooLargeException(f"Upload exceeds the {max_bytes} bytes limit for {tool}")
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise BadRequestException("Expected a multipart/form-data body")
+
+    state = {"headers": {}, "field": b"", "value": b"", "target": None}
+    upload = SpooledUpload(SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY), "", "", 0)
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["target"] = None
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = b""
+        state["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if disposition.get(b"name", b"").decode() != field_name or upload.filename:
+            return
+
+        part_content_type = state["headers"].get(b"content-type", b"").decode().split(";")[0].strip().lower()
+        if part_content_type not in UPLOAD_CONTENT_TYPES[tool]:
+            raise UnsupportedMediaTypeException(f"Unsupported content type for {tool}: {part_content_type}")
+
+        upload.filename = disposition.get(b"filename", b"upload").decode()
+        upload.content_type = part_content_type
+        state["target"] = upload.file
+
+    def on_part_data(data, start, end):
+        if state["target"] is None:
+            return
+        upload.size += end - start
+        if upload.size > max_bytes:
+            raise PayloadTooLargeException(f"Upload exceeds the {max_bytes} bytes limit for {tool}")
+        state["target"].write(data[start:end])
+
+    def on_part_end():
+        state["target"] = None
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    except Exception:
+        upload.file.close()
+        raise
+
+    if not upload.filename:
+        upload.file.close()
+        raise BadRequestException(f"Missing '{field_name}' file field")
+
+    upload.file.seek(0)
+    return upload